@@ -0,0 +1,146 @@
+'''
+A read-through, in-process catalog of the experiments.
+
+Nearly every presenter request looks up its Experiment by class name, then
+follows the current version to its playlist, but the Experiment and
+ExperimentVersion tables only change when archives are made or experiments are
+set live. So each process keeps all the experiments, with their current
+versions, in memory, along with the metadata of the current playlists, e.g.
+their instructions, and answers lookups without queries.
+
+Every save of an Experiment or ExperimentVersion bumps a generation counter
+that is kept in the Django cache, and a process reloads its catalog when it
+sees that the generation has changed. That only keeps the processes' catalogs
+coherent if the cache is shared by all of them, e.g. memcached, as in the
+production and staging settings. With a local memory cache, as in the base
+settings, there is no generation, and so no catalog: each lookup queries the
+database directly, as it did before there was a catalog.
+
+The experiments in the catalog are shared between requests and threads, and
+so are only to be read, never changed and saved.
+'''
+
+from __future__ import absolute_import
+
+#=============================================================================
+# Standard library imports.
+#=============================================================================
+import threading
+
+#=============================================================================
+# Wilhelm imports.
+#=============================================================================
+from apps.archives.models import Experiment, get_catalog_generation
+
+#================================ End Imports ================================
+
+class Catalog(object):
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = None
+        self.experiments = {}
+        self.playlists = {}
+
+    def load(self, generation):
+
+        ''' Read the experiments, with their current versions, in one query.'''
+
+        experiments\
+            = dict((experiment.class_name, experiment)
+                   for experiment
+                   in Experiment.objects.select_related('current_version'))
+
+        # Replaced together, so that lookups in other threads see either the
+        # old catalog or the new one.
+        self.experiments, self.playlists = experiments, {}
+        self.generation = generation
+
+    def refresh(self):
+
+        '''
+        Reload the catalog if its generation has changed. Return the
+        experiments and the playlists' metadata, or (None, None) if there is
+        no shared cache to keep the generation, and so the catalog can not be
+        trusted.
+        '''
+
+        generation = get_catalog_generation()
+
+        if generation is None:
+            return None, None
+
+        if generation != self.generation:
+            with self.lock:
+                if generation != self.generation:
+                    self.load(generation)
+
+        return self.experiments, self.playlists
+
+    def get_experiment(self, class_name):
+
+        '''
+        Return the Experiment whose class name is `class_name`. Raise
+        Experiment.DoesNotExist if there is none.
+        '''
+
+        experiments, _ = self.refresh()
+
+        return self._get_experiment(experiments, class_name)
+
+    def _get_experiment(self, experiments, class_name):
+
+        if experiments is None:
+            return Experiment.objects.select_related('current_version')\
+                .get(class_name=class_name)
+
+        try:
+            return experiments[class_name]
+        except KeyError:
+            raise Experiment.DoesNotExist(
+                'No experiment named "%s".' % class_name
+            )
+
+    def get_current_version(self, class_name):
+
+        ''' Return the current ExperimentVersion of experiment `class_name`.'''
+
+        return self.get_experiment(class_name).current_version
+
+    def get_playlist_metadata(self, class_name):
+
+        '''
+        Return the metadata of the playlist of the current version of
+        experiment `class_name`, as a dictionary of its content type id, uid,
+        instructions, and the maximum number of slides that a session plays.
+        This is read from the database only the first time for each
+        experiment in each generation.
+        '''
+
+        experiments, playlists = self.refresh()
+
+        experiment = self._get_experiment(experiments, class_name)
+
+        if playlists is None:
+            return get_playlist_metadata(experiment)
+
+        if experiment.class_name not in playlists:
+            playlists[experiment.class_name] = get_playlist_metadata(experiment)
+
+        return playlists[experiment.class_name]
+
+def get_playlist_metadata(experiment):
+
+    ''' Read the metadata of the playlist of `experiment`'s current version.'''
+
+    experiment_version = experiment.current_version
+    playlist = experiment_version.playlist
+
+    return dict(
+        playlist_ct_id = experiment_version.playlist_ct_id,
+        playlist_uid = experiment_version.playlist_uid,
+        instructions = getattr(playlist, 'instructions', None),
+        max_slides = getattr(playlist, 'max_slides', None)
+    )
+
+catalog = Catalog()
@@ -37,6 +37,11 @@ repository_settings_configspec = '''
 
 experiment_archives_cache = settings.EXPERIMENT_ARCHIVES_CACHE
 
+# The checksums of files in experiment repositories, by their git blob ids,
+# are kept in this file in the experiment archives cache, so that unchanged
+# files are not hashed again for every commit.
+checksum_cache_filename = 'checksums.json'
+
 # Default git branch.
 default_git_branch = 'master'
 
@@ -46,8 +51,16 @@ git_log_format = '--pretty=format:%H,%at'
 git_hash_length = 40
 git_abbrev_hash_length = 7
 
+# The number of threads that export and validate commits when making
+# archives. Only these run in parallel; the database is written by one thread.
+archive_import_workers = 4
+
+# The key, in the Django cache, of the generation of the experiments catalog;
+# see apps.archives.catalog.
+catalog_generation_key = 'archives:catalog_generation'
+
 # How we compress experiment archive tarballs.
-tarball_compression_method = 'bz2' # bz2 or gz
+tarball_compression_method = 'bz2' # bz2, gz, pbz2 or pgz
 
 # Inside each experiment tarball, we keep checksum info for integrity checks.
 tarball_checksum = 'checksum.txt' # Name of the file of checksum info.
@@ -8,13 +8,25 @@ from django.core.management.base import BaseCommand
 #=============================================================================
 # Wilhelm imports
 #=============================================================================
+from apps.archives import conf
 from apps.archives.models import ExperimentRepository
 
 #================================ End Imports ================================
 
 class Command(BaseCommand):
 
+    help = """make_archives [--workers 4]"""
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--workers',
+            dest='workers',
+            type=int,
+            default=conf.archive_import_workers,
+            help='Number of threads that export commits from git.'
+            )
+
     def handle(self, *args, **options):
 
         for repository in ExperimentRepository.objects.all():
-            repository.make_archives()
+            repository.make_archives(workers=options['workers'])
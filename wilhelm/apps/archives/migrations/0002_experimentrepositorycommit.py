@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archives', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='experimentrepository',
+            name='indexed_head',
+            field=models.CharField(max_length=40, null=True),
+        ),
+        migrations.CreateModel(
+            name='ExperimentRepositoryCommit',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('commit_hash', models.CharField(db_index=True, max_length=40)),
+                ('commit_date', models.DateTimeField(null=True)),
+                ('repository', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='commits', to='archives.ExperimentRepository')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='experimentrepositorycommit',
+            unique_together=set([('repository', 'commit_hash')]),
+        ),
+    ]
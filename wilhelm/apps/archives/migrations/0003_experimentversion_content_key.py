@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archives', '0002_experimentrepositorycommit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='experimentversion',
+            name='content_key',
+            field=models.CharField(db_index=True, max_length=64, null=True),
+        ),
+    ]
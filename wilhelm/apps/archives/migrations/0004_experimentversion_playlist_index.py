@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('archives', '0003_experimentversion_content_key'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='experimentversion',
+            index_together=set([('playlist_ct', 'playlist_uid')]),
+        ),
+    ]
@@ -7,21 +7,22 @@ from __future__ import absolute_import
 #=============================================================================
 # Standard library imports.
 #=============================================================================
-from collections import OrderedDict
+from collections import OrderedDict, deque
+from multiprocessing.pool import ThreadPool
+import itertools
 import os
+import shutil
 import sh
 import logging
-
-#=============================================================================
-# Third party imports.
-#=============================================================================
-import configobj, validate
+import time
 
 #=============================================================================
 # Django imports.
 #=============================================================================
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
+from django.db import models, transaction
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.conf import settings
@@ -38,6 +39,64 @@ from apps.dataexport.utils import safe_export_data
 
 logger = logging.getLogger('wilhelm')
 
+#=============================================================================
+# The catalog generation.
+#=============================================================================
+def catalog_cache_is_shared():
+
+    '''
+    Is the Django cache shared by all processes? A local memory cache is kept
+    by each process, so one process could not see that another had started a
+    new generation of the catalog.
+    '''
+
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+def get_catalog_generation():
+
+    '''
+    Return the generation of the experiments catalog, i.e. of the Experiment
+    and ExperimentVersion tables, as kept in the Django cache, or None if the
+    cache keeps nothing or is not shared by all processes. See
+    apps.archives.catalog.
+    '''
+
+    if not catalog_cache_is_shared():
+        return None
+
+    generation = cache.get(conf.catalog_generation_key)
+
+    if generation is None:
+        # Start from the time, not 0, so that a generation that was evicted
+        # from the cache does not come back as one that processes have seen.
+        cache.add(conf.catalog_generation_key, int(time.time()), None)
+        generation = cache.get(conf.catalog_generation_key)
+
+    return generation
+
+def bump_catalog_generation():
+
+    '''
+    Start a new generation of the experiments catalog, so that every process
+    reloads its catalog.
+    '''
+
+    try:
+        cache.incr(conf.catalog_generation_key)
+    except ValueError:
+        cache.set(conf.catalog_generation_key, int(time.time()), None)
+
+def catalog_changed():
+
+    '''
+    Bump the catalog generation now, and again when the current transaction,
+    if any, commits, so that other processes can not reload the catalog from
+    the old data in between.
+    '''
+
+    bump_catalog_generation()
+    transaction.on_commit(bump_catalog_generation)
+
 class ExperimentRepository(models.Model):
 
     '''
@@ -63,6 +122,9 @@ class ExperimentRepository(models.Model):
     description = models.TextField(null=True)
     is_active = models.BooleanField(default=True)
 
+    # The branch head up to which the commit index is up to date.
+    indexed_head = models.CharField(max_length=40, null=True)
+
     @classmethod
     def new(cls, path_to_git_repository):
 
@@ -85,23 +147,93 @@ class ExperimentRepository(models.Model):
     #=========================================================================
     # Public methods.
     #=========================================================================
-    def make_archives(self):
+    def make_archives(self, workers=conf.archive_import_workers):
         ''' 
-        This is unsafe for general use, but is handy for use with tests.
-        Create archives of all the versions in the repository whose dates
-        lie between the `since` and `until` dates (including those to be
-        explicitly included and excluding those to be explicitly excluded).
+        Create archives of all the versions in the repository that have not
+        already been archived, and make all the experiments in each.
 
-        As the archives are being made, trigger the ExperimentArchive to make
-        all experiment in the archive.         
+        The commits are exported from git, and their settings validated, by a
+        pool of `workers` threads, while this thread alone imports the
+        experiments and writes to the database. Each commit is archived in a
+        single transaction, so an interrupted run leaves only complete
+        archives behind, and running again resumes from where it stopped.
+
+        Return the list of new ExperimentArchives.
         '''
 
-        for commit_hash, commit_datetime in self.get_all_commits():
+        archived_commits = set(
+            ExperimentArchive.objects.filter(repository=self)\
+            .values_list('commit_hash', flat=True)
+        )
+
+        # In the order of the log, so that commits are archived in the same
+        # order every time.
+        commit_dates = OrderedDict()
+        for commit_hash, commit_date in self.get_all_commits():
+            if commit_hash not in archived_commits:
+                commit_dates[commit_hash] = commit_date
+
+        if not commit_dates:
+            return []
+
+        workers = max(1, min(workers, len(commit_dates)))
+        pool = ThreadPool(workers)
+
+        # At most `workers` exports are in flight, or done and waiting to be
+        # archived, at any one time, so that they do not pile up on disk
+        # when the database is slower than git.
+        commit_hashes = iter(commit_dates)
+        pending = deque()
+
+        def export_next_commit():
+            for commit_hash in itertools.islice(commit_hashes, 1):
+                pending.append(pool.apply_async(utils.export_commit,
+                                                (self.path, commit_hash)))
+
+        try:
+
+            for _ in range(workers):
+                export_next_commit()
+
+            experiment_archives = []
+            while pending:
 
-            ExperimentArchive.new(repository=self,
-                                  commit_hash = commit_hash)
+                commit_hash, exported_archive, config = pending.popleft().get()
+                export_next_commit()
 
+                try:
 
+                    with transaction.atomic():
+
+                        experiment_archive = ExperimentArchive.objects.create(
+                            repository = self,
+                            commit_hash = commit_hash,
+                            commit_date = commit_dates[commit_hash]
+                        )
+
+                        experiment_archive.make_experiments(exported_archive,
+                                                            config)
+
+                finally:
+                    shutil.rmtree(exported_archive, ignore_errors=True)
+
+                experiment_archives.append(experiment_archive)
+
+        finally:
+
+            # After an error, remove the exports that were made but never
+            # archived.
+            while pending:
+                try:
+                    _, exported_archive, _ = pending.popleft().get()
+                except Exception:
+                    continue
+                shutil.rmtree(exported_archive, ignore_errors=True)
+
+            pool.terminate()
+            pool.join()
+
+        return experiment_archives
 
     def get_all_commits(self):
         ''' Return a list of all commits on the branch of the git project.
@@ -141,6 +273,77 @@ class ExperimentRepository(models.Model):
                 for commit_hash, commit_date in self.get_all_commits()
                 }
 
+    def update_commit_index(self):
+
+        '''
+        Bring the persisted commit index (ExperimentRepositoryCommit) up to
+        date with the head of the branch. If the previously indexed head is an
+        ancestor of the current head, only the commits since then are read
+        from git log. Otherwise, e.g. after a rewrite of history, the index is
+        rebuilt from scratch.
+
+        Return the number of newly indexed commits.
+        '''
+
+        head = git.rev_parse(self.path, self.branch)
+
+        if head == self.indexed_head:
+            return 0
+
+        incremental = bool(self.indexed_head)\
+            and git.is_ancestor(self.path, self.indexed_head, head)
+
+        if incremental:
+            revisions = '%s..%s' % (self.indexed_head, head)
+        else:
+            self.commits.all().delete()
+            revisions = head
+
+        new_commits = [
+            ExperimentRepositoryCommit(repository=self,
+                                       commit_hash=commit_hash,
+                                       commit_date=commit_date)
+            for commit_hash, commit_date in git.log(self.path,
+                                                    revisions,
+                                                    conf.git_log_format)
+        ]
+
+        ExperimentRepositoryCommit.objects.bulk_create(new_commits)
+
+        self.indexed_head = head
+        self.save(update_fields=['indexed_head'])
+
+        # Add the new commits to the index in memory, if there is one, rather
+        # than read them all back from the database.
+        if incremental and getattr(self, '_commit_index', None) is not None:
+            self._commit_index.add(
+                (commit.commit_hash, commit.commit_date)
+                for commit in new_commits
+            )
+        else:
+            self._commit_index = None
+
+        return len(new_commits)
+
+    def get_commit_index(self, refresh=False):
+
+        '''
+        Return the index of all commits on the branch, as a git.CommitIndex.
+        It is read from the database once per instance and refreshed from git
+        if `refresh` is True or nothing has been indexed yet.
+        '''
+
+        if refresh or not self.indexed_head:
+            self.update_commit_index()
+
+        if getattr(self, '_commit_index', None) is None:
+            self._commit_index = git.CommitIndex(
+                self.commits.values_list('commit_hash', 'commit_date'),
+                hash_length=conf.git_hash_length
+            )
+
+        return self._commit_index
+
     def has_commit(self, commit_hash):
 
         try:
@@ -152,11 +355,11 @@ class ExperimentRepository(models.Model):
     def get_commit(self, commit_hash):
         
         '''
-        A bit of brute force-ish way to get what 
+        Return what 
 
         git show -s --format=%H,%at commit_hash 
 
-        would give.
+        would give, as a (hash, datetime) tuple, using the commit index.
 
         It raise a KeyError is there is no such commit_hash in the repo.
 
@@ -165,28 +368,27 @@ class ExperimentRepository(models.Model):
 
         '''
 
-        commits = self.get_all_commits_as_dict()
-        K = len(commit_hash)
-
-        if K > conf.git_hash_length:
-            raise KeyError
+        try:
+            return self.get_commit_index().get(commit_hash)
+        except KeyError:
+            # Perhaps the commit is newer than the index.
+            return self.get_commit_index(refresh=True).get(commit_hash)
 
-        if K == conf.git_hash_length:
-            return commits[commit_hash]
 
-        else:
+class ExperimentRepositoryCommit(models.Model):
 
-            matches = [key[:K] == commit_hash for key in commits.keys()]
-            if sum(matches) == 0:
-                raise KeyError
-            elif sum(matches) == 1:
-                commit_hash = [key for key in commits.keys() if key[:K] == commit_hash].pop()
-            else:
-                raise Exception('More than one hash matches %s' % commit_hash)
-
-            return commits[commit_hash]
+    '''
+    A commit on the branch of an ExperimentRepository. Together, these are the
+    repository's commit index; see ExperimentRepository.update_commit_index.
+    '''
 
+    repository = models.ForeignKey(ExperimentRepository,
+                                   related_name='commits')
+    commit_hash = models.CharField(max_length=40, db_index=True)
+    commit_date = models.DateTimeField(null=True)
 
+    class Meta:
+        unique_together = ('repository', 'commit_hash')
 
 
 class ExperimentArchive(models.Model):
@@ -211,46 +413,75 @@ class ExperimentArchive(models.Model):
             experiment_archive = cls.objects.get(repository = repository,
                                                  commit_hash = commit_hash)
 
+            experiment_archive.make_experiments()
+
         except ObjectDoesNotExist:
 
+            with transaction.atomic():
 
-            experiment_archive = cls.objects.create(repository = repository,
-                                                    commit_hash = commit_hash,
-                                                    commit_date = commit_date)
+                experiment_archive\
+                    = cls.objects.create(repository = repository,
+                                         commit_hash = commit_hash,
+                                         commit_date = commit_date)
 
-        experiment_archive.make_experiments()
+                experiment_archive.make_experiments()
 
         return experiment_archive
 
     #=========================================================================
     # Instance method.
     #=========================================================================
-    def make_experiments(self):
+    def make_experiments(self, exported_archive=None, config=None):
 
         '''
         Create experiment versions (and their experiment parents, if necessary)
         for each experiment listed in this archive. The creation entails the
         creation of playlists for each experiment.
+
+        The archive is exported from git, and removed again afterwards, unless
+        the `exported_archive` directory (and perhaps its `config`) is given.
         '''
 
-        exported_archive = git.export(self.repository.path,
-                                      self.commit_hash)
+        if exported_archive is None:
 
-        experiments_module = python.impfromsource(
-            conf.repository_experiments_modulename, exported_archive
-        )
+            with utils.exported_commit(self.repository.path,
+                                       self.commit_hash) as (exported_archive,
+                                                             config):
 
-        experiments_settings = os.path.join(exported_archive,
-                                            conf.repository_settings_filename)
+                return self.make_experiments(exported_archive, config)
 
-        config = configobj.ConfigObj(
-            experiments_settings,
-            configspec = conf.repository_settings_configspec
-            )
+        if config is None:
+            config = utils.read_experiments_settings(exported_archive)
+
+        blob_ids = git.blob_ids(self.repository.path,
+                                self.commit_hash,
+                                utils.experiments_paths(config))
+
+        checksum_cache = utils.get_checksum_cache()
 
-        validator = validate.Validator()
+        content_keys = {
+            class_name: utils.experiment_content_key(exported_archive,
+                                                     class_name,
+                                                     experiment_notes['include'],
+                                                     blob_ids,
+                                                     checksum_cache)
+            for class_name, experiment_notes in config['experiments'].items()
+        }
 
-        assert config.validate(validator, copy=True)
+        checksum_cache.save()
+
+        # Experiment versions, from any archive, with the same content as
+        # those in this one. Their playlists are reused rather than built
+        # again, and if every experiment has one, the experiments module is
+        # not even imported.
+        previous_versions = {
+            experiment_version.content_key: experiment_version
+            for experiment_version in ExperimentVersion.objects.filter(
+                content_key__in=content_keys.values()
+            ).select_related('playlist_ct')
+        }
+
+        experiments_module = None
 
         for class_name, experiment_notes in config['experiments'].items():
 
@@ -259,29 +490,43 @@ class ExperimentArchive(models.Model):
 
             release_note = experiment_notes['release-note']
 
-            try:
+            content_key = content_keys[class_name]
 
-                playlist_factory = getattr(experiments_module, class_name)
+            if content_key in previous_versions:
 
-            except AttributeError:
+                playlist = previous_versions[content_key].playlist
 
-                error_msg = strings.msg('''
-                No experiment named %s in the repository %s (commit hash: %s).
-                ''' % (class_name, self.repository.name, self.commit_hash)
-                )
+            else:
 
-                print(error_msg) # You could log it too.
+                if experiments_module is None:
+                    experiments_module = python.impfromsource(
+                        conf.repository_experiments_modulename, exported_archive
+                    )
 
-                raise
+                try:
 
-            playlist = playlist_factory.new()
+                    playlist_factory = getattr(experiments_module, class_name)
+
+                except AttributeError:
+
+                    error_msg = strings.msg('''
+                    No experiment named %s in the repository %s (commit hash: %s).
+                    ''' % (class_name, self.repository.name, self.commit_hash)
+                    )
+
+                    print(error_msg) # You could log it too.
+
+                    raise
+
+                playlist = playlist_factory.new()
 
             ExperimentVersion.new(
                 experiment=Experiment.new(class_name=class_name),
                 label=label,
                 release_note=release_note,
                 playlist=playlist,
-                archive=self)
+                archive=self,
+                content_key=content_key)
 
 
     #=========================================================================
@@ -324,6 +569,23 @@ class ExperimentVersion(models.Model):
 
     archive = models.ForeignKey(ExperimentArchive)
 
+    # A checksum of the source of the experiment in this version; see
+    # utils.experiment_content_key.
+    content_key = models.CharField(max_length=64, null=True, db_index=True)
+
+    class Meta:
+        # For finding the experiment whose playlist is a given playlist; see
+        # ExperimentManager.get_playlist_parent.
+        index_together = (('playlist_ct', 'playlist_uid'),)
+
+    def save(self, *args, **kwargs):
+        super(ExperimentVersion, self).save(*args, **kwargs)
+        catalog_changed()
+
+    def delete(self, *args, **kwargs):
+        super(ExperimentVersion, self).delete(*args, **kwargs)
+        catalog_changed()
+
     #=========================================================================
     # Class methods.
     #=========================================================================
@@ -333,7 +595,8 @@ class ExperimentVersion(models.Model):
             label,
             release_note,
             playlist,
-            archive):
+            archive,
+            content_key=None):
 
 
         experiment_version, _created = cls.objects.get_or_create(
@@ -345,6 +608,10 @@ class ExperimentVersion(models.Model):
             archive=archive
         )
 
+        if content_key and experiment_version.content_key != content_key:
+            experiment_version.content_key = content_key
+            experiment_version.save(update_fields=['content_key'])
+
         experiment.set_default_current_version()
 
         return experiment_version
@@ -435,6 +702,28 @@ class ExperimentManager(models.Manager):
     def get_name_regex(self):
         return  r'|'.join([exp.name for exp in self.all()])
 
+    def get_playlist_parent(self, playlist):
+
+        '''
+        Return the experiment whose current version's playlist is `playlist`,
+        or None if there is no such experiment. This is one query, on the
+        indexed playlist of ExperimentVersion.
+        '''
+
+        parent_experiments = list(self.filter(
+            current_version__playlist_ct=ContentType.objects.get_for_model(playlist),
+            current_version__playlist_uid=playlist.uid
+        ))
+
+        if not parent_experiments:
+            return None
+
+        error_msg = "This playlist object should have exactly one, not %d, Experiments object as a parent."
+        number_of_parents = len(parent_experiments)
+        assert number_of_parents == 1, error_msg % number_of_parents
+
+        return parent_experiments.pop()
+
 class Experiment(models.Model):
 
     '''
@@ -468,6 +757,13 @@ class Experiment(models.Model):
     #=========================================================================
     objects = ExperimentManager()
 
+    def save(self, *args, **kwargs):
+        super(Experiment, self).save(*args, **kwargs)
+        catalog_changed()
+
+    def delete(self, *args, **kwargs):
+        super(Experiment, self).delete(*args, **kwargs)
+        catalog_changed()
 
     #=========================================================================
     # Class methods
@@ -22,6 +22,7 @@ import configobj
 #=============================================================================
 # Django imports.
 #=============================================================================
+from django.contrib.contenttypes.models import ContentType
 from django.test import TestCase
 from django.core.urlresolvers import resolve
 from django.http import HttpRequest
@@ -33,8 +34,9 @@ from . import conf, models, utils
 from apps.testing import utils as testing_utils
 from apps.testing import conf as testing_conf
 from apps.archives import models as archives_models
+from apps.archives.catalog import Catalog
 from apps.archives import views
-from apps.core.utils import sys, django
+from apps.core.utils import compression, sys, django
 
 #================================ End Imports ================================
 
@@ -120,6 +122,48 @@ class ExperimentRepository(TestCase):
         # Delete the model.
         models.ExperimentRepository.objects.all().delete()
 
+    def test_commit_index(self):
+        '''
+        Does the commit index have the same commits as git log, and are
+        abbreviated hashes resolved with it?
+        '''
+
+        experiment_repository\
+            = self.create_repository(set_includes_excludes=True)
+
+        all_commits = experiment_repository.get_all_commits()
+
+        self.assertEqual(len(all_commits),
+                         experiment_repository.update_commit_index())
+
+        self.assertEqual(0, experiment_repository.update_commit_index())
+
+        for commit_hash, commit_date in all_commits:
+            self.assertEqual(
+                experiment_repository.get_commit(commit_hash[:12]),
+                (commit_hash, commit_date)
+            )
+
+        self.assertFalse(experiment_repository.has_commit('x' * 7))
+
+        # New commits are added to the index in memory, which is not read
+        # back from the database.
+        self.mock_repository.update(revisions=2)
+
+        new_commits = set(experiment_repository.get_all_commits())\
+            .difference(all_commits)
+
+        self.assertEqual(2, experiment_repository.update_commit_index())
+
+        for commit_hash, commit_date in new_commits:
+            with self.assertNumQueries(0):
+                self.assertEqual(
+                    experiment_repository.get_commit(commit_hash[:12]),
+                    (commit_hash, commit_date)
+                )
+
+        models.ExperimentRepository.objects.all().delete()
+
 
     def test_make_archives(self):
         '''
@@ -198,7 +242,283 @@ class ExperimentRepository(TestCase):
                 (archive.commit_hash, archive.commit_date), commits
             )
 
-    
+    def test_make_archives_resume(self):
+        '''
+        Does make_archives archive only the commits not yet archived?
+        '''
+
+        experiment_repository = self.create_repository()
+
+        commits = experiment_repository.get_all_commits()
+
+        # As if an earlier run was interrupted after the first commit.
+        archives_models.ExperimentArchive.new(experiment_repository,
+                                              commits[0][0])
+
+        new_archives = experiment_repository.make_archives(workers=2)
+
+        # The commits are archived in the order of the log.
+        self.assertEqual([archive.commit_hash for archive in new_archives],
+                         [commit_hash for commit_hash, _ in commits[1:]])
+
+        self.assertEqual(len(models.ExperimentArchive.objects.all()),
+                         len(commits))
+
+        self.assertEqual(len(models.ExperimentVersion.objects.all()),
+                         len(testing_conf.mock_experiment_names) * len(commits))
+
+        self.assertEqual([], experiment_repository.make_archives())
+
+    def test_make_archives_no_workers(self):
+        '''
+        Does make_archives still archive every commit with no workers?
+        '''
+
+        experiment_repository = self.create_repository()
+
+        new_archives = experiment_repository.make_archives(workers=0)
+
+        self.assertEqual(len(new_archives),
+                         len(experiment_repository.get_all_commits()))
+
+    def test_make_archives_cleanup(self):
+        '''
+        If archiving fails, are no more than `workers` commits exported
+        ahead, and are all the exports removed?
+        '''
+
+        experiment_repository = self.create_repository()
+
+        export_commit = utils.export_commit
+        make_experiments = models.ExperimentArchive.make_experiments
+
+        exported_archives = []
+
+        def recording_export_commit(project, commit_hash):
+            commit_hash, exported_archive, config\
+                = export_commit(project, commit_hash)
+            exported_archives.append(exported_archive)
+            return commit_hash, exported_archive, config
+
+        def failing_make_experiments(self, exported_archive, config):
+            raise RuntimeError('As if the database failed.')
+
+        utils.export_commit = recording_export_commit
+        models.ExperimentArchive.make_experiments = failing_make_experiments
+
+        try:
+            self.assertRaises(RuntimeError,
+                              experiment_repository.make_archives,
+                              workers=2)
+        finally:
+            utils.export_commit = export_commit
+            models.ExperimentArchive.make_experiments = make_experiments
+
+        # The two first exports, and the one started when the first of them
+        # was taken for archiving.
+        self.assertTrue(0 < len(exported_archives) <= 3)
+
+        for exported_archive in exported_archives:
+            self.assertFalse(os.path.exists(exported_archive))
+
+    def test_content_keys(self):
+        '''
+        Do experiment versions with the same content key share a playlist, and
+        are the playlists of unchanged experiments not built again?
+        '''
+
+        impfromsource = models.python.impfromsource
+
+        playlist_factory_calls = []
+
+        class CountingPlaylistFactory(object):
+
+            def __init__(self, playlist_factory):
+                self.playlist_factory = playlist_factory
+
+            def new(self):
+                playlist_factory_calls.append(self.playlist_factory.__name__)
+                return self.playlist_factory.new()
+
+        def counting_impfromsource(modulename, path):
+            experiments_module = impfromsource(modulename, path)
+            for class_name in testing_conf.mock_experiment_names:
+                setattr(experiments_module,
+                        class_name,
+                        CountingPlaylistFactory(
+                            getattr(experiments_module, class_name)
+                        ))
+            return experiments_module
+
+        experiment_repository = self.create_repository()
+
+        models.python.impfromsource = counting_impfromsource
+
+        try:
+
+            experiment_repository.make_archives()
+
+            # Every commit changes every experiment's stimuli.
+            self.assertEqual(len(playlist_factory_calls),
+                             len(testing_conf.mock_experiment_names)
+                             * len(experiment_repository.get_all_commits()))
+
+            # A commit that changes nothing that the experiments are made
+            # from.
+            with open(os.path.join(self.mock_repository.path, 'README'),
+                      'w') as f:
+                f.write('Not part of any experiment.\n')
+
+            self.mock_repository.git(['add', 'README'])
+            self.mock_repository.commit(datetime.datetime.now(),
+                                        msg='Add a readme.')
+
+            del playlist_factory_calls[:]
+
+            new_archives = experiment_repository.make_archives()
+
+        finally:
+            models.python.impfromsource = impfromsource
+
+        self.assertEqual(len(new_archives), 1)
+        self.assertEqual(playlist_factory_calls, [])
+
+        playlists = {}
+        for experiment_version in models.ExperimentVersion.objects.all():
+
+            self.assertIsNotNone(experiment_version.content_key)
+
+            self.assertEqual(
+                playlists.setdefault(experiment_version.content_key,
+                                     experiment_version.playlist_uid),
+                experiment_version.playlist_uid
+            )
+
+        self.assertEqual(
+            models.ExperimentVersion.objects.filter(
+                archive=new_archives[0],
+                playlist_uid__in=models.ExperimentVersion.objects.exclude(
+                    archive=new_archives[0]
+                ).values('playlist_uid')
+            ).count(),
+            len(testing_conf.mock_experiment_names)
+        )
+
+    def test_playlist_parent(self):
+        '''
+        Is the experiment whose current version has a playlist found from the
+        playlist in one query?
+        '''
+
+        experiment_repository = self.create_repository()
+        experiment_repository.make_archives()
+        models.Experiment.objects.set_default_current_version()
+
+        for experiment in models.Experiment.objects.all():
+
+            playlist = experiment.current_version.playlist
+
+            # The content type of the playlist is cached after its first use.
+            ContentType.objects.get_for_model(playlist)
+
+            with self.assertNumQueries(1):
+                self.assertEqual(
+                    models.Experiment.objects.get_playlist_parent(playlist),
+                    experiment
+                )
+
+    def test_catalog(self):
+        '''
+        Are experiments and their playlists' metadata looked up in the catalog
+        without queries, and is the catalog reloaded when an experiment
+        changes?
+        '''
+
+        experiment_repository = self.create_repository()
+        experiment_repository.make_archives()
+        models.Experiment.objects.set_default_current_version()
+
+        # The catalog is only kept when the cache is shared by all processes,
+        # as a file based cache is.
+        cache_dir = tempfile.mkdtemp()
+
+        try:
+
+            with self.settings(CACHES={'default': {
+                    'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                    'LOCATION': cache_dir}}):
+
+                self.assertIsNotNone(models.get_catalog_generation())
+
+                catalog = Catalog()
+
+                for experiment in models.Experiment.objects.all():
+
+                    self.assertEqual(catalog.get_experiment(experiment.class_name),
+                                     experiment)
+
+                    self.assertEqual(
+                        catalog.get_playlist_metadata(experiment.class_name),
+                        catalog.get_playlist_metadata(experiment.class_name)
+                    )
+
+                    with self.assertNumQueries(0):
+                        self.assertEqual(
+                            catalog.get_current_version(experiment.class_name),
+                            experiment.current_version
+                        )
+                        catalog.get_playlist_metadata(experiment.class_name)
+
+                self.assertRaises(models.Experiment.DoesNotExist,
+                                  catalog.get_experiment,
+                                  'nonesuch')
+
+                # Experiments are looked up by their class names as they are.
+                camel_case_experiment\
+                    = models.Experiment.new(class_name='CamelCase')
+
+                self.assertEqual(catalog.get_experiment('CamelCase'),
+                                 camel_case_experiment)
+
+                experiment = models.Experiment.objects.all()[0]
+                experiment.title = 'A new title'
+                experiment.save()
+
+                self.assertEqual(catalog.get_experiment(experiment.class_name).title,
+                                 'A new title')
+
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_catalog_with_local_memory_cache(self):
+        '''
+        With a cache that is kept by each process, is there no catalog, i.e.
+        is each lookup one query of just that experiment?
+        '''
+
+        experiment_repository = self.create_repository()
+        experiment_repository.make_archives()
+        models.Experiment.objects.set_default_current_version()
+
+        with self.settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'test_catalog'}}):
+
+            self.assertIsNone(models.get_catalog_generation())
+
+            catalog = Catalog()
+
+            experiment = models.Experiment.objects\
+                .select_related('current_version')[0]
+
+            for _ in range(2):
+                with self.assertNumQueries(1):
+                    self.assertEqual(
+                        catalog.get_current_version(experiment.class_name),
+                        experiment.current_version
+                    )
+
     def test_git_export(self):
         '''
         Test if we can succesfully export all versions of a git repository.
@@ -222,6 +542,26 @@ class ExperimentRepository(TestCase):
             # Delete the exported directory.
             shutil.rmtree(export_directory)
 
+    def test_exported_commit(self):
+        '''
+        Are only the experiments module, the settings and the included files
+        exported, and is the export removed afterwards?
+        '''
+
+        for _hash, tstamp in self.mock_repository.get_all_commits():
+
+            with utils.exported_commit(self.mock_repository.path,
+                                       _hash) as (export_directory, config):
+
+                exported_files\
+                    = [relative_path for full_path, relative_path, checksum
+                       in sys.list_directory_checksums(export_directory)]
+
+                self.assertEqual(sorted(exported_files),
+                                 utils.experiments_paths(config))
+
+            self.assertFalse(os.path.exists(export_directory))
+
     def test_make_tarball(self):
         '''
         Can we make tarballs for all versions in the git repository.
@@ -255,9 +595,11 @@ class ExperimentRepository(TestCase):
             # Are the contents of the tarball as they should be?
             tmpdir = tempfile.mkdtemp()
 
-            if conf.tarball_compression_method == 'bz2':
+            tarball_ext = compression.extension(conf.tarball_compression_method)
+
+            if tarball_ext == 'bz2':
                 tar_cmd = '-xjf'
-            elif conf.tarball_compression_method == 'gz':
+            elif tarball_ext == 'gz':
                 tar_cmd = '-xzf'
  
             sh.tar(tar_cmd, tarball_path, '-C', tmpdir)
@@ -3,8 +3,9 @@ from __future__ import absolute_import
 #=============================================================================
 # Standard library imports.
 #=============================================================================
+import contextlib
+import hashlib
 import sh
-import tempfile
 import os
 import shutil
 import inspect
@@ -13,7 +14,7 @@ import tarfile
 #=============================================================================
 # Wilhelm imports
 #=============================================================================
-from apps.core.utils import sys, python
+from apps.core.utils import compression, git, sys, python, tarball
 from . import conf
 
 #=============================================================================
@@ -26,35 +27,30 @@ import configobj, validate
 def make_tarball(project, _hash):
     '''
     Create tar.bz2 (or .gz) ball for the experiments directory at a given
-    commit.
+    commit. Only the files that its experiments need are exported and put in
+    the tarball; see exported_commit.
     '''
 
-    tarball_ext = '.tar.' + conf.tarball_compression_method
-    tarfile_method = 'w:' + conf.tarball_compression_method
+    tarball_ext = '.tar.' + compression.extension(conf.tarball_compression_method)
 
     tarfile_name = _hash + tarball_ext
     tarballs_directory = conf.experiment_archives_cache
     tarfile_path = os.path.join(tarballs_directory, tarfile_name)
 
-    with tarfile.open(tarfile_path, tarfile_method) as tarball:
-        
-        export_tmpdir = git_export(project, _hash)
+    with exported_commit(project, _hash) as (export_tmpdir, config):
+
+        with tarball.StreamingTarball(tarfile_path,
+                                      conf.tarball_compression_method) as archive_tarball:
 
-        file_hash_list = []
-        for full_path, relative_path, checksum\
-        in sys.list_directory_checksums(export_tmpdir):
-            file_hash_list.append('%s %s' % (relative_path, checksum))
-            tarball.add(full_path, arcname=relative_path)
+            file_hash_list\
+                = ['%s %s' % (relative_path, file_hash)
+                   for full_path, relative_path, file_hash
+                   in archive_tarball.add_directory(export_tmpdir)]
 
-        tmpfile = tempfile.NamedTemporaryFile(delete=False)
-        tmpfile.write('\n'.join(file_hash_list)+'\n')
-        tmpfile.close()
-        os.chmod(tmpfile.name, 0644)
-        tarball.add(tmpfile.name, conf.tarball_checksum)
-        os.unlink(tmpfile.name)
+            archive_tarball.add_string(conf.tarball_checksum,
+                                       '\n'.join(file_hash_list)+'\n')
 
-    experiment_details = get_experiment_details(export_tmpdir)
-    shutil.rmtree(export_tmpdir) # Zap export dir.
+        experiment_details = get_experiment_details(export_tmpdir)
 
     return experiment_details, tarfile_path
 
@@ -62,18 +58,96 @@ def git_export(project, _hash):
     '''
     Export commit `_hash` of git project `project` into a temporary directory.
     Return the name of the temporary directory.
-    The process requires tar-ing and untar-ing.
     '''
-    tmpdir = tempfile.mkdtemp()
-    tarball_name = os.path.join(tmpdir, 'exported_git_project.tar')
-    assert os.path.exists(project) and os.path.isdir(project)
-    git = sh.git.bake(_cwd=project)
-    git('archive', _hash, '-o', tarball_name)
-    export_tmpdir = tempfile.mkdtemp()
-    sh.tar('-xf', tarball_name, '-C', export_tmpdir)
-    shutil.rmtree(tmpdir) # Delete the tmpdir.
 
-    return export_tmpdir 
+    return git.export(project, _hash)
+
+def read_experiments_settings(exported_archive):
+    '''
+    Read and validate the configobj settings file of the exported experiments
+    repository `exported_archive`.
+    '''
+
+    return parse_experiments_settings(
+        os.path.join(exported_archive, conf.repository_settings_filename)
+    )
+
+def parse_experiments_settings(infile):
+    '''
+    Read and validate the experiments settings from `infile`, a filename or a
+    list of lines.
+    '''
+
+    config = configobj.ConfigObj(
+        infile,
+        configspec = conf.repository_settings_configspec
+        )
+
+    validator = validate.Validator()
+    assert config.validate(validator, copy=True)
+
+    return config
+
+def experiments_paths(config):
+    '''
+    Return the paths, in an experiments repository, of the experiments module,
+    the settings file and all the files that the experiments in `config`
+    include. Nothing else is needed to make the experiments.
+    '''
+
+    paths = set([conf.repository_experiments_filename,
+                 conf.repository_settings_filename])
+
+    for experiment_notes in config['experiments'].values():
+        paths.update(experiment_notes['include'] or [])
+
+    return sorted(paths)
+
+def read_commit_settings(project, commit_hash):
+    '''
+    Read and validate the experiments settings of commit `commit_hash` of git
+    project `project`, without exporting it.
+    '''
+
+    return parse_experiments_settings(
+        git.show(project,
+                 commit_hash,
+                 conf.repository_settings_filename).splitlines()
+    )
+
+def export_commit(project, commit_hash):
+    '''
+    Read the experiments settings of commit `commit_hash` of git project
+    `project` and export the files that its experiments need. Return the
+    commit hash, the export directory and the settings.
+
+    This touches neither the database nor sys.modules, so it may be run in a
+    worker thread; see ExperimentRepository.make_archives.
+    '''
+
+    config = read_commit_settings(project, commit_hash)
+
+    exported_archive = git.export(project,
+                                  commit_hash,
+                                  experiments_paths(config))
+
+    return commit_hash, exported_archive, config
+
+@contextlib.contextmanager
+def exported_commit(project, commit_hash):
+    '''
+    Export commit `commit_hash`, as export_commit does, for the duration of a
+    with block, yielding the export directory and the settings, and then
+    remove it.
+    '''
+
+    config = read_commit_settings(project, commit_hash)
+
+    with git.exported(project,
+                      commit_hash,
+                      experiments_paths(config)) as exported_archive:
+
+        yield exported_archive, config
 
 def get_experiment_details(exported_archive):
     '''
@@ -167,6 +241,54 @@ def list_all_experiments(exported_archive):
 
 
 
+def get_checksum_cache():
+    '''
+    Return the ChecksumCache of the files in experiment repositories, keyed by
+    their git blob ids, which is kept in the experiment archives cache.
+    '''
+
+    return sys.ChecksumCache(
+        os.path.join(conf.experiment_archives_cache,
+                     conf.checksum_cache_filename)
+    )
+
+def experiment_content_key(exported_archive,
+                           class_name,
+                           include,
+                           blob_ids=None,
+                           checksum_cache=None):
+    '''
+    Return a checksum of everything that experiment `class_name` of the
+    exported experiments repository `exported_archive` is made from: the
+    experiments module and the files listed in its settings `include`.
+
+    If two commits give an experiment the same content key, its playlist is
+    the same in each.
+
+    If the git `blob_ids` of the exported files (see git.blob_ids) and a
+    ChecksumCache are given, files that are unchanged since an earlier commit
+    are not hashed again.
+    '''
+
+    blob_ids = blob_ids or {}
+
+    h = hashlib.sha256(class_name)
+
+    for filename in [conf.repository_experiments_filename] + sorted(include or []):
+
+        filepath = os.path.join(exported_archive, filename)
+
+        if os.path.isfile(filepath):
+            file_hash = sys.file_checksum(filepath,
+                                          cache=checksum_cache,
+                                          content_id=blob_ids.get(filename))
+        else:
+            file_hash = '-'
+
+        h.update('\n%s %s' % (filename, file_hash))
+
+    return h.hexdigest()
+
 def make_experiment_release_code(class_name, experiment_archive):
     '''Create the unique label.
     The class name (but in lowercase), followed by a date-time
@@ -206,30 +328,25 @@ class ExperimentArchiveTarball(object):
     def __init__(self, tarball_path):
 
 
-        compression_method = conf.tarball_compression_method
-        self.tarfile_method = 'r:' + compression_method
+        # Read by what the tarball is, not by the compression method that
+        # new tarballs are written with, which may have changed since.
+        self.compressor = compression.get_tarball_compressor(tarball_path)
 
         ###############
         # Some checks #
         ###############
 
-        compression_method_info\
-        = {'bz2': ('bzip2', '.bz2'), 'gz': ('gzip', '.gz')}
-
         # Are we dealing with a compressed tar file?
         sys.assert_file_exists(tarball_path)
         assert tarfile.is_tarfile(tarball_path),\
                 '%s is not a tarball.' % tarball_path
 
-        compression_type, compression_ext\
-                = compression_method_info[compression_method]
-
-        assert compression_type in sh.file(tarball_path),\
-                '%s is not %s?' % (tarball_path, compression_method)
+        assert self.compressor.file_type in sh.file(tarball_path),\
+                '%s is not %s?' % (tarball_path, self.compressor.extension)
 
         root, ext = os.path.splitext(tarball_path)
-        assert ext == compression_ext,\
-                '%s is not %s?' % (tarball_path, compression_method)
+        assert ext == '.' + self.compressor.extension,\
+                '%s is not %s?' % (tarball_path, self.compressor.extension)
 
         #################
         # Checks passed #
@@ -250,8 +367,8 @@ class ExperimentArchiveTarball(object):
 
         self._make_extraction_dir()
 
-        tarballobj = tarfile.open(self.tarball_path, self.tarfile_method)
-        tarballobj.extractall(path = self.extraction_dir)
+        with compression.open_tarball(self.tarball_path) as tarballobj:
+            tarballobj.extractall(path = self.extraction_dir)
 
         assert self._extracted_archive_check()
 
@@ -307,15 +424,30 @@ class ExperimentArchiveTarball(object):
         ''' Does extraction_dir contain the extracted contents of the archive
         tarball?  '''
 
-        with tarfile.open(self.tarball_path, self.tarfile_method) as tarball:
-            checksum_string\
-                    = tarball.extractfile(conf.tarball_checksum).read().strip()
+        # Iterate rather than look the checksum file up by name, as tarballs
+        # with multi-stream compression can only be read in order.
+        checksum_string = None
+
+        with compression.open_tarball(self.tarball_path) as tarballobj:
+            for member in tarballobj:
+                if member.name == conf.tarball_checksum:
+                    checksum_string\
+                        = tarballobj.extractfile(member).read().strip()
+                    break
 
+        assert checksum_string is not None,\
+            '%s has no %s.' % (self.tarball_path, conf.tarball_checksum)
+
+        fullpaths = []
+        hashsums = []
         for line in checksum_string.split('\n'):
             relative_filepath, hashsum = line.split()
             fullpath = os.path.join(self.extraction_dir, relative_filepath)
             sys.assert_file_exists(fullpath)
-            assert sys.checksum(fullpath) == hashsum
+            fullpaths.append(fullpath)
+            hashsums.append(hashsum)
+
+        assert sys.file_checksums(fullpaths) == hashsums
 
         return True # If we get this far.
 
@@ -54,21 +54,16 @@ def get_experiment(experiment_name, live=True):
         raise ObjectDoesNotExist
 
 
-def get_most_recent_attempt_status(experiment_sessions):
+def get_experiment_context(request, experiment, summaries=None):
 
-    most_recent_attempt = list(experiment_sessions)[-1]
-
-    if most_recent_attempt.is_live:
-        status = 'live'
-    elif most_recent_attempt.is_paused:
-        status = 'paused'
-    elif most_recent_attempt.is_completed:
-        status = 'completed'
-
-    return status, most_recent_attempt.date_started, most_recent_attempt.date_completed
+    """
+    Return the context of `experiment` for the listing and home pages.
 
+    If the user is authenticated, this includes a summary of their sessions of
+    the experiment, which is taken from `summaries`, as returned by
+    ExperimentSession.objects.get_my_experiment_summaries, if that is given.
 
-def get_experiment_context(request, experiment):
+    """
 
     experiment_context = dict(
         url = experiment.name,
@@ -80,19 +75,23 @@ def get_experiment_context(request, experiment):
 
     if request.user.is_authenticated():
 
-        subject = get_subject_from_request(request)
+        if summaries is None:
+
+            subject = get_subject_from_request(request)
+
+            summaries\
+                = ExperimentSession.objects.get_my_experiment_summaries(
+                    subject,
+                    experiments=[experiment]
+                )
 
-        experiment_sessions\
-            = ExperimentSession.objects.get_my_this_experiment_sessions(experiment,
-                                                                        subject)
+        summary = summaries.get(experiment.class_name)
 
-        if len(experiment_sessions) > 0:
+        if summary is not None:
 
             experiment_context['visited'] = True
 
-            completions\
-                = ExperimentSession.objects.get_my_completions(experiment,
-                                                               subject)
+            completions = summary['number_of_completions']
 
             experiment_context['number_of_completions'] = completions
 
@@ -106,13 +105,10 @@ def get_experiment_context(request, experiment):
                 experiment_context['attempts_remaining'] = False
                 experiment_context['number_of_attempts_remaining'] = 0
 
-
-            (experiment_context['most_recent_attempt_status'],
-            experiment_context['date_started'],
-            experiment_context['date_completed'])\
-                = get_most_recent_attempt_status(experiment_sessions)
-
-            print(get_most_recent_attempt_status(experiment_sessions))
+            experiment_context['most_recent_attempt_status']\
+                = summary['most_recent_attempt_status']
+            experiment_context['date_started'] = summary['date_started']
+            experiment_context['date_completed'] = summary['date_completed']
 
         else:
             experiment_context['visited'] = False
@@ -123,13 +119,22 @@ def get_experiment_context(request, experiment):
 def listing(request):
     '''
     Return a page listing all available experiments.
+
+    The subject's sessions of all of them are summarized at once, so the
+    number of queries does not grow with the number of experiments.
     '''
 
     experiments = Experiment.objects.filter(live=True)
 
-    experiment_list = []
-    for experiment in experiments:
-        experiment_list.append(get_experiment_context(request, experiment))
+    summaries = None
+    if request.user.is_authenticated():
+        summaries = ExperimentSession.objects.get_my_experiment_summaries(
+            get_subject_from_request(request),
+            experiments=experiments
+        )
+
+    experiment_list = [get_experiment_context(request, experiment, summaries)
+                       for experiment in experiments]
 
     context = dict(title = 'Experiment List',
                    experiments = experiment_list,
@@ -3,3 +3,13 @@ pickle_readfile_mode = 'rb'
 pickle_protocol = 2
 
 charfield_max_length = 50
+
+# How many sorted populations of scores, for percentiles, each process keeps.
+score_distributions_cache_size = 256
+
+# How many rendered rst texts, e.g. experiment blurbs, each process keeps.
+rst_cache_size = 512
+
+# How long, in seconds, rendered rst is kept in the Django cache. None is
+# forever: the key is the hash of the rst, so it never goes stale.
+rst_cache_timeout = None
@@ -0,0 +1,107 @@
+'''
+Database routing for read-only workloads.
+
+Long, read heavy jobs (data exports, score aggregation, feedback listings) can be
+sent to a read replica of the database by running them inside `read_replica`:
+
+    with read_replica():
+        n_unique_subjects, aggregate_scores = playlist.get_aggregate_scores()
+
+or by decorating a view with it. All writes go to the primary, i.e. the
+default, database, including saves of instances that were read from the
+replica.
+
+The replica is the database alias given by settings.READ_REPLICA_DATABASE. If
+that is not set, or not in settings.DATABASES, everything goes to the default
+database as usual.
+'''
+
+from __future__ import absolute_import
+
+#=============================================================================
+# Standard library imports.
+#=============================================================================
+import functools
+import threading
+
+#=============================================================================
+# Django imports.
+#=============================================================================
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+#================================ End Imports ================================
+
+_state = threading.local()
+
+def get_read_replica():
+
+    '''
+    Return the alias of the read replica database, or None if there is none.
+
+    '''
+
+    alias = getattr(settings, 'READ_REPLICA_DATABASE', None)
+
+    if alias in settings.DATABASES:
+        return alias
+
+def using_read_replica():
+
+    ''' Are we inside a `read_replica` block in this thread?'''
+
+    return getattr(_state, 'depth', 0) > 0
+
+
+class read_replica(object):
+
+    '''
+    A context manager, or view decorator, inside which database reads go to
+    the read replica. They may be nested.
+
+    '''
+
+    def __enter__(self):
+        _state.depth = getattr(_state, 'depth', 0) + 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _state.depth -= 1
+
+    def __call__(self, f):
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            with self:
+                return f(*args, **kwargs)
+
+        return wrapper
+
+
+class ReadReplicaRouter(object):
+
+    '''
+    Send reads to the read replica inside `read_replica` blocks, and all
+    writes to the default database.
+
+    '''
+
+    def db_for_read(self, model, **hints):
+
+        if using_read_replica():
+            return get_read_replica() or DEFAULT_DB_ALIAS
+
+        # Otherwise Django would read related objects of an instance from the
+        # database the instance was read from, even outside the block.
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+
+        # Without this, Django would write an instance back to the database it
+        # was read from, i.e. the replica.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+
+        # The replica holds the same data as the default database.
+        return True
@@ -0,0 +1,365 @@
+'''
+Test the core app.
+'''
+
+from __future__ import absolute_import
+
+#=============================================================================
+# Standard library imports.
+#=============================================================================
+import hashlib
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+
+#=============================================================================
+# Django imports.
+#=============================================================================
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.test import TestCase
+
+#=============================================================================
+# Wilhelm imports.
+#=============================================================================
+from apps.core.routers import get_read_replica, read_replica
+from apps.core.utils import compression, docutils, percentiles, strings, sys
+from apps.archives.models import ExperimentRepository
+
+#================================ End Imports ================================
+
+@unittest.skipUnless(get_read_replica(),
+                     'Needs a read replica database, e.g. wilhelm.settings.testing.')
+class ReadReplicaRouter(TestCase):
+
+    multi_db = True
+
+    def setUp(self):
+
+        # The test databases are independent, so something that is only in
+        # the replica tells us where a read went.
+        self.replica = get_read_replica()
+
+        ExperimentRepository.objects.using(self.replica)\
+            .create(name='replica_only')
+
+    def test_reads_outside_block_go_to_default(self):
+
+        self.assertFalse(
+            ExperimentRepository.objects.filter(name='replica_only').exists()
+        )
+
+    def test_reads_inside_block_go_to_replica(self):
+
+        with read_replica():
+            self.assertTrue(
+                ExperimentRepository.objects.filter(name='replica_only').exists()
+            )
+
+        self.assertFalse(
+            ExperimentRepository.objects.filter(name='replica_only').exists()
+        )
+
+    def test_decorated_reads_go_to_replica(self):
+
+        @read_replica()
+        def replica_only_exists():
+            return ExperimentRepository.objects\
+                .filter(name='replica_only').exists()
+
+        self.assertTrue(replica_only_exists())
+
+    def test_writes_go_to_default(self):
+
+        with read_replica():
+
+            ExperimentRepository.objects.create(name='created')
+
+            repository = ExperimentRepository.objects.get(name='replica_only')
+            repository.description = 'Saved after being read from the replica.'
+            repository.save()
+
+        self.assertTrue(
+            ExperimentRepository.objects.using(DEFAULT_DB_ALIAS)
+            .filter(name='created').exists()
+        )
+
+        self.assertTrue(
+            ExperimentRepository.objects.using(DEFAULT_DB_ALIAS)
+            .filter(name='replica_only',
+                    description='Saved after being read from the replica.')
+            .exists()
+        )
+
+        self.assertFalse(
+            ExperimentRepository.objects.using(self.replica)
+            .filter(name='created').exists()
+        )
+
+
+class Checksums(TestCase):
+
+    def setUp(self):
+
+        self.tmpdir = tempfile.mkdtemp()
+
+        self.contents = {'small.txt': 'A small file.',
+                         'large.bin': os.urandom(3 * sys.checksum_chunk_size + 7)}
+
+        for filename, content in self.contents.items():
+            with open(os.path.join(self.tmpdir, filename), 'wb') as f:
+                f.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_file_checksums(self):
+
+        '''
+        Are files hashed in chunks, and in parallel, the same as when hashed
+        all at once?
+        '''
+
+        filenames = sorted(self.contents)
+
+        self.assertEqual(
+            sys.file_checksums([os.path.join(self.tmpdir, filename)
+                                for filename in filenames],
+                               workers=2),
+            [hashlib.sha256(self.contents[filename]).hexdigest()
+             for filename in filenames]
+        )
+
+    def test_checksum_cache(self):
+
+        '''
+        Are checksums cached by the id of the file's contents, wherever the
+        file is, and persisted?
+        '''
+
+        cache = sys.ChecksumCache(os.path.join(self.tmpdir, 'checksums.json'))
+        file_path = os.path.join(self.tmpdir, 'small.txt')
+
+        file_hash = sys.file_checksum(file_path, cache=cache, content_id='abc')
+        cache.save()
+
+        cache = sys.ChecksumCache(cache.cache_file)
+        self.assertEqual(cache.get('abc'), file_hash)
+
+        # The cached checksum is used without the file being read.
+        self.assertEqual(
+            sys.file_checksum(os.path.join(self.tmpdir, 'elsewhere.txt'),
+                              cache=cache,
+                              content_id='abc'),
+            file_hash
+        )
+
+        self.assertIsNone(cache.get('abc', algorithm='md5'))
+
+
+class Compression(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_open_multistream_tarball(self):
+
+        '''
+        Are all the members of a tarball written with pbz2, i.e. as many bzip2
+        streams, read back, whatever the compression method is now?
+        '''
+
+        contents = dict(('file%d.bin' % i, os.urandom(5000)) for i in range(4))
+
+        for filename, content in contents.items():
+            with open(os.path.join(self.tmpdir, filename), 'wb') as f:
+                f.write(content)
+
+        tarball_path = os.path.join(self.tmpdir, 'archive.tar.bz2')
+
+        # Small blocks, so that there are many streams.
+        fileobj = compression.get_compressor('pbz2').open(tarball_path,
+                                                          block_size=4096,
+                                                          workers=2)
+        with tarfile.open(fileobj=fileobj, mode='w|') as tarballobj:
+            for filename in sorted(contents):
+                tarballobj.add(os.path.join(self.tmpdir, filename),
+                               arcname=filename)
+        fileobj.close()
+
+        self.assertEqual(
+            compression.get_tarball_compressor(tarball_path),
+            compression.get_compressor('bz2')
+        )
+
+        read_contents = {}
+        with compression.open_tarball(tarball_path) as tarballobj:
+            for member in tarballobj:
+                read_contents[member.name]\
+                    = tarballobj.extractfile(member).read()
+
+        self.assertEqual(read_contents, contents)
+
+        # The file that the tarball was read from is closed with it.
+        self.assertTrue(tarballobj.reader.fileobj.closed)
+
+
+class Percentiles(TestCase):
+
+    population = [3, 1, 4, 1, 5, 9, 2, 6]
+
+    def test_percentiles_of_scores(self):
+
+        '''
+        Are the percentiles those of scipy.stats.percentileofscore, for
+        scores between, tied with, and outside the population?
+        '''
+
+        sorted_scores = percentiles.sort_scores(self.population)
+
+        self.assertEqual(
+            list(percentiles.percentiles_of_scores(sorted_scores,
+                                                   [0, 1, 3.5, 9, 10])),
+            [0.0, 18.75, 50.0, 100.0, 100.0]
+        )
+
+    def test_score_distributions(self):
+
+        '''
+        Is a population re-sorted once it grows, or is rebuilt with the same
+        size and last score, and are empty populations and nan scores without
+        percentiles?
+        '''
+
+        score_distributions = percentiles.ScoreDistributions(maxsize=2)
+        population = list(self.population)
+
+        self.assertEqual(score_distributions.percentile('key', population, 5),
+                         75)
+
+        population.append(0)
+        self.assertEqual(score_distributions.percentile('key', population, 5),
+                         78)
+
+        rebuilt_population = [10] * (len(population) - 1) + [0]
+        self.assertEqual(
+            score_distributions.percentile('key', rebuilt_population, 5), 11
+        )
+
+        self.assertIsNone(score_distributions.percentile('empty', [], 5))
+        self.assertIsNone(
+            score_distributions.percentile('key', population, float('nan'))
+        )
+
+
+class Tokenize(TestCase):
+
+    def test_tokenize(self):
+
+        '''
+        Are possessives, non-printable characters and punctuation removed,
+        and case folded?
+        '''
+
+        self.assertEqual(
+            strings.tokenize(u'The dog\'s bone, caf\xe9 \u2014 "Hello"!'),
+            ['the', 'dog', 'bone', 'caf', 'hello']
+        )
+
+    def test_rmstopwords(self):
+
+        self.assertEqual(strings.rmstopwords(['the', 'dog', 'and', 'bone']),
+                         ['dog', 'bone'])
+
+        self.assertEqual(strings.rmstopwords(['the', 'dog'], ['dog']),
+                         ['the'])
+
+
+class RstCache(TestCase):
+
+    text = u'A *blurb*, with some\n\n* rst\n* in it.'
+
+    def setUp(self):
+        cache.clear()
+        docutils.clear_rst_cache()
+
+    def tearDown(self):
+        cache.clear()
+        docutils.clear_rst_cache()
+
+    def test_rst2innerhtml(self):
+
+        '''
+        Is rendered rst the same when cached, and read from the Django cache
+        when it is not in the process's cache?
+        '''
+
+        body = docutils.rst2innerhtml(self.text)
+
+        self.assertEqual(body, docutils.render_rst(self.text))
+        self.assertEqual(body, docutils.rst2innerhtml(self.text))
+        self.assertEqual(cache.get(docutils.rst_key(self.text)), body)
+
+        # As if rendered by another process.
+        cache.set(docutils.rst_key(self.text), 'shared')
+        docutils.clear_rst_cache()
+
+        self.assertEqual(docutils.rst2innerhtml(self.text), 'shared')
+
+    def test_rst2innerhtml_lookup_order(self):
+
+        '''
+        Is the process's cache checked first, then the Django cache, and is
+        rst only rendered if it is in neither?
+        '''
+
+        rendered = []
+
+        def render_rst(text):
+            rendered.append(text)
+            return 'rendered'
+
+        original_render_rst = docutils.render_rst
+        docutils.render_rst = render_rst
+
+        try:
+
+            self.assertEqual(docutils.rst2innerhtml(self.text), 'rendered')
+            self.assertEqual(rendered, [self.text])
+
+            # The process's cache comes before the Django cache.
+            cache.set(docutils.rst_key(self.text), 'shared')
+            self.assertEqual(docutils.rst2innerhtml(self.text), 'rendered')
+
+            # The Django cache comes before rendering.
+            docutils.clear_rst_cache()
+            self.assertEqual(docutils.rst2innerhtml(self.text), 'shared')
+            self.assertEqual(rendered, [self.text])
+
+            cache.clear()
+            docutils.clear_rst_cache()
+            self.assertEqual(docutils.rst2innerhtml(self.text), 'rendered')
+            self.assertEqual(rendered, [self.text, self.text])
+
+        finally:
+            docutils.render_rst = original_render_rst
+
+    def test_warm_rst_cache(self):
+
+        ''' Are only texts that are not yet cached rendered?'''
+
+        other_text = u'Another blurb.'
+
+        self.assertEqual(
+            docutils.warm_rst_cache([self.text, other_text, self.text]), 2
+        )
+
+        self.assertEqual(docutils.warm_rst_cache([self.text, other_text]), 0)
+
+        self.assertEqual(cache.get(docutils.rst_key(other_text)),
+                         docutils.render_rst(other_text))
@@ -9,6 +9,7 @@ from __future__ import absolute_import
 import collections
 import string
 import random
+import threading
 #================================ End Imports ================================
 
 def uniquelist(X):
@@ -83,3 +84,45 @@ class Bunch(object):
 
     def __init__(self, adict):
         self.__dict__.update(adict)
+
+
+class LRUCache(object):
+
+    '''
+    A dictionary-like cache that holds at most `maxsize` items, discarding the
+    least recently used ones first. It is safe to share between threads, e.g.
+    as a process-level cache of immutable things read from the database.
+    '''
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.items = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+
+        with self.lock:
+            try:
+                value = self.items.pop(key)
+            except KeyError:
+                return default
+            self.items[key] = value # Now the most recently used.
+            return value
+
+    def set(self, key, value):
+
+        with self.lock:
+            self.items.pop(key, None)
+            self.items[key] = value
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, key):
+        return key in self.items
@@ -0,0 +1,321 @@
+'''
+Pluggable compression for tarballs.
+
+The serial methods, `bz2` and `gz`, are plain single stream files exactly as
+`tarfile` itself would write them. The parallel methods, `pbz2` and `pgz`,
+split the stream into independent blocks, compress the blocks on a pool of
+threads (or processes) and write them out, in order, as one multi-stream bzip2
+or multi-member gzip file. Both are valid .bz2 and .gz files that bunzip2,
+gunzip and tar read as normal.
+'''
+
+from __future__ import absolute_import
+
+#=============================================================================
+# Standard library imports.
+#=============================================================================
+from collections import deque
+import bz2
+import gzip
+import multiprocessing
+import multiprocessing.pool
+import os
+import tarfile
+import zlib
+
+#================================ End Imports ================================
+
+# The size of the uncompressed blocks that are compressed independently.
+default_block_size = 4 * 2**20
+
+# Read compressed files in chunks of this size.
+read_chunk_size = 2**20
+
+compression_level = 9
+
+
+def bz2_compress_block(block):
+    return bz2.compress(block, compression_level)
+
+def gzip_compress_block(block):
+
+    # A wbits of 16 + MAX_WBITS gives a complete gzip member, with header and
+    # trailer, rather than a bare zlib stream.
+    compressor = zlib.compressobj(compression_level,
+                                  zlib.DEFLATED,
+                                  16 + zlib.MAX_WBITS)
+
+    return compressor.compress(block) + compressor.flush()
+
+
+class ParallelCompressedFile(object):
+
+    '''
+    A write-only file object that compresses what is written to it in
+    independent blocks on a worker pool.
+
+    At most 2 x `workers` blocks are in flight at any one time, so memory use
+    is bounded no matter how much is written.
+
+    '''
+
+    def __init__(self,
+                 path,
+                 compress_block,
+                 block_size=default_block_size,
+                 workers=None,
+                 pool='thread'):
+
+        self.workers = workers or multiprocessing.cpu_count()
+        self.compress_block = compress_block
+        self.block_size = block_size
+
+        if pool == 'thread':
+            self.pool = multiprocessing.pool.ThreadPool(self.workers)
+        elif pool == 'process':
+            self.pool = multiprocessing.Pool(self.workers)
+        else:
+            raise ValueError('Unknown pool type %s' % pool)
+
+        self.fileobj = open(path, 'wb')
+        self.buffer = []
+        self.buffered = 0
+        self.pending = deque()
+        self.closed = False
+
+    def write(self, data):
+
+        self.buffer.append(data)
+        self.buffered += len(data)
+
+        if self.buffered >= self.block_size:
+            self._submit(''.join(self.buffer))
+
+    def close(self):
+
+        if self.closed:
+            return
+
+        try:
+            if self.buffered:
+                self._submit(''.join(self.buffer))
+
+            while self.pending:
+                self.fileobj.write(self.pending.popleft().get())
+
+        finally:
+            self.pool.close()
+            self.pool.join()
+            self.fileobj.close()
+            self.closed = True
+
+    def _submit(self, data):
+
+        for i in xrange(0, len(data), self.block_size):
+            self.pending.append(
+                self.pool.apply_async(self.compress_block,
+                                      (data[i:i+self.block_size],))
+            )
+
+        self.buffer = []
+        self.buffered = 0
+
+        # Write out finished blocks, in order, so that the number in flight
+        # stays bounded.
+        while len(self.pending) > 2 * self.workers:
+            self.fileobj.write(self.pending.popleft().get())
+
+
+class MultiStreamBZ2Reader(object):
+
+    '''
+    A read-only file object for bzip2 files that may contain more than one
+    stream. The Python 2 bz2 module stops at the end of the first stream.
+
+    '''
+
+    def __init__(self, path):
+
+        self.fileobj = open(path, 'rb')
+        self.decompressor = bz2.BZ2Decompressor()
+        self.buffer = ''
+        self.offset = 0
+        self.eof = False
+
+    def read(self, size=-1):
+
+        while not self.eof and (size < 0 
+                                or len(self.buffer) - self.offset < size):
+            self._fill()
+
+        if size < 0:
+            end = len(self.buffer)
+        else:
+            end = self.offset + size
+
+        data = self.buffer[self.offset:end]
+        self.offset += len(data)
+
+        return data
+
+    def close(self):
+        self.fileobj.close()
+
+    def _fill(self):
+
+        compressed = self.fileobj.read(read_chunk_size)
+
+        if not compressed:
+            self.eof = True
+            return
+
+        decompressed = [self.buffer[self.offset:]]
+
+        while compressed:
+
+            try:
+                decompressed.append(self.decompressor.decompress(compressed))
+            except EOFError:
+                # The previous stream ended exactly at the end of the last
+                # chunk; `compressed` is the start of the next one.
+                self.decompressor = bz2.BZ2Decompressor()
+                continue
+
+            # Anything left over is the start of the next stream.
+            compressed = self.decompressor.unused_data
+            if compressed:
+                self.decompressor = bz2.BZ2Decompressor()
+
+        self.buffer = ''.join(decompressed)
+        self.offset = 0
+
+
+class ReaderTarFile(tarfile.TarFile):
+
+    '''
+    A TarFile that also closes the `reader` that it reads from when it is
+    closed. TarFile itself never closes a file object that it was given.
+
+    '''
+
+    reader = None
+
+    def close(self):
+        try:
+            super(ReaderTarFile, self).close()
+        finally:
+            self._close_reader()
+
+    def __exit__(self, *exc_info):
+        try:
+            super(ReaderTarFile, self).__exit__(*exc_info)
+        finally:
+            self._close_reader()
+
+    def _close_reader(self):
+        if self.reader is not None:
+            self.reader.close()
+
+
+class Compressor(object):
+
+    '''
+    A compression method for tarballs.
+
+    `extension` is the file name extension, i.e. bz2 or gz, and `file_type` is
+    how `file` describes the result.
+
+    '''
+
+    def __init__(self, extension, file_type, compress_block=None):
+
+        self.extension = extension
+        self.file_type = file_type
+        self.compress_block = compress_block
+
+    @property
+    def is_parallel(self):
+        return self.compress_block is not None
+
+    def open(self, path, **kwargs):
+
+        '''
+        Return a writable file object that compresses to `path`. Keyword
+        arguments are passed on to ParallelCompressedFile, and are ignored by
+        the serial methods.
+
+        '''
+
+        if self.is_parallel:
+            return ParallelCompressedFile(path, self.compress_block, **kwargs)
+        elif self.extension == 'bz2':
+            return bz2.BZ2File(path, 'w', compresslevel=compression_level)
+        else:
+            return gzip.GzipFile(path, 'wb', compresslevel=compression_level)
+
+
+compressors = dict(
+    bz2 = Compressor('bz2', 'bzip2'),
+    gz = Compressor('gz', 'gzip'),
+    pbz2 = Compressor('bz2', 'bzip2', bz2_compress_block),
+    pgz = Compressor('gz', 'gzip', gzip_compress_block)
+)
+
+def get_compressor(compression_method):
+
+    try:
+        return compressors[compression_method]
+    except KeyError:
+        raise KeyError('Unknown compression method %s. Must be one of: %s.'
+                       % (compression_method, ', '.join(sorted(compressors))))
+
+def get_tarball_compressor(path):
+
+    '''
+    Return the (serial) compressor for reading the tarball at `path`, as
+    given by its file name extension, whatever method it was written with.
+
+    '''
+
+    extension = os.path.splitext(path)[1].lstrip('.')
+
+    for compressor in compressors.values():
+        if compressor.extension == extension and not compressor.is_parallel:
+            return compressor
+
+    raise ValueError('%s is not a .bz2 or .gz tarball.' % path)
+
+def open_tarball(path):
+
+    '''
+    Open the tarball at `path` for reading, by its file name extension.
+
+    Every .bz2 tarball is read as possibly multi-stream, as it may have been
+    written by pbz2 whatever the compression method is now, and Python 2's
+    bz2 module would silently stop at the end of the first stream. These are
+    opened as streams, so their members must be read in order, e.g. by
+    iterating over the tarball.
+
+    '''
+
+    if get_tarball_compressor(path).extension == 'bz2':
+
+        reader = MultiStreamBZ2Reader(path)
+
+        try:
+            tarball = ReaderTarFile.open(fileobj=reader, mode='r|')
+        except Exception:
+            reader.close()
+            raise
+
+        tarball.reader = reader
+
+        return tarball
+
+    else:
+        # Python 2's gzip module reads multi-member files itself.
+        return tarfile.open(path, 'r:gz')
+
+def extension(compression_method):
+    ''' Return the file name extension, e.g. bz2, for `compression_method`.'''
+    return get_compressor(compression_method).extension
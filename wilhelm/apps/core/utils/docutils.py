@@ -1,21 +1,103 @@
 '''
 Utilities to extend docutils.
+
+Rendering rst with docutils is slow, and the same blurbs, instructions and
+flat pages are rendered on every page view, so rendered html is cached, by
+the hash of the rst, in two tiers: an LRU cache in each process, in front of
+the Django cache, which is shared by all processes. As the key is the hash of
+the rst, a changed text is simply a new key, and nothing ever needs to be
+invalidated.
 '''
 from __future__ import absolute_import
 
 #=============================================================================
 # Standard library imports.
 #=============================================================================
+import hashlib
+
 from docutils import core
 
+#=============================================================================
+# Django imports.
+#=============================================================================
+from django.core.cache import cache
+
+#=============================================================================
+# Wilhelm imports.
+#=============================================================================
+from apps.core import conf
+from apps.core.utils.collections import LRUCache
+
 #================================ End Imports ================================
 
+# Rendered html by hash of the rst.
+_rendered = LRUCache(conf.rst_cache_size)
+
+def rst_key(text):
+    ''' Return the cache key of the rst `text`.'''
+
+    if isinstance(text, unicode):
+        text = text.encode('utf-8')
+
+    return 'rst2innerhtml:' + hashlib.sha1(text).hexdigest()
+
+def render_rst(text):
+    ''' Render the rst `text` as html and return the body only, uncached.'''
+
+    return core.publish_parts(text, writer_name='html')['body']
 
 def rst2innerhtml(text):
     '''
     Given some rst text, process as html and return the body only.
 
+    The html is got from the process's cache, else the Django cache, and is
+    only rendered if it is in neither.
+
+    '''
+
+    key = rst_key(text)
+
+    body = _rendered.get(key)
+
+    if body is None:
+
+        body = cache.get(key)
+
+        if body is None:
+            body = render_rst(text)
+            cache.set(key, body, conf.rst_cache_timeout)
+
+        _rendered.set(key, body)
+
+    return body
+
+def warm_rst_cache(texts):
+
+    '''
+    Render each of the rst `texts` that are not in the Django cache, and cache
+    them there and in this process, e.g. when deploying. Return the number
+    that were rendered.
+
     '''
 
-    d = core.publish_parts(text, writer_name='html')
-    return d['body']
+    keys = dict((rst_key(text), text) for text in texts)
+
+    cached = cache.get_many(keys.keys())
+
+    rendered = dict((key, render_rst(text))
+                    for key, text in keys.items() if key not in cached)
+
+    if rendered:
+        cache.set_many(rendered, conf.rst_cache_timeout)
+
+    cached.update(rendered)
+
+    for key, body in cached.items():
+        _rendered.set(key, body)
+
+    return len(rendered)
+
+def clear_rst_cache():
+    ''' Clear this process's cache of rendered rst.'''
+
+    _rendered.clear()
@@ -3,39 +3,145 @@ from __future__ import absolute_import
 #=============================================================================
 # Standard library imports.
 #=============================================================================
+import bisect
+import contextlib
 import sh
+import subprocess
+import tarfile
 import tempfile
 import os
 import shutil
-import tarfile
 import datetime
 
 #=============================================================================
 # Wilhelm imports
 #=============================================================================
-from . import sys
+from . import compression, tarball
 
 #================================ End Imports ================================
 
-def export(project, commit_hash):
+def export(project, commit_hash, paths=None):
 
     ''' 
     Export commit `commit_hash` of git project `project` into a temporary
-    directory.  Return the name of the temporary directory.  The process
-    requires tar-ing and untar-ing.  
+    directory.  Return the name of the temporary directory.
+
+    The output of git archive is read, through a pipe, as a tar stream and
+    extracted as it arrives, so no tarball is written to disk. If `paths` is
+    given, only those files, or directories, are extracted.
+
+    The caller must remove the directory; see `exported`.
     '''
 
-    tmpdir = tempfile.mkdtemp()
-    tarball_name = os.path.join(tmpdir, 'exported_git_project.tar')
     assert os.path.exists(project) and os.path.isdir(project)
-    git = sh.git.bake(_cwd=project)
-    git('archive', commit_hash, '-o', tarball_name)
+
+    if paths is not None:
+        paths = [path.strip('/') for path in paths]
+
     export_tmpdir = tempfile.mkdtemp()
-    sh.tar('-xf', tarball_name, '-C', export_tmpdir)
-    shutil.rmtree(tmpdir) # Delete the tmpdir.
+    complete = False
+
+    try:
+
+        git_archive = subprocess.Popen(['git', 'archive', commit_hash],
+                                       cwd=project,
+                                       stdout=subprocess.PIPE)
+
+        try:
+
+            with tarfile.open(fileobj=git_archive.stdout, mode='r|') as tar:
+                for member in tar:
+                    if paths is None or is_in_paths(member.name, paths):
+                        tar.extract(member, export_tmpdir)
+
+        except tarfile.ReadError:
+            # If git archive failed, e.g. there is no such commit, say so
+            # below rather than that the (empty) tar stream is unreadable.
+            if git_archive.wait() == 0:
+                raise
+
+        finally:
+            git_archive.stdout.close()
+            returncode = git_archive.wait()
+
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, 'git archive')
+
+        complete = True
+
+    finally:
+        if not complete:
+            shutil.rmtree(export_tmpdir, ignore_errors=True)
 
     return export_tmpdir 
 
+@contextlib.contextmanager
+def exported(project, commit_hash, paths=None):
+
+    '''
+    Export commit `commit_hash` of git project `project`, as `export` does,
+    for the duration of a with block, and then remove it:
+
+        with git.exported(project, commit_hash) as export_dir:
+            ...
+
+    '''
+
+    export_tmpdir = export(project, commit_hash, paths)
+
+    try:
+        yield export_tmpdir
+    finally:
+        shutil.rmtree(export_tmpdir, ignore_errors=True)
+
+def is_in_paths(name, paths):
+
+    ''' Is the path `name` one of, or inside one of, `paths`?'''
+
+    for path in paths:
+        if name == path or name.startswith(path + '/'):
+            return True
+
+    return False
+
+def show(project, commit_hash, path):
+
+    ''' Return the contents of file `path` at commit `commit_hash`.'''
+
+    git_cmd = sh.git.bake('--no-pager', _cwd=project)
+    return git_cmd('show', '%s:%s' % (commit_hash, path)).stdout
+
+def blob_ids(project, commit_hash, paths=None):
+
+    '''
+    Return a dictionary of the git blob id of each file, by its path, at
+    commit `commit_hash` of git project `project`, or of only the files in
+    `paths`. A file's blob id is a hash of its contents, so it is the same in
+    every commit in which the file is unchanged.
+    '''
+
+    git_cmd = sh.git.bake('--no-pager', _cwd=project)
+
+    arguments = ['ls-tree', '-r', '-z', commit_hash]
+    if paths is not None:
+        arguments.append('--')
+        arguments.extend(paths)
+
+    blobs = {}
+    for entry in git_cmd(*arguments).stdout.split('\0'):
+
+        if not entry:
+            continue
+
+        # Each entry is "<mode> <type> <blob id>\t<path>".
+        info, path = entry.split('\t', 1)
+        mode, object_type, blob_id = info.split()
+
+        if object_type == 'blob':
+            blobs[path] = blob_id
+
+    return blobs
+
 def make_tarball(project, 
                  commit_hash, 
                  tarball_compression_method='bz2',
@@ -49,30 +155,22 @@ def make_tarball(project,
     Return the path to the tarball.
     '''
 
-    tarball_ext = '.tar.' + tarball_compression_method
-    tarfile_method = 'w:' + tarball_compression_method
+    tarball_ext = '.tar.' + compression.extension(tarball_compression_method)
 
     tarfile_name = commit_hash + tarball_ext
     tarfile_path = os.path.join(export_directory, tarfile_name)
 
-    with tarfile.open(tarfile_path, tarfile_method) as tarball:
-        
-        export_tmpdir = export(project, commit_hash)
+    with exported(project, commit_hash) as export_tmpdir:
 
-        file_hash_list = []
-        for full_path, relative_path, checksum\
-        in sys.list_directory_checksums(export_tmpdir):
-            file_hash_list.append('%s %s' % (relative_path, checksum))
-            tarball.add(full_path, arcname=relative_path)
+        with tarball.StreamingTarball(tarfile_path,
+                                      tarball_compression_method) as git_tarball:
 
-        tmpfile = tempfile.NamedTemporaryFile(delete=False)
-        tmpfile.write('\n'.join(file_hash_list)+'\n')
-        tmpfile.close()
-        os.chmod(tmpfile.name, 0644)
-        tarball.add(tmpfile.name, checksum)
-        os.unlink(tmpfile.name)
+            file_hash_list\
+                = ['%s %s' % (relative_path, file_hash)
+                   for full_path, relative_path, file_hash
+                   in git_tarball.add_directory(export_tmpdir)]
 
-    shutil.rmtree(export_tmpdir) # Zap export dir.
+            git_tarball.add_string(checksum, '\n'.join(file_hash_list)+'\n')
 
     return tarfile_path
 
@@ -84,6 +182,116 @@ def fromtimestamp(commit_timestamp):
 
     return datetime.datetime.fromtimestamp(int(commit_timestamp))
 
+def log(project, revisions, log_format='--pretty=format:%H,%at'):
+
+    '''
+    Return the (hash, datetime) of each commit in `revisions`, e.g. a branch
+    name or a range like 'abc123..master', of git project `project`, newest
+    first.
+
+    '''
+
+    git_cmd = sh.git.bake('--no-pager', _cwd=project)
+
+    commits = []
+    for commit_info in git_cmd('log', log_format, revisions).stdout.strip().split('\n'):
+
+        if not commit_info:
+            continue
+
+        commit_hash, commit_datetime = commit_info.split(',')
+
+        commits.append(
+            (commit_hash, fromtimestamp(commit_datetime))
+        )
+
+    return commits
+
+def rev_parse(project, revision):
+    ''' Return the full hash of `revision` of git project `project`.'''
+    git_cmd = sh.git.bake('--no-pager', _cwd=project)
+    return git_cmd('rev-parse', revision).stdout.strip()
+
+def is_ancestor(project, ancestor, descendant):
+
+    ''' Is commit `ancestor` an ancestor of (or the same as) `descendant`?'''
+
+    git_cmd = sh.git.bake('--no-pager', _cwd=project)
+
+    try:
+        git_cmd('merge-base', '--is-ancestor', ancestor, descendant)
+        return True
+    except sh.ErrorReturnCode:
+        return False
+
+
+class CommitIndex(object):
+
+    '''
+    An index of (commit hash, commit datetime) pairs, with the hashes kept
+    sorted so that abbreviated hashes are resolved by binary search.
+
+    '''
+
+    def __init__(self, commits, hash_length=40):
+
+        self.commit_dates = dict(commits)
+        self.hashes = sorted(self.commit_dates)
+        self.hash_length = hash_length
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __contains__(self, commit_hash):
+
+        try:
+            self.get(commit_hash)
+            return True
+        except KeyError:
+            return False
+
+    def get(self, commit_hash):
+
+        '''
+        Return the (hash, datetime) of the commit whose hash is, or starts
+        with, `commit_hash`.
+
+        Raise a KeyError if there is no such commit, and an Exception if more
+        than one commit matches an abbreviated hash.
+
+        '''
+
+        K = len(commit_hash)
+
+        if K > self.hash_length:
+            raise KeyError(commit_hash)
+
+        if K == self.hash_length:
+            return commit_hash, self.commit_dates[commit_hash]
+
+        # All the hashes that start with commit_hash are adjacent, starting
+        # at i.
+        i = bisect.bisect_left(self.hashes, commit_hash)
+        matches = [_hash for _hash in self.hashes[i:i+2]
+                   if _hash.startswith(commit_hash)]
+
+        if not matches:
+            raise KeyError(commit_hash)
+        elif len(matches) > 1:
+            raise Exception('More than one hash matches %s' % commit_hash)
+
+        return matches[0], self.commit_dates[matches[0]]
+
+    def add(self, commits):
+
+        ''' Add (hash, datetime) pairs to the index.'''
+
+        for commit_hash, commit_date in commits:
+            if commit_hash not in self.commit_dates:
+                bisect.insort(self.hashes, commit_hash)
+            self.commit_dates[commit_hash] = commit_date
+
+
 def get_all_commits(project, branch):
     # TODO (Thu 20 Aug 2015 03:43:45 BST): This will break.
     # There is no self, no conf.
@@ -0,0 +1,117 @@
+'''
+Percentiles of scores in populations of scores, e.g. where a subject's
+recall score lies among those of everyone who has done the experiment.
+
+Each population is sorted once, into a NumPy array that is cached in the
+process, and every percentile query is then two binary searches, with
+`searchsorted`, rather than a scan of the whole population. Queries may be of
+one score or of an array of them.
+
+Percentiles are those of scipy.stats.percentileofscore with kind='rank', the
+default, i.e. a score that ties with others gets the mean of their ranks.
+'''
+
+from __future__ import absolute_import, division
+
+#=============================================================================
+# Standard library imports
+#=============================================================================
+import numpy as np
+
+#=============================================================================
+# Wilhelm imports
+#=============================================================================
+from apps.core import conf
+from apps.core.utils.collections import LRUCache
+
+#================================ End Imports ================================
+
+def percentiles_of_scores(sorted_scores, scores):
+
+    '''
+    Return the percentiles, from 0 to 100, of `scores`, a score or an array
+    of them, in the population `sorted_scores`, a sorted array. If the
+    population is empty, or a score is nan, the percentiles are nan.
+
+    '''
+
+    scores = np.asarray(scores, dtype=float)
+
+    if len(sorted_scores) == 0:
+        return np.full(scores.shape, np.nan)
+
+    left = np.searchsorted(sorted_scores, scores, side='left')
+    right = np.searchsorted(sorted_scores, scores, side='right')
+
+    percentiles = (left + right + (right > left)) * (50 / len(sorted_scores))
+
+    # searchsorted puts nan after everything, but it has no percentile.
+    return np.where(np.isnan(scores), np.nan, percentiles)
+
+def sort_scores(scores):
+
+    ''' Return `scores`, less any that are not numbers, as a sorted array.'''
+
+    return np.sort(np.array([score for score in scores
+                             if isinstance(score, (int, long, float))],
+                            dtype=float))
+
+
+class ScoreDistributions(object):
+
+    '''
+    A process-level cache of sorted populations of scores.
+
+    A population is named by a key, e.g. (playlist uid, test type), and is
+    given as the list of scores, e.g. from the aggregate scores saved on a
+    playlist. The cached sorted array is reused as long as the population
+    hashes the same, so that a population that grows, or is rebuilt, in any
+    process is sorted again. Hashing is linear, sorting is not.
+
+    '''
+
+    def __init__(self, maxsize=conf.score_distributions_cache_size):
+        self.cache = LRUCache(maxsize)
+
+    def get(self, key, scores):
+
+        ''' Return the population `scores`, named by `key`, sorted.'''
+
+        version = (len(scores), hash(tuple(scores)))
+
+        cached = self.cache.get(key)
+
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        sorted_scores = sort_scores(scores)
+        self.cache.set(key, (version, sorted_scores))
+
+        return sorted_scores
+
+    def percentiles(self, key, population, scores):
+
+        '''
+        Return the percentiles, as an array of floats, of the array `scores`
+        in the `population` named by `key`.
+
+        '''
+
+        return percentiles_of_scores(self.get(key, population), scores)
+
+    def percentile(self, key, population, score):
+
+        '''
+        Return the percentile, rounded to an int, of `score` in the
+        `population` named by `key`, or None if the population is empty.
+
+        '''
+
+        percentile = self.percentiles(key, population, score)
+
+        if np.isnan(percentile):
+            return None
+
+        return int(np.round(percentile))
+
+score_distributions = ScoreDistributions()
@@ -33,6 +33,9 @@ def fill(s):
     '''
     return ' '.join(s.split())
 
+possessive_regex = re.compile(r'\'s')
+nonprintable_regex = re.compile(r'[^%s]' % re.escape(string.printable))
+
 def tokenize(text, foldcase=True):
     ''' 
     A very cheap and easy tokenization.
@@ -42,8 +45,8 @@ def tokenize(text, foldcase=True):
     and then split by whitespace.
     '''
 
-    text = re.sub(r'\'s','', text)
-    s = ''.join([s for s in text if s in string.printable])
+    text = possessive_regex.sub('', text)
+    s = nonprintable_regex.sub('', text)
 
     s = str(s) # Got to convert it to str.
     s = deletepunctuation(s)
@@ -201,64 +204,55 @@ def abbreviate_text(text, max_length=50):
 
     return text
 
-def rmstopwords(words, stopwords=None):
-    
-    if stopwords is None:
-
-        stopwords = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k',
-                     'l', 'm', 'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v',
-                     'w', 'x', 'y', 'z', 'th', 're', 'nd', 'ed', 'wa', 'ha',
-                     'about', 'above', 'across', 'after', 'afterwards',
-                     'again', 'against', 'all', 'almost', 'alone', 'along',
-                     'already', 'also', 'although', 'always', 'am', 'among',
-                     'amongst', 'amoungst', 'amount', 'an', 'and', 'another',
-                     'any', 'anyhow', 'anyone', 'anything', 'anyway',
-                     'anywhere', 'are', 'around', 'as', 'at', 'back', 'be',
-                     'became', 'because', 'become', 'becomes', 'becoming',
-                     'been', 'before', 'beforehand', 'behind', 'being',
-                     'below', 'beside', 'besides', 'between', 'beyond', 'bill',
-                     'both', 'bottom', 'but', 'by', 'call', 'can', 'cannot',
-                     'cant', 'co', 'computer', 'con', 'could', 'couldnt',
-                     'cry', 'de', 'describe', 'detail', 'do', 'done', 'down',
-                     'due', 'during', 'each', 'eg', 'eight', 'either',
-                     'eleven', 'else', 'elsewhere', 'empty', 'enough', 'etc',
-                     'even', 'ever', 'every', 'everyone', 'everything',
-                     'everywhere', 'except', 'few', 'fifteen', 'fify', 'fill',
-                     'find', 'fire', 'first', 'five', 'for', 'former',
-                     'formerly', 'forty', 'found', 'four', 'from', 'front',
-                     'full', 'further', 'get', 'give', 'go', 'had', 'has',
-                     'hasnt', 'have', 'he', 'hence', 'her', 'here',
-                     'hereafter', 'hereby', 'herein', 'hereupon', 'hers',
-                     'herse"', 'him', 'himse"', 'his', 'how', 'however',
-                     'hundred', 'i', 'ie', 'if', 'in', 'inc', 'indeed',
-                     'interest', 'into', 'is', 'it', 'its', 'itse"', 'keep',
-                     'last', 'latter', 'latterly', 'least', 'less', 'ltd',
-                     'made', 'many', 'may', 'me', 'meanwhile', 'might', 'mill',
-                     'mine', 'more', 'moreover', 'most', 'mostly', 'move',
-                     'much', 'must', 'my', 'myse"', 'name', 'namely',
-                     'neither', 'never', 'nevertheless', 'next', 'nine', 'no',
-                     'nobody', 'none', 'noone', 'nor', 'not', 'nothing', 'now',
-                     'nowhere', 'of', 'off', 'often', 'on', 'once', 'one',
-                     'only', 'onto', 'or', 'other', 'others', 'otherwise',
-                     'our', 'ours', 'ourselves', 'out', 'over', 'own', 'part',
-                     'per', 'perhaps', 'please', 'put', 'rather', 're', 'same',
-                     'see', 'seem', 'seemed', 'seeming', 'seems', 'serious',
-                     'several', 'she', 'should', 'show', 'side', 'since',
-                     'sincere', 'six', 'sixty', 'so', 'some', 'somehow',
-                     'someone', 'something', 'sometime', 'sometimes',
-                     'somewhere', 'still', 'such', 'system', 'take', 'ten',
-                     'than', 'that', 'the', 'their', 'them', 'themselves',
-                     'then', 'thence', 'there', 'thereafter', 'thereby',
-                     'therefore', 'therein', 'thereupon', 'these', 'they',
-                     'thick', 'thin', 'third', 'this', 'those', 'though',
-                     'three', 'through', 'throughout', 'thru', 'thus', 'to',
-                     'together', 'too', 'top', 'toward', 'towards', 'twelve',
-                     'twenty', 'two', 'un', 'under', 'until', 'up', 'upon',
-                     'us', 'very', 'via', 'was', 'we', 'well', 'were', 'what',
-                     'whatever', 'when', 'whence', 'whenever', 'where',
-        'whereafter', 'whereas', 'whereby', 'wherein', 'whereupon', 'wherever',
-        'whether', 'which', 'while', 'whither', 'who', 'whoever', 'whole',
-        'whom', 'whose', 'why', 'will', 'with', 'within', 'without', 'would',
-        'yet', 'you', 'your', 'yours', 'yourself', 'yourselves']
+# A frozenset, for constant time lookups.
+stopwords = frozenset([
+    'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm', 'n', 'o',
+    'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z', 'th', 're', 'nd',
+    'ed', 'wa', 'ha', 'about', 'above', 'across', 'after', 'afterwards',
+    'again', 'against', 'all', 'almost', 'alone', 'along', 'already', 'also',
+    'although', 'always', 'am', 'among', 'amongst', 'amoungst', 'amount', 'an',
+    'and', 'another', 'any', 'anyhow', 'anyone', 'anything', 'anyway',
+    'anywhere', 'are', 'around', 'as', 'at', 'back', 'be', 'became', 'because',
+    'become', 'becomes', 'becoming', 'been', 'before', 'beforehand', 'behind',
+    'being', 'below', 'beside', 'besides', 'between', 'beyond', 'bill', 'both',
+    'bottom', 'but', 'by', 'call', 'can', 'cannot', 'cant', 'co', 'computer',
+    'con', 'could', 'couldnt', 'cry', 'de', 'describe', 'detail', 'do', 'done',
+    'down', 'due', 'during', 'each', 'eg', 'eight', 'either', 'eleven', 'else',
+    'elsewhere', 'empty', 'enough', 'etc', 'even', 'ever', 'every', 'everyone',
+    'everything', 'everywhere', 'except', 'few', 'fifteen', 'fify', 'fill',
+    'find', 'fire', 'first', 'five', 'for', 'former', 'formerly', 'forty',
+    'found', 'four', 'from', 'front', 'full', 'further', 'get', 'give', 'go',
+    'had', 'has', 'hasnt', 'have', 'he', 'hence', 'her', 'here', 'hereafter',
+    'hereby', 'herein', 'hereupon', 'hers', 'herse"', 'him', 'himse"', 'his',
+    'how', 'however', 'hundred', 'i', 'ie', 'if', 'in', 'inc', 'indeed',
+    'interest', 'into', 'is', 'it', 'its', 'itse"', 'keep', 'last', 'latter',
+    'latterly', 'least', 'less', 'ltd', 'made', 'many', 'may', 'me',
+    'meanwhile', 'might', 'mill', 'mine', 'more', 'moreover', 'most', 'mostly',
+    'move', 'much', 'must', 'my', 'myse"', 'name', 'namely', 'neither',
+    'never', 'nevertheless', 'next', 'nine', 'no', 'nobody', 'none', 'noone',
+    'nor', 'not', 'nothing', 'now', 'nowhere', 'of', 'off', 'often', 'on',
+    'once', 'one', 'only', 'onto', 'or', 'other', 'others', 'otherwise', 'our',
+    'ours', 'ourselves', 'out', 'over', 'own', 'part', 'per', 'perhaps',
+    'please', 'put', 'rather', 're', 'same', 'see', 'seem', 'seemed',
+    'seeming', 'seems', 'serious', 'several', 'she', 'should', 'show', 'side',
+    'since', 'sincere', 'six', 'sixty', 'so', 'some', 'somehow', 'someone',
+    'something', 'sometime', 'sometimes', 'somewhere', 'still', 'such',
+    'system', 'take', 'ten', 'than', 'that', 'the', 'their', 'them',
+    'themselves', 'then', 'thence', 'there', 'thereafter', 'thereby',
+    'therefore', 'therein', 'thereupon', 'these', 'they', 'thick', 'thin',
+    'third', 'this', 'those', 'though', 'three', 'through', 'throughout',
+    'thru', 'thus', 'to', 'together', 'too', 'top', 'toward', 'towards',
+    'twelve', 'twenty', 'two', 'un', 'under', 'until', 'up', 'upon', 'us',
+    'very', 'via', 'was', 'we', 'well', 'were', 'what', 'whatever', 'when',
+    'whence', 'whenever', 'where', 'whereafter', 'whereas', 'whereby',
+    'wherein', 'whereupon', 'wherever', 'whether', 'which', 'while', 'whither',
+    'who', 'whoever', 'whole', 'whom', 'whose', 'why', 'will', 'with',
+    'within', 'without', 'would', 'yet', 'you', 'your', 'yours', 'yourself',
+    'yourselves'])
+
+def rmstopwords(words, stopwords=stopwords):
+
+    if not isinstance(stopwords, (set, frozenset)):
+        stopwords = frozenset(stopwords)
 
     return [word for word in words if word not in stopwords]
@@ -9,10 +9,13 @@ from __future__ import absolute_import
 #=============================================================================
 import errno
 import hashlib
+import json
+from multiprocessing.pool import ThreadPool
 import os
 import pip
 import platform
 import sys
+import threading
 
 #================================ End Imports ================================
 
@@ -32,64 +35,187 @@ def mkdir_p(path):
             pass
         else: raise
 
+# Files are hashed in chunks of this size.
+checksum_chunk_size = 2**20
+
+# The default number of threads that hash files concurrently. hashlib
+# releases the GIL while it hashes large chunks, so threads hash in parallel.
+checksum_workers = 4
+
+
+class ChecksumCache(object):
+
+    '''
+    A cache of file checksums keyed by an identifier of the file's contents,
+    such as its git blob id, which stays the same wherever, and whenever, the
+    file is exported. If it is given a `cache_file`, it is read from there
+    and `save` writes it back, so it persists between processes.
+
+    It is safe for use by many threads at once.
+    '''
+
+    def __init__(self, cache_file=None):
+
+        self.cache_file = cache_file
+        self.lock = threading.Lock()
+        self.checksums = {}
+
+        if cache_file and os.path.exists(cache_file):
+            with open(cache_file) as f:
+                try:
+                    self.checksums = json.load(f)
+                except ValueError:
+                    pass # An unreadable cache is started again.
+
+    @staticmethod
+    def key(content_id, algorithm):
+        return '%s:%s' % (algorithm, content_id)
+
+    def get(self, content_id, algorithm='sha256'):
+
+        '''
+        Return the checksum of the contents identified by `content_id`, or
+        None if it is not cached.
+        '''
+
+        with self.lock:
+            return self.checksums.get(self.key(content_id, algorithm))
+
+    def set(self, content_id, file_hash, algorithm='sha256'):
+
+        with self.lock:
+            self.checksums[self.key(content_id, algorithm)] = file_hash
+
+    def save(self):
+
+        if self.cache_file:
+            # Write, then rename, so that no process reads a half written
+            # cache file.
+            tmp_cache_file = '%s.%d' % (self.cache_file, os.getpid())
+            with self.lock:
+                with open(tmp_cache_file, 'w') as f:
+                    json.dump(self.checksums, f)
+            os.rename(tmp_cache_file, self.cache_file)
+
+
 def checksum(argument, algorithm='sha256'):
     '''
     Returns the hash checksum of `argument'.
     If `argument' is a name of a file, then perform the checksum on the file.
     Otherwise, the checksum is of the string `argument'.
-    By default, it will be the sha1 checksum (and so equivalent to linux's
-    sha1sum). Alternatively, the algorithm could be md5 (equivalent to linux's
-    md5sum), or else sha224, sha256, sha384, sha512.
+    By default, it will be the sha256 checksum (and so equivalent to linux's
+    sha256sum). Alternatively, the algorithm could be md5 (equivalent to linux's
+    md5sum), or else sha1, sha224, sha384, sha512.
     '''
 
-    h = hashlib.new(algorithm)
-
     if os.path.exists(argument) and os.path.isfile(argument):
-        argument = open(argument,'rb').read()
+        return file_checksum(argument, algorithm)
 
+    h = hashlib.new(algorithm)
     h.update(argument)
 
     return h.hexdigest()
 
-def list_directory_checksums(rootdir, algorithm='sha256'):
+def file_checksum(file_path, algorithm='sha256', cache=None, content_id=None):
+    '''
+    Return the hash checksum of the file `file_path`, which is read in chunks.
+
+    If a ChecksumCache `cache` and the `content_id` of the file are given, the
+    checksum is looked up there first, and put there once it is calculated.
+    '''
+
+    use_cache = cache is not None and content_id is not None
+
+    if use_cache:
+        file_hash = cache.get(content_id, algorithm)
+        if file_hash is not None:
+            return file_hash
+
+    h = hashlib.new(algorithm)
+
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(checksum_chunk_size), b''):
+            h.update(chunk)
+
+    file_hash = h.hexdigest()
+
+    if use_cache:
+        cache.set(content_id, file_hash, algorithm)
+
+    return file_hash
+
+def file_checksums(file_paths, algorithm='sha256', workers=checksum_workers):
+    '''
+    Return the checksums of the files `file_paths`, in the same order, hashing
+    them concurrently with `workers` threads.
+    '''
+
+    file_paths = list(file_paths)
+
+    if workers <= 1 or len(file_paths) <= 1:
+        return [file_checksum(file_path, algorithm)
+                for file_path in file_paths]
+
+    pool = ThreadPool(min(workers, len(file_paths)))
+
+    try:
+        return pool.map(
+            lambda file_path: file_checksum(file_path, algorithm),
+            file_paths
+        )
+    finally:
+        pool.close()
+        pool.join()
+
+def list_directory_checksums(rootdir,
+                             algorithm='sha256',
+                             workers=checksum_workers):
     '''
     Descend through a directory, rooted at rootdir. Return a list of the full
     and relative paths of all files in the directory along with their
     checksums.
     '''
-    file_list = []
+    file_paths = []
     rootdir = os.path.abspath(rootdir)
     for _dir, subdirs, files in os.walk(rootdir):
         files = [f for f in files if not f[0] == '.']
         subdirs[:] = [d for d in subdirs if not d[0] == '.']
-        if files:
-            for _file in files:
-                file_path = os.path.join(_dir, _file)
-                # Get relative path by removing the rootdir.
-                file_full_path = os.path.abspath(file_path)
-                if rootdir[-1] != os.path.sep:
-                    _rootdir = rootdir + os.path.sep
-                else:
-                    _rootdir = rootdir
-                file_relative_path = file_full_path.replace(_rootdir, '', 1)
-                file_list.append(
-                    (file_full_path,
-                    file_relative_path, 
-                    checksum(file_path, algorithm)
-                    )
-                )
-    return file_list
-
-
-def check_directory_checksums(checksum_list, rootdir):
+        for _file in files:
+            file_paths.append(os.path.abspath(os.path.join(_dir, _file)))
+
+    # Get relative paths by removing the rootdir.
+    if rootdir[-1] != os.path.sep:
+        _rootdir = rootdir + os.path.sep
+    else:
+        _rootdir = rootdir
+
+    return [(file_full_path,
+             file_full_path.replace(_rootdir, '', 1),
+             file_hash)
+            for file_full_path, file_hash
+            in zip(file_paths,
+                   file_checksums(file_paths, algorithm, workers))]
+
+
+def check_directory_checksums(checksum_list,
+                              rootdir,
+                              algorithm='sha256',
+                              workers=checksum_workers):
     '''
     Given a checksum list (as generated by, for example,
     list_directory_checksums) and the root of a directory, check if the hashes
     of files in the directory match those listed in the checksum list.
     '''
+    file_paths = []
+    listed_hashes = []
     for full_file_path, relative_file_path, _hash in checksum_list:
-        file_path = os.path.join(rootdir, relative_file_path)
-        assert checksum(file_path) == _hash
+        file_paths.append(os.path.join(rootdir, relative_file_path))
+        listed_hashes.append(_hash)
+
+    file_hashes = file_checksums(file_paths, algorithm, workers)
+
+    for _hash, file_hash in zip(listed_hashes, file_hashes):
+        assert file_hash == _hash
 
     return True # If we get this far, all is good.
 
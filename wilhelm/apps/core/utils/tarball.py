@@ -0,0 +1,180 @@
+'''
+Utilities for writing tarballs in a single pass.
+
+Files are hashed as their bytes are copied into the tar stream, so there is no
+need for a second read of each file to get its checksum, and small members
+(readmes, licences, checksum listings, etc) can be added straight from memory
+without first writing them to temporary files.
+'''
+
+from __future__ import absolute_import
+
+#=============================================================================
+# Standard library imports.
+#=============================================================================
+import hashlib
+import io
+import os
+import tarfile
+import time
+
+#=============================================================================
+# Wilhelm imports
+#=============================================================================
+from . import compression
+
+#================================ End Imports ================================
+
+# Read files into the tar stream in chunks of this size.
+chunk_size = 2**20
+
+# Permissions for members that are added from memory.
+default_member_mode = 0644
+
+
+class HashingReader(object):
+
+    '''
+    Wrap a file object so that everything read from it also updates a hash.
+
+    '''
+
+    def __init__(self, fileobj, algorithm='sha256'):
+
+        self.fileobj = fileobj
+        self.hash = hashlib.new(algorithm)
+
+    def read(self, size=-1):
+
+        data = self.fileobj.read(size)
+        self.hash.update(data)
+
+        return data
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+
+class StreamingTarball(object):
+
+    '''
+    A write-only tarball that checksums its members as they are written.
+
+    Use as a context manager:
+
+        with StreamingTarball(path, 'pbz2', workers=4) as tarball:
+            tarball.add_directory(some_dir)
+            tarball.add_string('checksum.txt', checksum_txt)
+
+    '''
+
+    def __init__(self,
+                 tarball_path,
+                 compression_method='bz2',
+                 algorithm='sha256',
+                 **compression_options):
+
+        self.tarball_path = tarball_path
+        self.algorithm = algorithm
+
+        # The tar stream is written through whichever compressor is asked for,
+        # see compression.compressors.
+        self.fileobj = compression.get_compressor(compression_method)\
+            .open(tarball_path, **compression_options)
+
+        self.tarball = tarfile.open(fileobj=self.fileobj, mode='w|')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        try:
+            self.tarball.close()
+        finally:
+            self.fileobj.close()
+
+    def add_fileobj(self, fileobj, arcname, size, mode=None, mtime=None):
+
+        '''
+        Add `size` bytes read, in chunks, from the file object `fileobj` as
+        the member `arcname`. Return the checksum of the bytes written.
+
+        '''
+
+        tarinfo = tarfile.TarInfo(arcname)
+        tarinfo.size = size
+        tarinfo.mode = default_member_mode if mode is None else mode
+        tarinfo.mtime = time.time() if mtime is None else mtime
+
+        return self._addfile(tarinfo, fileobj)
+
+    def add_file(self, full_path, arcname):
+
+        '''
+        Add the file at `full_path` as `arcname`, keeping its permissions and
+        modification time. Return the checksum of its contents.
+
+        '''
+
+        tarinfo = self.tarball.gettarinfo(full_path, arcname)
+
+        with io.open(full_path, 'rb', buffering=chunk_size) as fileobj:
+            return self._addfile(tarinfo, fileobj)
+
+    def add_string(self, arcname, content, mode=None):
+
+        '''
+        Add `content` (a str, or unicode to be encoded as utf-8) as the
+        member `arcname`. Return its checksum.
+
+        '''
+
+        if isinstance(content, unicode):
+            content = content.encode('utf-8')
+
+        return self.add_fileobj(io.BytesIO(content),
+                                arcname,
+                                size=len(content),
+                                mode=mode)
+
+    def add_directory(self, rootdir):
+
+        '''
+        Add every non-hidden file below `rootdir`, with paths relative to
+        `rootdir`. Return a list of (full path, relative path, checksum), as
+        does sys.list_directory_checksums.
+
+        '''
+
+        rootdir = os.path.abspath(rootdir)
+
+        file_list = []
+        for _dir, subdirs, files in os.walk(rootdir):
+
+            subdirs[:] = sorted(d for d in subdirs if not d[0] == '.')
+
+            for _file in sorted(f for f in files if not f[0] == '.'):
+
+                full_path = os.path.join(_dir, _file)
+                relative_path = os.path.relpath(full_path, rootdir)
+
+                file_list.append(
+                    (full_path,
+                     relative_path,
+                     self.add_file(full_path, relative_path))
+                )
+
+        return file_list
+
+    def _addfile(self, tarinfo, fileobj):
+
+        reader = HashingReader(fileobj, self.algorithm)
+
+        # tarfile copies the member's bytes across in fixed sized blocks, so
+        # large files are never read into memory all at once.
+        self.tarball.addfile(tarinfo, reader)
+
+        return reader.hexdigest()
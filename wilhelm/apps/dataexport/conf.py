@@ -4,9 +4,27 @@ data_export_timestamp_format = '%y%m%d%H%M%S'
 human_readable_date_format = '%B %d, %Y'
 human_readable_time_format = '%H:%M:%S'
 isoformat = '%Y-%m-%d %H:%M:%S' # YYYY-MM-DD HH:MM:SS 
+
+# How datetimes are tagged in json that is to be read back, e.g. stored
+# feedback, rather than exported.
+datetime_tag = '__datetime__'
+tagged_datetime_format = '%Y-%m-%d %H:%M:%S.%f'
+
 indent_level = 2
 data_archives_cache = settings.DATA_ARCHIVES_CACHE
-tarball_compression_method = 'bz2' # bz2 or gz
+tarball_compression_method = 'bz2' # bz2, gz, pbz2 or pgz
+
+# Number of workers for pbz2 and pgz compression. None means one per cpu.
+tarball_compression_workers = None
+
+# sendfile backends that hand the download over to the web server (Apache's
+# mod_xsendfile, nginx's X-Accel-Redirect), which then serves byte ranges.
+offloading_sendfile_backends = ('sendfile.backends.xsendfile',
+                                'sendfile.backends.nginx',
+                                'sendfile.backends.mod_wsgi')
+
+# When we serve byte ranges ourselves, we read the tarball in chunks this big.
+download_chunk_size = 2**16
 
 hash_algorithms = dict(sha1 = ('sha1', 'SHA-1', 'sha1sum'),
                        sha256 = ('sha256', 'SHA-256', 'sha256sum'))
@@ -0,0 +1,254 @@
+'''
+Conditional and byte range downloads of data archives.
+
+Released tarballs never change, so a strong ETag and Last-Modified date can
+be given for each, repeat downloads can be answered with 304 Not Modified and
+interrupted downloads can be resumed with Range requests.
+
+If the sendfile backend hands the download over to the web server
+(X-Sendfile, X-Accel-Redirect), the conditional request is still decided
+here, but the web server serves the bytes, ranges included. Otherwise, we
+serve byte ranges ourselves.
+'''
+
+from __future__ import absolute_import
+
+#=============================================================================
+# Standard library imports
+#=============================================================================
+import os
+
+#=============================================================================
+# Third party imports
+#=============================================================================
+from sendfile import sendfile
+
+#=============================================================================
+# Django imports
+#=============================================================================
+from django.conf import settings
+from django.http import (HttpResponse,
+                         HttpResponseNotModified,
+                         StreamingHttpResponse)
+from django.utils.http import (http_date,
+                               parse_etags,
+                               parse_http_date_safe,
+                               quote_etag)
+
+#=============================================================================
+# Local imports
+#=============================================================================
+from . import conf
+
+#================================ End Imports ================================
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def parse_byte_range(range_header, filesize):
+
+    '''
+    Return the (first, last) byte positions, inclusive, requested by the
+    `range_header`, e.g. "bytes=100-" or "bytes=-500".
+
+    Return None if the header should be ignored: it is not a single byte
+    range or it is malformed, e.g. its last byte is before its first. Raise
+    RangeNotSatisfiable if it is a valid range of bytes that are not in the
+    file.
+
+    '''
+
+    units, _, byte_range = range_header.partition('=')
+
+    if units.strip() != 'bytes' or ',' in byte_range:
+        return None
+
+    first, _, last = byte_range.strip().partition('-')
+
+    try:
+
+        if not first:
+            # A suffix range, i.e. the last `last` bytes.
+            suffix_length = int(last)
+            if suffix_length <= 0:
+                raise RangeNotSatisfiable
+            first = max(filesize - suffix_length, 0)
+            last = filesize - 1
+        else:
+            first = int(first)
+            if last:
+                last = int(last)
+                if last < first:
+                    return None
+                last = min(last, filesize - 1)
+            else:
+                last = filesize - 1
+
+    except ValueError:
+        return None
+
+    if first >= filesize:
+        raise RangeNotSatisfiable
+
+    return first, last
+
+def etag_matches(etag, header):
+
+    ''' Does `etag` match any listed in an If-(None-)Match header?'''
+
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags
+
+def not_modified(request, etag, last_modified):
+
+    '''
+    Is this a conditional GET for what the client already has?
+
+    '''
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+
+    if if_none_match is not None:
+        return etag_matches(etag, if_none_match)
+
+    if_modified_since\
+        = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE'))
+
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+def precondition_failed(request, etag, last_modified):
+
+    '''
+    Has the client made its request conditional on a different version?
+
+    '''
+
+    if_match = request.META.get('HTTP_IF_MATCH')
+
+    if if_match is not None:
+        return not etag_matches(etag, if_match)
+
+    if_unmodified_since\
+        = parse_http_date_safe(request.META.get('HTTP_IF_UNMODIFIED_SINCE'))
+
+    return (if_unmodified_since is not None
+            and last_modified > if_unmodified_since)
+
+def if_range_matches(request, etag, last_modified):
+
+    '''
+    Should a Range request be honoured given its If-Range, if any, header?
+    If-Range needs an exact match of a strong validator.
+
+    '''
+
+    if_range = request.META.get('HTTP_IF_RANGE')
+
+    if if_range is None:
+        return True
+
+    if if_range.strip().startswith(('"', 'W/')):
+        return if_range.strip() == quote_etag(etag)
+
+    return parse_http_date_safe(if_range) == last_modified
+
+def file_iterator(path, first, last, chunk_size):
+
+    ''' Yield bytes `first` to `last`, inclusive, of the file at `path`. '''
+
+    with open(path, 'rb') as f:
+
+        f.seek(first)
+        remaining = last - first + 1
+
+        while remaining > 0:
+
+            data = f.read(min(chunk_size, remaining))
+
+            if not data:
+                break
+
+            remaining -= len(data)
+
+            yield data
+
+def add_validators(response, etag, last_modified):
+
+    response['ETag'] = quote_etag(etag)
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+
+    return response
+
+def archive_download_response(request,
+                              archive,
+                              mimetype='application/x-tar'):
+
+    '''
+    Return the response to a request to download the data `archive`, an
+    ExperimentDataExport.
+
+    '''
+
+    etag = archive.etag
+    last_modified = archive.last_modified
+    filesize = os.path.getsize(archive.filepath)
+
+    if precondition_failed(request, etag, last_modified):
+        return add_validators(HttpResponse(status=412), etag, last_modified)
+
+    if not_modified(request, etag, last_modified):
+        return add_validators(HttpResponseNotModified(), etag, last_modified)
+
+    range_header = request.META.get('HTTP_RANGE')
+    byte_range = None
+    if_range_failed = False
+
+    if range_header and request.method == 'GET':
+
+        try:
+            byte_range = parse_byte_range(range_header, filesize)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */%d' % filesize
+            return add_validators(response, etag, last_modified)
+
+        if byte_range and not if_range_matches(request, etag, last_modified):
+            byte_range = None
+            if_range_failed = True
+
+    offloaded = settings.SENDFILE_BACKEND in conf.offloading_sendfile_backends
+
+    # The web server serves ranges itself, but it would do so even when the
+    # If-Range does not match, which only we can tell. In that one case we
+    # serve the whole file ourselves.
+    if (offloaded and not if_range_failed)\
+            or (not offloaded and byte_range is None):
+
+        response = sendfile(request,
+                            filename=archive.filepath,
+                            mimetype=mimetype,
+                            attachment=True,
+                            attachment_filename=archive.attachment_filename)
+
+        return add_validators(response, etag, last_modified)
+
+    if byte_range is None:
+        first, last, status = 0, filesize - 1, 200
+    else:
+        (first, last), status = byte_range, 206
+
+    response = StreamingHttpResponse(
+        file_iterator(archive.filepath, first, last, conf.download_chunk_size),
+        status=status,
+        content_type=mimetype
+    )
+
+    response['Content-Length'] = str(last - first + 1)
+    response['Content-Disposition']\
+        = 'attachment; filename="%s"' % archive.attachment_filename
+
+    if status == 206:
+        response['Content-Range'] = 'bytes %d-%d/%d' % (first, last, filesize)
+
+    return add_validators(response, etag, last_modified)
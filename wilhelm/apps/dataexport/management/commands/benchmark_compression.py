@@ -0,0 +1,153 @@
+from __future__ import absolute_import
+
+#=============================================================================
+# Standard library imports
+#=============================================================================
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+#=============================================================================
+# Django imports
+#=============================================================================
+from django.core.management.base import BaseCommand
+
+#=============================================================================
+# Wilhelm imports
+#=============================================================================
+from apps.core.utils import compression, tarball
+from apps.dataexport.utils import human_readable
+
+#================================ End Imports ================================
+
+class SyntheticExport(object):
+
+    '''
+    A file object that reads as `size` bytes of json that looks like a data
+    export. A few MB of made up session records are generated once and then
+    read over and over again.
+
+    '''
+
+    pool_size = 8 * 2**20
+
+    def __init__(self, size, seed=101):
+
+        rng = random.Random(seed)
+        words = ['recall', 'recognition', 'word', 'text', 'display', 'slide',
+                 'widget', 'response', 'completed', 'started', 'tetris']
+
+        records = []
+        length = 0
+        while length < self.pool_size:
+            record = json.dumps(
+                dict(Session=rng.getrandbits(160),
+                     Subject=rng.getrandbits(160),
+                     Slide=rng.choice(words),
+                     Response=[rng.choice(words) for _ in xrange(20)],
+                     Latency=rng.random() * 10,
+                     Completed_datetime='2016-%02d-%02d %02d:%02d:%02d'
+                     % (rng.randint(1, 12), rng.randint(1, 28),
+                        rng.randint(0, 23), rng.randint(0, 59),
+                        rng.randint(0, 59))),
+                indent=2)
+            records.append(record)
+            length += len(record)
+
+        self.pool = ',\n'.join(records)
+        self.size = size
+        self.position = 0
+
+    def read(self, size=-1):
+
+        remaining = self.size - self.position
+        if size < 0 or size > remaining:
+            size = remaining
+
+        offset = self.position % len(self.pool)
+        data = self.pool[offset:offset + size]
+        while len(data) < size:
+            data += self.pool[:size - len(data)]
+
+        self.position += size
+
+        return data
+
+
+class Command(BaseCommand):
+
+    help = """benchmark_compression [--size 2048] [--methods bz2 pbz2 gz pgz] [--workers N] [--pool thread]"""
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--size',
+            dest='size',
+            type=int,
+            default=2048,
+            help='The size, in MB, of the synthetic data export.'
+            )
+
+        parser.add_argument('--methods',
+            dest='methods',
+            nargs='+',
+            default=sorted(compression.compressors),
+            help='The compression methods to compare.'
+            )
+
+        parser.add_argument('--workers',
+            dest='workers',
+            type=int,
+            default=None,
+            help='Number of workers for the parallel methods.'
+            )
+
+        parser.add_argument('--pool',
+            dest='pool',
+            default='thread',
+            choices=['thread', 'process'],
+            help='Whether the parallel methods use threads or processes.'
+            )
+
+    def handle(self, *args, **options):
+
+        size = options['size'] * 2**20
+        tmpdir = tempfile.mkdtemp()
+
+        self.stdout.write('%-6s %12s %12s %8s'
+                          % ('Method', 'Size', 'MB/s', 'Ratio'))
+
+        try:
+
+            for method in options['methods']:
+
+                tarball_path = os.path.join(
+                    tmpdir, 'benchmark.tar.' + compression.extension(method)
+                )
+
+                start = time.time()
+
+                with tarball.StreamingTarball(tarball_path,
+                                              method,
+                                              workers=options['workers'],
+                                              pool=options['pool']) as benchmark_tarball:
+
+                    benchmark_tarball.add_fileobj(SyntheticExport(size),
+                                                  'data.json',
+                                                  size=size)
+
+                elapsed = time.time() - start
+                compressed_size = os.path.getsize(tarball_path)
+
+                self.stdout.write('%-6s %12s %12.1f %8.2f'
+                                  % (method,
+                                     human_readable(compressed_size),
+                                     size / 2.0**20 / elapsed,
+                                     float(size) / compressed_size))
+
+                os.unlink(tarball_path)
+
+        finally:
+            shutil.rmtree(tmpdir)
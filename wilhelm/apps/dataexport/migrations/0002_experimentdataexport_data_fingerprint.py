@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataexport', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='experimentdataexport',
+            name='data_fingerprint',
+            field=models.CharField(max_length=64, null=True),
+        ),
+    ]
@@ -4,9 +4,10 @@ from __future__ import absolute_import
 # Standard library imports
 #=============================================================================
 from collections import OrderedDict
+import hashlib
 import logging
-import tempfile
 import os
+import time
 
 #=============================================================================
 # Third party imports
@@ -22,7 +23,8 @@ from django.db import models
 #=============================================================================
 # Wilhelm imports
 #=============================================================================
-from apps.core.utils import django, datetime
+from apps.core.routers import read_replica
+from apps.core.utils import compression, django, datetime
 from apps.archives.models import Experiment
 from apps.sessions.models import ExperimentSession
 
@@ -54,15 +56,7 @@ def export_experiment(experiment, filename = 'data.json', tojson=True):
         )
 
     if tojson:
-
-        tmpdir = tempfile.mkdtemp()
-        tmpfilename = os.path.join(tmpdir, filename)
-        tmpfile = open(tmpfilename, 'w')
-        tmpfile.write(utils.tojson(export_dict))
-        tmpfile.close()
-        os.chmod(tmpfilename, 0644)
-
-        return tmpdir
+        return [(filename, utils.tojson(export_dict))]
     else:
         return export_dict
 
@@ -71,16 +65,62 @@ class ExperimentDataExportManager(models.Manager):
     def most_recent_entry(self, experiment):
 
         previous_entries\
-            = self.filter(experiment=experiment).order_by('-datetime')
+            = self.filter(experiment=experiment).order_by('-datetime', '-uid')
 
         if previous_entries:
             return previous_entries[0]
 
 
+    def latest_entries(self):
+
+        '''
+        Return the most recent entry of each experiment, in one query. Of
+        entries with the same datetime, the one with the greatest uid is the
+        most recent, as in most_recent_entry.
+
+        '''
+
+        table = self.model._meta.db_table
+
+        most_recent_condition = """
+        {table}.uid = (SELECT previous.uid
+                       FROM {table} AS previous
+                       WHERE previous.experiment_id = {table}.experiment_id
+                       AND previous.datetime IS NOT NULL
+                       ORDER BY previous.datetime DESC, previous.uid DESC
+                       LIMIT 1)
+        """.format(table=table)
+
+        return self.select_related('experiment')\
+            .extra(where=[most_recent_condition])\
+            .order_by('experiment')
+
+    def latest_data_fingerprints(self):
+
+        '''
+        Return a dictionary of the data fingerprint of the most recent export
+        of each experiment, keyed by experiment pk. One query for all
+        experiments.
+
+        '''
+
+        return dict(
+            self.latest_entries().values_list('experiment', 'data_fingerprint')
+        )
+
     def release(self, new_data_only=True):
+
+        if new_data_only:
+            latest_data_fingerprints = self.latest_data_fingerprints()
+        else:
+            latest_data_fingerprints = None
+
         for experiment in Experiment.objects.all():
-            ExperimentDataExport.release(experiment,
-                                         new_data_only=new_data_only)
+            ExperimentDataExport.release(
+                experiment,
+                new_data_only=new_data_only,
+                latest_data_fingerprints=latest_data_fingerprints
+            )
 
 
 shorten_uid = lambda uid: uid[:settings.UID_SHORT_LENGTH]
@@ -102,14 +142,51 @@ class ExperimentDataExport(models.Model):
     checksums = JSONField(null=True)
     filesize = models.CharField(null=True, max_length=100)
 
+    # See ExperimentSessionManager.data_fingerprint.
+    data_fingerprint = models.CharField(null=True, max_length=64)
+
     objects = ExperimentDataExportManager()
 
     @classmethod
-    def release(cls, experiment, new_data_only=True):
+    def release(cls,
+                experiment,
+                new_data_only=True,
+                latest_data_fingerprints=None):
+
+        '''
+        Export all of the data of `experiment` and release it as a tarball.
+
+        If `new_data_only`, do nothing if the data has not changed since the
+        most recent release. That is checked first by the data fingerprint,
+        before anything is exported. The data fingerprints of the most recent
+        releases may be passed in as `latest_data_fingerprints`, see
+        ExperimentDataExportManager.latest_data_fingerprints, otherwise they
+        are looked up.
+
+        '''
 
         try:
 
-            exported_data_tmpdir = export_experiment(experiment)
+            with read_replica():
+                data_fingerprint\
+                    = ExperimentSession.objects.data_fingerprint(experiment)
+
+            if new_data_only:
+
+                if latest_data_fingerprints is None:
+                    latest_data_fingerprints\
+                        = cls.objects.latest_data_fingerprints()
+
+                if data_fingerprint\
+                        == latest_data_fingerprints.get(experiment.pk):
+
+                    logger.info('Not exporting data for %s. Data fingerprint unchanged.'
+                                % experiment.name)
+
+                    return
+
+            with read_replica():
+                exported_data_files = export_experiment(experiment)
 
             datetime_now = datetime.now()
 
@@ -148,14 +225,15 @@ class ExperimentDataExport(models.Model):
             ]
 
             tarball_filename, checksums, tarball_filesize\
-                = utils.make_tarball(exported_data_tmpdir,
+                = utils.make_tarball(exported_data_files,
                                      boilerplates,
                                      label,
                                      compression_method=conf.tarball_compression_method,
                                      checksum_filename=conf.tarball_checksum)
 
             attachment_filename\
-                = shorten_uid(uid) + '.tar.' + conf.tarball_compression_method
+                = shorten_uid(uid) + '.tar.'\
+                + compression.extension(conf.tarball_compression_method)
 
             create_new_data_export_instance\
                 = lambda: cls.objects.create(uid = uid,
@@ -165,7 +243,8 @@ class ExperimentDataExport(models.Model):
                                              datetime = datetime_now,
                                              checksums = checksums,
                                              filename = tarball_filename,
-                                             filesize = tarball_filesize)
+                                             filesize = tarball_filesize,
+                                             data_fingerprint = data_fingerprint)
 
             if not new_data_only:
                 create_new_data_export_instance()
@@ -183,6 +262,10 @@ class ExperimentDataExport(models.Model):
                         logger.info(msg % (experiment.name,
                                            most_recent_data.datetime.strftime(conf.isoformat))
                                      )
+
+                        # Next time, the fingerprint will save us the bother.
+                        most_recent_data.data_fingerprint = data_fingerprint
+                        most_recent_data.save(update_fields=['data_fingerprint'])
                     else:
                                                   
                         create_new_data_export_instance()
@@ -199,6 +282,29 @@ class ExperimentDataExport(models.Model):
     def permalink(self):
         return settings.DATA_PERMALINK_ROOT + self.short_uid
 
+    @property
+    def etag(self):
+
+        '''
+        A strong (unquoted) entity tag for the tarball. Tarballs are never
+        changed once released, so their checksums and release time identify
+        them.
+
+        '''
+
+        _etag = hashlib.sha1(self.uid)
+        _etag.update(self.datetime.strftime(conf.isoformat))
+
+        for checksum, relative_path in sorted(map(tuple, self.checksums or [])):
+            _etag.update('%s %s\n' % (checksum, relative_path))
+
+        return _etag.hexdigest()
+
+    @property
+    def last_modified(self):
+        ''' The release time as a timestamp, for Last-Modified headers. '''
+        return int(time.mktime(self.datetime.timetuple()))
+
     @property
     def filepath(self):
         return os.path.join(settings.DATA_ARCHIVES_CACHE,
@@ -1,3 +1,413 @@
-from django.test import TestCase
+'''
+Test the dataexport app.
+'''
 
-# Create your tests here.
+from __future__ import absolute_import
+
+#=============================================================================
+# Standard library imports.
+#=============================================================================
+import datetime
+import hashlib
+import os
+import shutil
+import tarfile
+import tempfile
+from random import choice
+
+#=============================================================================
+# Django imports.
+#=============================================================================
+from django.test import RequestFactory, TestCase
+
+#=============================================================================
+# Wilhelm imports.
+#=============================================================================
+from . import conf, downloads, models, utils
+from apps import testing
+from apps.testing import utils as testing_utils
+from apps.subjects import utils as subjects_utils
+from apps.subjects import models as subjects_models
+from apps.archives import models as archives_models
+from apps.sessions import models as sessions_models
+
+#================================ End Imports ================================
+
+class MakeTarball(TestCase):
+
+    def setUp(self):
+
+        self.data_files = [('data.json', '{"foo": [1, 2, 3]}'),
+                           ('more/data.json', '{"bar": null}')]
+
+        self.boilerplates = [(conf.readme_txt, 'A readme.\n'),
+                             (conf.license_txt, 'A licence.\n')]
+
+        self.label = 'data_test_tarball'
+
+    def tearDown(self):
+
+        tarball_path = os.path.join(conf.data_archives_cache,
+                                    self.label + '.tar.bz2')
+
+        if os.path.exists(tarball_path):
+            os.unlink(tarball_path)
+
+    def test_make_tarball(self):
+
+        '''
+        Are the in-memory data files and boilerplates in the tarball, and are
+        the checksums those of the data files' contents?
+        '''
+
+        tarball_filename, checksums, tarball_filesize\
+            = utils.make_tarball(self.data_files,
+                                 self.boilerplates,
+                                 self.label,
+                                 compression_method='bz2',
+                                 checksum_filename=conf.tarball_checksum)
+
+        algorithm = conf.default_hash_algorithm[0]
+
+        self.assertEqual(
+            checksums,
+            [(hashlib.new(algorithm, content).hexdigest(), filename)
+             for filename, content in self.data_files]
+        )
+
+        tarball_path = os.path.join(conf.data_archives_cache,
+                                    tarball_filename)
+
+        with tarfile.open(tarball_path, 'r:bz2') as tarball:
+
+            for filename, content in self.data_files + self.boilerplates:
+                self.assertEqual(tarball.extractfile(filename).read(),
+                                 content)
+
+            checksum_txt\
+                = tarball.extractfile(conf.tarball_checksum).read()
+
+        self.assertEqual(
+            checksum_txt,
+            '\n'.join(['%s %s' % checksum for checksum in checksums])+'\n'
+        )
+
+
+class ReleaseDataExport(TestCase):
+
+    def setUp(self):
+
+        subjects_utils.subject_enroll(testing.mock_subjects)
+
+        self.mock_repository_setup_dir\
+            = testing_utils.make_mock_repository_files()
+
+        self.mock_repository\
+             = testing_utils.MockExperimentRepository(
+                 setup_dir = self.mock_repository_setup_dir)
+
+        self.mock_repository.initialize()
+        self.mock_repository.update(revisions=2)
+
+        experiment_repository = archives_models.ExperimentRepository\
+            .objects.create(name = 'mock',
+                            description = 'A mock repository',
+                            date_created = datetime.datetime.now(),
+                            is_active = True,
+                            path = self.mock_repository.path)
+
+        experiment_repository.make_archives()
+        archives_models.Experiment.objects.set_default_current_version()
+
+        self.experiment\
+            = archives_models.Experiment.objects.get(class_name = 'Rusty')
+
+        subject = subjects_models.Subject.objects.get(
+            user__username = choice(testing.mock_subjects.keys())
+        )
+
+        self.session = sessions_models.ExperimentSession.new(subject, 'Rusty')
+
+        # The data that is exported, and the number of times it is.
+        self.exported_data = '{"sessions": []}'
+        self.exports = []
+
+        self.export_experiment = models.export_experiment
+        models.export_experiment = self.counting_export_experiment
+
+    def tearDown(self):
+
+        models.export_experiment = self.export_experiment
+
+        for data_export in models.ExperimentDataExport.objects.all():
+            if os.path.exists(data_export.filepath):
+                os.unlink(data_export.filepath)
+
+        shutil.rmtree(self.mock_repository.path)
+        shutil.rmtree(self.mock_repository_setup_dir)
+
+    def counting_export_experiment(self, experiment):
+        self.exports.append(experiment)
+        return [('data.json', self.exported_data)]
+
+    def release(self):
+        models.ExperimentDataExport.release(self.experiment)
+
+    def update_session(self, **fields):
+        sessions_models.ExperimentSession.objects\
+            .filter(pk = self.session.pk).update(**fields)
+
+    def test_unchanged_fingerprint(self):
+
+        '''
+        If no session has changed since the last release, is nothing
+        exported?
+        '''
+
+        self.release()
+        self.release()
+
+        self.assertEqual(len(self.exports), 1)
+        self.assertEqual(models.ExperimentDataExport.objects.count(), 1)
+
+    def test_changed_sessions(self):
+
+        '''
+        Is the data exported again when a session's last activity, or its
+        status, changes?
+        '''
+
+        self.release()
+
+        self.update_session(last_activity = datetime.datetime.now()
+                            + datetime.timedelta(minutes = 1))
+        self.exported_data = '{"sessions": [1]}'
+        self.release()
+
+        self.update_session(
+            status = sessions_models.ExperimentSession.status_completed
+        )
+        self.exported_data = '{"sessions": [2]}'
+        self.release()
+
+        self.assertEqual(len(self.exports), 3)
+        self.assertEqual(models.ExperimentDataExport.objects.count(), 3)
+
+    def test_fingerprint_backfill(self):
+
+        '''
+        If the data of a changed session exports to the same files as before,
+        is no new release made, but is the new fingerprint put on the previous
+        release, so that the data is not exported again next time?
+        '''
+
+        self.release()
+
+        self.update_session(last_activity = datetime.datetime.now()
+                            + datetime.timedelta(minutes = 1))
+        self.release()
+
+        self.assertEqual(len(self.exports), 2)
+        self.assertEqual(models.ExperimentDataExport.objects.count(), 1)
+
+        self.assertEqual(
+            models.ExperimentDataExport.objects.get().data_fingerprint,
+            sessions_models.ExperimentSession.objects.data_fingerprint(
+                self.experiment
+            )
+        )
+
+        self.release()
+
+        self.assertEqual(len(self.exports), 2)
+
+    def test_latest_entries_with_the_same_datetime(self):
+
+        '''
+        Of two exports of an experiment made at the same time, is only one
+        the latest, and the same one as most_recent_entry?
+        '''
+
+        now = datetime.datetime.now()
+
+        for uid, data_fingerprint in [('a' * 40, 'first'),
+                                      ('b' * 40, 'second')]:
+            models.ExperimentDataExport.objects.create(
+                uid = uid,
+                short_uid = models.shorten_uid(uid),
+                experiment = self.experiment,
+                datetime = now,
+                data_fingerprint = data_fingerprint
+            )
+
+        latest_entries = list(
+            models.ExperimentDataExport.objects.latest_entries()
+        )
+
+        self.assertEqual(
+            latest_entries,
+            [models.ExperimentDataExport.objects.most_recent_entry(
+                self.experiment
+            )]
+        )
+
+        self.assertEqual(
+            models.ExperimentDataExport.objects.latest_data_fingerprints(),
+            {self.experiment.pk: 'second'}
+        )
+
+
+class ParseByteRange(TestCase):
+
+    filesize = 1000
+
+    def test_byte_ranges(self):
+
+        for range_header, byte_range in [('bytes=0-499', (0, 499)),
+                                         ('bytes=500-', (500, 999)),
+                                         ('bytes=-200', (800, 999)),
+                                         ('bytes=900-5000', (900, 999)),
+                                         ('bytes=-5000', (0, 999))]:
+
+            self.assertEqual(
+                downloads.parse_byte_range(range_header, self.filesize),
+                byte_range
+            )
+
+    def test_ignored_ranges(self):
+
+        for range_header in ['bytes=0-10,20-30',
+                             'lines=0-10',
+                             'bytes=a-b',
+                             'bytes=500-400']:
+            self.assertIsNone(
+                downloads.parse_byte_range(range_header, self.filesize)
+            )
+
+    def test_unsatisfiable_ranges(self):
+
+        for range_header in ['bytes=1000-', 'bytes=1000-1200', 'bytes=-0']:
+            self.assertRaises(downloads.RangeNotSatisfiable,
+                              downloads.parse_byte_range,
+                              range_header,
+                              self.filesize)
+
+
+class MockArchive(object):
+
+    ''' The attributes of an ExperimentDataExport that downloads use.'''
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.attachment_filename = 'abcdefg.tar.bz2'
+        self.etag = 'abc123'
+        self.last_modified = 1450000000
+
+
+class ArchiveDownloadResponse(TestCase):
+
+    content = ''.join(chr(i % 256) for i in range(1000))
+
+    def setUp(self):
+
+        self.tmpdir = tempfile.mkdtemp()
+        filepath = os.path.join(self.tmpdir, 'archive.tar.bz2')
+
+        with open(filepath, 'wb') as f:
+            f.write(self.content)
+
+        self.archive = MockArchive(filepath)
+        self.request_factory = RequestFactory()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def get(self, **headers):
+
+        request = self.request_factory.get('/', **headers)
+
+        # With a sendfile backend, as in the development and testing
+        # settings, that leaves the ranges to us.
+        return downloads.archive_download_response(request, self.archive)
+
+    def test_not_modified(self):
+
+        response = self.get(HTTP_IF_NONE_MATCH='"abc123"')
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], '"abc123"')
+
+    def test_precondition_failed(self):
+
+        response = self.get(HTTP_IF_MATCH='"xyz789"')
+
+        self.assertEqual(response.status_code, 412)
+
+    def test_byte_range(self):
+
+        response = self.get(HTTP_RANGE='bytes=100-199',
+                            HTTP_IF_RANGE='"abc123"')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 100-199/1000')
+        self.assertEqual(''.join(response.streaming_content),
+                         self.content[100:200])
+
+    def test_stale_if_range(self):
+
+        '''
+        If the If-Range validator is not the archive's, is the whole archive
+        served?
+        '''
+
+        for if_range in ['"xyz789"', 'Mon, 01 Jan 2001 00:00:00 GMT']:
+
+            response = self.get(HTTP_RANGE='bytes=100-199',
+                                HTTP_IF_RANGE=if_range)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.has_header('Content-Range'))
+
+    def test_invalid_range(self):
+
+        '''
+        Is a range whose last byte is before its first ignored, and the whole
+        archive served, while one beyond the end of the archive is not
+        satisfiable?
+        '''
+
+        self.assertEqual(self.get(HTTP_RANGE='bytes=500-400').status_code,
+                         200)
+
+        response = self.get(HTTP_RANGE='bytes=1000-')
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1000')
+
+
+class TaggedJson(TestCase):
+
+    def test_round_trip(self):
+
+        '''
+        Are datetimes, including those inside lists, read back as the same
+        datetimes, and strings that look like datetimes left as strings?
+        '''
+
+        started = datetime.datetime(2016, 3, 1, 12, 30, 45, 123456)
+        finished = datetime.datetime(2016, 3, 1, 12, 45, 0)
+
+        obj = {'start_date': started,
+               'trials': [{'onset': started}, finished],
+               'note': '2016-03-01 12:30:45',
+               'scores': [0.5, None, True]}
+
+        self.assertEqual(utils.fromjson_tagged(utils.tojson_tagged(obj)), obj)
+
+    def test_unknown_types(self):
+
+        '''
+        Is anything else that json cannot write an error, not a null?
+        '''
+
+        self.assertRaises(TypeError, utils.tojson_tagged, {'s': set([1])})
@@ -6,8 +6,6 @@ from __future__ import absolute_import
 import os
 import json
 import datetime
-import tempfile
-import tarfile
 
 #=============================================================================
 # Django imports
@@ -17,7 +15,7 @@ from django.conf import settings
 #=============================================================================
 # Wilhelm imports
 #=============================================================================
-from apps.core.utils import sys, strings
+from apps.core.utils import compression, strings, tarball
 
 #=============================================================================
 # Local imports 
@@ -70,49 +68,92 @@ def tojson(export_dict):
                       default=data_export_filter,
                       indent=conf.indent_level)
 
-def make_tarball(data_dir,
+def tag_datetimes(obj):
+
+    """ How tojson_tagged handles un-json-able data types.
+
+    Datetimes are written as {"__datetime__": "YYYY-MM-DD HH:MM:SS.ffffff"},
+    so that fromjson_tagged can tell them from strings. Anything else is an
+    error, rather than a null.
+
+    """
+
+    if isinstance(obj, datetime.datetime):
+        return {conf.datetime_tag: obj.strftime(conf.tagged_datetime_format)}
+
+    raise TypeError('%r is not JSON serializable' % obj)
+
+def tojson_tagged(obj):
+
+    """ Write `obj` as json that fromjson_tagged reads back losslessly.
+
+    """
+
+    return json.dumps(obj, default=tag_datetimes)
+
+def restore_datetimes(obj):
+
+    """ Turn the datetimes that tojson_tagged tagged back into datetimes.
+
+    As this is the object hook of every json object, datetimes are restored
+    wherever they are, e.g. inside lists.
+
+    """
+
+    if obj.keys() == [conf.datetime_tag]:
+        return datetime.datetime.strptime(obj[conf.datetime_tag],
+                                          conf.tagged_datetime_format)
+
+    return obj
+
+def fromjson_tagged(json_string):
+
+    """ Read what tojson_tagged wrote, datetimes included.
+
+    """
+
+    return json.loads(json_string, object_hook=restore_datetimes)
+
+def make_tarball(data_files,
                  boilerplates,
                  label,
                  compression_method='bz2',
                  checksum_filename='checksum.txt'):
 
     '''
-    Create bz2 (or gz) tarball of files in dirname directory. Run a checksum on
-    file contents and append this information to the tarball.
+    Create bz2 (or gz) tarball of the (filename, content) pairs in
+    `data_files`. The contents are checksummed as they are written and this
+    information is appended to the tarball, along with the boilerplates.
     '''
 
-    tarball_ext = '.tar.' + compression_method
-    tarfile_method = 'w:' + compression_method
+    tarball_ext = '.tar.' + compression.extension(compression_method)
 
     tarball_filename = label + tarball_ext
     tarballs_directory = conf.data_archives_cache
     tarfile_path = os.path.join(tarballs_directory, tarball_filename)
 
-    with tarfile.open(tarfile_path, tarfile_method) as tarball:
-        
+    with tarball.StreamingTarball(tarfile_path,
+                                  compression_method,
+                                  algorithm=conf.default_hash_algorithm[0],
+                                  workers=conf.tarball_compression_workers) as data_tarball:
+
         checksums = []
-        for (full_path, 
-             relative_path, 
-             checksum) in sys.list_directory_checksums(data_dir, 
-                                                       algorithm=conf.default_hash_algorithm[0]):
+        for relative_path, content in data_files:
 
+            checksum = data_tarball.add_string(relative_path, content)
             checksums.append((checksum, relative_path))
-            tarball.add(full_path, arcname=relative_path)
 
         checksum_txt\
-            = '\n'.join(['%s %s' % checksum for checksum in checksums])+'\n'
+            = '\n'.join(['%s %s' % checksum_line
+                         for checksum_line in checksums])+'\n'
 
         boilerplates.append((checksum_filename, checksum_txt))
 
         for (boilerplate_filename, 
              boilerplate_file_content) in boilerplates:
 
-            tmpfile = tempfile.NamedTemporaryFile(delete=False)
-            tmpfile.write(boilerplate_file_content)
-            tmpfile.close()
-            os.chmod(tmpfile.name, 0644)
-            tarball.add(tmpfile.name, boilerplate_filename)
-            os.unlink(tmpfile.name)
+            data_tarball.add_string(boilerplate_filename,
+                                    boilerplate_file_content)
 
     tarball_filesize = human_readable(os.path.getsize(tarfile_path))
 
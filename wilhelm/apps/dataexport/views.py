@@ -5,11 +5,6 @@ from __future__ import absolute_import
 #=============================================================================
 import logging
 
-#=============================================================================
-# Third party imports
-#=============================================================================
-from sendfile import sendfile
-
 #=============================================================================
 # Django imports
 #=============================================================================
@@ -22,6 +17,7 @@ from django.http import Http404
 from apps.archives.models import Experiment
 from apps.presenter.conf import PLAY_EXPERIMENT_ROOT
 from apps.dataexport import models
+from apps.dataexport.downloads import archive_download_response
 from apps.core.utils.django import http_response
 
 #================================ End Imports ================================
@@ -36,22 +32,18 @@ def archive_download(request, archive_uid=None):
             = models.ExperimentDataExport.objects.get(short_uid=archive_uid)
 
 
-        return sendfile(request, 
-                        filename=archive.filepath,
-                        mimetype='application/x-tar',
-                        attachment=True,
-                        attachment_filename=archive.attachment_filename)
+        return archive_download_response(request, archive)
 
 
     except ObjectDoesNotExist as e:
         raise Http404(
-            "data archive {archive_name} does not exist.".format(archive_uid)
+            "data archive {archive_name} does not exist.".format(archive_name=archive_uid)
         )
     except MultipleObjectsReturned as e:
 
         logger.warning('Multiple objects returned: %s' % e.message)
         raise Http404(
-            "Can not return data archive {archive_name}.".format(archive_uid)
+            "Can not return data archive {archive_name}.".format(archive_name=archive_uid)
         )
 
 
@@ -105,11 +97,7 @@ def archive_listing(request):
     '''
 
     export_list = []
-    for experiment in Experiment.objects.all():
-
-        export\
-            = models.ExperimentDataExport.objects\
-              .filter(experiment=experiment).latest('datetime')
+    for export in models.ExperimentDataExport.objects.latest_entries():
 
         export_list.append(
             dict(url = export.short_uid,
@@ -0,0 +1,62 @@
+from __future__ import absolute_import
+
+#=============================================================================
+# Django imports
+#=============================================================================
+from django.core.management.base import BaseCommand
+
+#=============================================================================
+# Wilhelm imports
+#=============================================================================
+from apps.archives.models import Experiment
+from apps.core.utils.docutils import warm_rst_cache
+from apps.front.utils import flatfiles
+from apps.research.models import Project
+
+#================================ End Imports ================================
+
+def get_rst_texts():
+
+    '''
+    Yield the rst texts that are rendered on page views: the experiments'
+    blurbs, the instructions of their current playlists, the research
+    projects' blurbs, and the front page flat files.
+
+    '''
+
+    for experiment in Experiment.objects.select_related('current_version'):
+
+        if experiment.blurb:
+            yield experiment.blurb
+
+        if experiment.current_version is None:
+            continue
+
+        playlist = experiment.current_version.playlist
+
+        for instruction in getattr(playlist, 'instructions', None) or []:
+            yield instruction
+
+    for blurb in Project.objects.exclude(blurb=None)\
+            .values_list('blurb', flat=True):
+        yield blurb
+
+    for welcome_blurb in flatfiles.get('welcome.cfg').itervalues():
+        yield welcome_blurb['short-text']
+
+    for filename in ('about.cfg', 'takingpart.cfg', 'privacy.cfg'):
+        yield flatfiles.get(filename)['text']
+
+
+class Command(BaseCommand):
+
+    help = """warm_rst_cache
+
+    Render the experiment blurbs, playlist instructions and front pages that
+    are not already in the cache, and cache them, e.g. when deploying."""
+
+    def handle(self, *args, **options):
+
+        rendered = warm_rst_cache(get_rst_texts())
+
+        self.stdout.write('Rendered %d rst texts.' % rendered)
@@ -0,0 +1,75 @@
+'''
+Test the management commands of the front app.
+'''
+from __future__ import absolute_import
+
+#=============================================================================
+# Standard library imports.
+#=============================================================================
+from StringIO import StringIO
+
+#=============================================================================
+# Django imports.
+#=============================================================================
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+#=============================================================================
+# Wilhelm imports.
+#=============================================================================
+from apps.core.utils import docutils
+from apps.front.management.commands import warm_rst_cache
+
+#================================ End Imports ================================
+
+class WarmRstCache(TestCase):
+
+    cached_text = u'A *blurb* that is cached.'
+    missing_text = u'A *blurb* that is not.'
+
+    def setUp(self):
+
+        cache.clear()
+        docutils.clear_rst_cache()
+
+        self.rendered = []
+
+        def render_rst(text):
+            self.rendered.append(text)
+            return 'rendered'
+
+        self.render_rst = docutils.render_rst
+        docutils.render_rst = render_rst
+
+        self.get_rst_texts = warm_rst_cache.get_rst_texts
+        warm_rst_cache.get_rst_texts\
+            = lambda: iter([self.cached_text, self.missing_text])
+
+    def tearDown(self):
+
+        docutils.render_rst = self.render_rst
+        warm_rst_cache.get_rst_texts = self.get_rst_texts
+
+        cache.clear()
+        docutils.clear_rst_cache()
+
+    def test_warm_rst_cache(self):
+
+        '''
+        Are only the rst texts that are missing from the cache rendered, and
+        both then cached?
+        '''
+
+        cache.set(docutils.rst_key(self.cached_text), 'cached')
+
+        stdout = StringIO()
+        call_command('warm_rst_cache', stdout=stdout)
+
+        self.assertEqual(self.rendered, [self.missing_text])
+        self.assertIn('Rendered 1 rst texts.', stdout.getvalue())
+
+        self.assertEqual(cache.get(docutils.rst_key(self.cached_text)),
+                         'cached')
+        self.assertEqual(cache.get(docutils.rst_key(self.missing_text)),
+                         'rendered')
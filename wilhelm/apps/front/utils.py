@@ -1,5 +1,11 @@
 from __future__ import absolute_import
 
+#=============================================================================
+# Standard library imports
+#=============================================================================
+import os
+import threading
+
 #=============================================================================
 # Django imports
 #=============================================================================
@@ -18,6 +24,46 @@ from apps.core.utils.django import (user_does_not_exist,
                                     uid,
                                     reset_password)
 
+#=============================================================================
+# Other imports
+#=============================================================================
+import configobj
 
 #================================ End Imports ================================
 
+flatfiles_dir = os.path.join(settings.WILHELM_ROOT, 'apps/front/flatfiles')
+
+class FlatFiles(object):
+
+    '''
+    The parsed .cfg flat files of the front pages, e.g. welcome.cfg, kept in
+    the process and parsed again only when a file's modification time
+    changes.
+    '''
+
+    def __init__(self, directory=flatfiles_dir):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.flatfiles = {}
+
+    def get(self, filename):
+
+        ''' Return the ConfigObj of the flat file `filename`.'''
+
+        path = os.path.join(self.directory, filename)
+        mtime = os.stat(path).st_mtime
+
+        with self.lock:
+            cached = self.flatfiles.get(path)
+
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        flatfile = configobj.ConfigObj(path)
+
+        with self.lock:
+            self.flatfiles[path] = (mtime, flatfile)
+
+        return flatfile
+
+flatfiles = FlatFiles()
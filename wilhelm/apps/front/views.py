@@ -4,23 +4,13 @@ from __future__ import absolute_import
 # Standard library imports.
 #=============================================================================
 import logging
-import os
-
-#=============================================================================
-# Django imports.
-#=============================================================================
-from django.conf import settings
 
 #=============================================================================
 # Wilhelm imports
 #=============================================================================
 from apps.core.utils.docutils import rst2innerhtml
 from apps.core.utils.django import http_response
-
-#=============================================================================
-# Other imports
-#=============================================================================
-import configobj
+from apps.front.utils import flatfiles
 
 #================================ End Imports ================================
 
@@ -33,9 +23,7 @@ def welcome(request):
     The main landing page for the experiments website.
     '''
 
-    welcome_info\
-        = configobj.ConfigObj(os.path.join(settings.WILHELM_ROOT,
-                                           'apps/front/flatfiles/welcome.cfg'))
+    welcome_info = flatfiles.get('welcome.cfg')
 
     welcome_blurbs = []
     for welcome_blurb_key, welcome_blurb in welcome_info.iteritems():
@@ -57,9 +45,7 @@ def blurb(request, blurb_type):
                        takingpart='takingpart.cfg',
                        privacy='privacy.cfg')
 
-    _blurb = configobj.ConfigObj(os.path.join(settings.WILHELM_ROOT,
-                                              'apps/front/flatfiles',
-                                              blurb_types[blurb_type]))
+    _blurb = flatfiles.get(blurb_types[blurb_type])
 
     blurb = dict(title = _blurb['title'],
                  text = rst2innerhtml(_blurb['text']))
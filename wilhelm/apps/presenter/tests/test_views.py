@@ -10,6 +10,8 @@ from __future__ import absolute_import
 from random import choice
 import json
 import logging
+import shutil
+import tempfile
 
 #=============================================================================
 # Django imports.
@@ -28,6 +30,7 @@ from django.http import HttpRequest
 #=============================================================================
 from .. import models, views, conf
 from ..utils.slideviews import get_slide_to_be_launched_info
+from ..utils.slidelauncher import SlideLauncherFactory
 from apps.testing import conf as testing_conf
 from apps.testing import utils as testing_utils
 from apps.sessions import models as session_models
@@ -36,6 +39,8 @@ from apps.front.conf import login_url
 from apps.core.utils.django import (push_redirection_url_stack,
                                     http_redirect)
 from apps.presenter.conf import PLAY_EXPERIMENT_ROOT
+from apps.archives.catalog import catalog
+from apps.subjects.models import Subject
 
 #================================ End Imports ================================
 
@@ -461,6 +466,61 @@ class SlideLauncherSlideView(TestCase):
 
         self._test_slide_hangup(request, client)
 
+    def test_initial_playlist_slide_launcher_queries(self):
+        '''
+        Does choosing the launcher take the same, small, number of queries
+        however many sessions of other experiments the subject has done?
+        '''
+
+        experiment_name, request = self._make_request()
+        subject = Subject.objects.get(user = request.user)
+
+        # The catalog is only kept when the cache is shared by all processes,
+        # as a file based cache is.
+        cache_dir = tempfile.mkdtemp()
+
+        try:
+
+            with self.settings(CACHES={'default': {
+                    'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                    'LOCATION': cache_dir}}):
+
+                self._test_initial_playlist_slide_launcher_queries(
+                    experiment_name, request, subject
+                )
+
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def _test_initial_playlist_slide_launcher_queries(self,
+                                                      experiment_name,
+                                                      request,
+                                                      subject):
+
+        # The catalog is read once per process, not per launch.
+        catalog.get_playlist_metadata(experiment_name.capitalize())
+
+        # The subject, and the launcher state snapshot.
+        with self.assertNumQueries(3):
+            launcher = SlideLauncherFactory.new(request, experiment_name)
+
+        self.assertEqual(launcher.slideview_type,
+                         conf.slideview.InitialPlaylistSlideView)
+
+        for other_experiment_name in self.experiment_names:
+            if other_experiment_name != experiment_name:
+                session_models.ExperimentSession.new(
+                    subject,
+                    other_experiment_name.capitalize()
+                ).set_completed()
+
+        with self.assertNumQueries(3):
+            launcher = SlideLauncherFactory.new(request, experiment_name)
+
+        self.assertEqual(launcher.slideview_type,
+                         conf.slideview.InitialPlaylistSlideView)
+
     #=========================================================================
     # LivePlaylist SlideLauncher, SlideView, Hangup tests
     #=========================================================================
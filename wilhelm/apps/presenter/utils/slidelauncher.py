@@ -15,16 +15,17 @@ import os
 # Django imports.
 #=============================================================================
 from django.conf import settings
+from django.db.models import Q
 from django.template import Context, loader
 
 #=============================================================================
 # Wilhelm imports. 
 #=============================================================================
-from apps import archives, sessions
+from apps import sessions
 from . import viewutils
 from apps.presenter.models import LiveExperimentSession, SlideToBeLaunchedInfo
 from apps.presenter import conf
-from apps.archives import models as archives_models
+from apps.archives.catalog import catalog
 from apps.core.utils import strings, django
 from apps.core.utils.docutils import rst2innerhtml
 from apps.subjects.utils import (get_subject_from_request,
@@ -38,6 +39,93 @@ logger = logging.getLogger('wilhelm')
 ####### Slide launcher factory #######
 ######################################
 
+class LauncherState(object):
+
+    '''
+    A snapshot of the state of a subject's sessions that decides which
+    launcher they get for an experiment. It is read with two queries: one of
+    the subject's live sessions, together with the live session that the
+    browser session points to, if any, and one of the subject's live
+    experiment sessions, together with all their sessions of the experiment.
+    The integrity checks and the choice of launcher then all run on it.
+    '''
+
+    def __init__(self, subject, experiment, browser_session):
+
+        self.has_browser_key = browser_session.has_key(conf.live_experiment)
+        browser_live_session_pk = browser_session.get(conf.live_experiment)
+
+        live_sessions_query = Q(experiment_session__subject = subject,
+                                alive = True)
+
+        if self.has_browser_key:
+            live_sessions_query |= Q(pk = browser_live_session_pk)
+
+        live_sessions\
+            = list(LiveExperimentSession.objects
+                   .select_related(
+                       'experiment_session__experiment_version__experiment'
+                   )
+                   .filter(live_sessions_query))
+
+        # Those of the subject's, as got by get_live_sessions.
+        self.live_sessions\
+            = [live_session for live_session in live_sessions
+               if live_session.alive
+               and live_session.experiment_session_id is not None
+               and live_session.experiment_session.subject_id == subject.pk]
+
+        self.browser_live_sessions\
+            = [live_session for live_session in live_sessions
+               if self.has_browser_key
+               and live_session.pk == browser_live_session_pk]
+
+        ExperimentSession = sessions.models.ExperimentSession
+
+        experiment_sessions\
+            = list(ExperimentSession.objects
+                   .select_related('experiment_version')
+                   .filter(Q(status = ExperimentSession.status_live)
+                           | Q(experiment_version__experiment = experiment),
+                           subject = subject)
+                   .order_by('attempt', 'date_started'))
+
+        self.live_experiment_sessions\
+            = [experiment_session for experiment_session in experiment_sessions
+               if experiment_session.is_live]
+
+        # This experiment's sessions, in order of attempt.
+        self.experiment_sessions\
+            = [experiment_session for experiment_session in experiment_sessions
+               if experiment_session.experiment_version.experiment_id
+               == experiment.pk]
+
+    @property
+    def browser_live_session(self):
+        '''
+        The live session that the browser session points to, or None.
+        '''
+
+        if self.browser_live_sessions:
+            return self.browser_live_sessions[0]
+
+    @property
+    def latest_experiment_session(self):
+        '''
+        The current/most-recent experiment session attempt, or None.
+        '''
+
+        if self.experiment_sessions:
+            return self.experiment_sessions[-1]
+
+    @property
+    def completions(self):
+        ''' The number of times the experiment has been completed.'''
+
+        return sum([experiment_session.is_completed
+                    for experiment_session in self.experiment_sessions])
+
+
 class SlideLauncherFactory(object):
 
     @classmethod
@@ -59,15 +147,17 @@ class SlideLauncherFactory(object):
         self.request = request
         self.browser_session = request.session
         self.experiment_name = experiment_name
-        self.experiment = archives.models.Experiment.objects.get(
-            class_name = experiment_name.capitalize()
-        )
+        self.experiment = catalog.get_experiment(experiment_name.capitalize())
 
         assert not self.is_anonymous(), 'The user should not be anonymous'
         
         self.subject = get_subject_from_request(request)
         self.unlimited_attempts\
-            = has_unlimited_experiment_attempts(self.subject)
+            = has_unlimited_experiment_attempts(request)
+
+        self.state = LauncherState(self.subject,
+                                   self.experiment,
+                                   self.browser_session)
 
         self.live_session_state_check()
 
@@ -89,8 +179,7 @@ class SlideLauncherFactory(object):
 
         '''
 
-        live_sessions\
-            = LiveExperimentSession.objects.get_live_sessions(self.subject)
+        live_sessions = self.state.live_sessions
 
         assert len(live_sessions) <= 1, 'Live session not leq 1'
 
@@ -101,11 +190,8 @@ class SlideLauncherFactory(object):
 
         # If there is a browser session key pointing to a live experiment,
         # there should be one and only one.
-        if self.browser_session.has_key(conf.live_experiment):
-            browser_live_sessions\
-                = LiveExperimentSession.objects.filter(
-                    pk=self.browser_session[conf.live_experiment]
-                )
+        if self.state.has_browser_key:
+            browser_live_sessions = self.state.browser_live_sessions
 
             n_browser_live_sessions = len(browser_live_sessions)
             assert n_browser_live_sessions == 1,\
@@ -132,10 +218,7 @@ class SlideLauncherFactory(object):
                                              session per subject.  There are %d
                                              listed for subject %s. ''')
 
-        experiment_sessions = self.get_all_my_experiment_sessions() 
-        
-        len_live_sessions = sum([exp_session.is_live 
-                                 for exp_session in experiment_sessions])
+        len_live_sessions = len(self.state.live_experiment_sessions)
 
         # Make the error msg.
         live_sessions_ErrMsg\
@@ -153,15 +236,15 @@ class SlideLauncherFactory(object):
                                                  for subject %s, the statuses
                                                  are %s.''')
 
-        statuses = [session.status for session in
-                    self.get_my_this_experiment_sessions()]
+        my_this_sessions = self.state.experiment_sessions
+
+        statuses = [session.status for session in my_this_sessions]
 
         experiment_status_ErrMsg\
         = _experiment_status_ErrMsg % (self.experiment_name, self.subject,
                                        statuses)
 
         # All but last session is completed assertion.
-        my_this_sessions = list(self.get_my_this_experiment_sessions())
         if len(my_this_sessions) > 1:
             assert all(
                 [my_this_session.is_completed
@@ -189,11 +272,7 @@ class SlideLauncherFactory(object):
         browser session. Return None if there is no experiment currently live.
         '''
 
-        # FIXME. Will this raise an object not found exception is called when
-        # the browser session does not have the conf.live_experiment key?
-        return LiveExperimentSession.objects.get(
-            pk=self.browser_session[conf.live_experiment]
-            )
+        return self.state.browser_live_session
 
     def is_the_experiment_browser_live(self):
         '''
@@ -203,28 +282,14 @@ class SlideLauncherFactory(object):
 
         live_session = self.get_browser_live_experiment()
         return live_session.experiment_session\
-            .experiment_version.experiment == self.experiment
+            .experiment_version.experiment_id == self.experiment.pk
 
     def get_latest_experiment_session(self):
         '''
         Return the current/most-recent experiment session attempt.
         If no attempts have yet begun, None will be returned.
         '''
-        return sessions.models.ExperimentSession.objects\
-        .get_latest_experiment_session(self.experiment, self.subject)
-
-    def get_all_my_experiment_sessions(self):
-        '''Get all experiment sessions owned by subject.'''
-        return sessions.models.ExperimentSession.objects\
-            .get_all_my_experiment_sessions(self.subject)
-
-    def get_my_this_experiment_sessions(self):
-        '''
-        Get all experiment sessions for experiment `experiment_name` owned by
-        `subject`.
-        '''
-        return sessions.models.ExperimentSession.objects\
-            .get_my_this_experiment_sessions(self.experiment, self.subject)
+        return self.state.latest_experiment_session
 
     #######################################################################
     #######################################################################
@@ -248,7 +313,7 @@ class SlideLauncherFactory(object):
         If `subject` has any experiment live somewhere, then return True, else
         return False.
         '''
-        return LiveExperimentSession.objects.is_some_session_live(self.subject)
+        return len(self.state.live_sessions) > 0
 
     def session_live_launcher(self):
         '''
@@ -329,7 +394,7 @@ class SlideLauncherFactory(object):
 
         elif latest_experiment_session.is_completed:
 
-            completions = latest_experiment_session.get_my_completions()
+            completions = self.state.completions
 
             if (self.unlimited_attempts
                     or (completions < self.experiment.attempts)):
@@ -373,9 +438,8 @@ class SlideLauncher(object):
 
         self.template_data['short_uid'] = self.ping_uid_short
 
-        self.experiment = archives_models.Experiment.objects.get(
-            class_name = self.experiment_name.capitalize()
-        )
+        self.experiment\
+            = catalog.get_experiment(self.experiment_name.capitalize())
 
     @property
     def ping_uid_short(self):
@@ -468,7 +532,10 @@ class InitialPlaylistSlideLauncher(SlideLauncher):
 
         super(InitialPlaylistSlideLauncher, self).__init__(experiment_name)
 
-        instructions = self.experiment.current_version.playlist.instructions
+        instructions\
+            = catalog.get_playlist_metadata(
+                experiment_name.capitalize()
+            )['instructions']
         if instructions:
             rendered_instructions\
                 = [rst2innerhtml(instruction) for instruction in instructions]
@@ -17,7 +17,7 @@ from django.views.decorators.cache import never_cache, cache_control
 #=============================================================================
 # Wilhelm imports.
 #=============================================================================
-from apps.archives.models import Experiment
+from apps.archives.catalog import catalog
 from apps.core.utils import django
 from apps.core.utils.json import dumps as my_json_dumps
 
@@ -44,7 +44,7 @@ def experiment_exists_or_404(experiment_name):
     """
 
     try:
-        Experiment.objects.get(class_name = experiment_name.capitalize())
+        catalog.get_experiment(experiment_name.capitalize())
     except ObjectDoesNotExist:
         raise Http404
 
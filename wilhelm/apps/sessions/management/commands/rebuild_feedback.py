@@ -0,0 +1,42 @@
+from __future__ import absolute_import
+
+#=============================================================================
+# Django imports
+#=============================================================================
+from django.core.management.base import BaseCommand
+
+#=============================================================================
+# Wilhelm imports
+#=============================================================================
+from apps.sessions.conf import status_completed
+from apps.sessions.models import ExperimentSession
+
+#================================ End Imports ================================
+
+class Command(BaseCommand):
+
+    help = """rebuild_feedback [--experiment Brisbane]
+
+    Work out and store again the feedback of all completed sessions, e.g.
+    after the way feedback is worked out has changed."""
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--experiment',
+            dest='experiment',
+            default=None,
+            help='Only rebuild the feedback of this experiment, by class name.'
+            )
+
+    def handle(self, *args, **options):
+
+        experiment_sessions\
+            = ExperimentSession.objects.filter(status=status_completed)
+
+        if options['experiment']:
+            experiment_sessions = experiment_sessions.filter(
+                experiment_version__experiment__class_name=options['experiment']
+            )
+
+        for experiment_session in experiment_sessions.iterator():
+            experiment_session.store_feedback(overwrite=True)
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mysessions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExperimentSessionFeedback',
+            fields=[
+                ('experiment_session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stored_feedback', serialize=False, to='mysessions.ExperimentSession')),
+                ('feedback_json', models.TextField()),
+                ('date_stored', models.DateTimeField()),
+            ],
+        ),
+    ]
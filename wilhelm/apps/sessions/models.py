@@ -7,7 +7,9 @@ from __future__ import absolute_import
 # Standard library imports.
 #=============================================================================
 from collections import OrderedDict
+import hashlib
 import logging
+import operator
 
 #=============================================================================
 # Django imports.
@@ -15,18 +17,21 @@ import logging
 from django.core.exceptions import ObjectDoesNotExist
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, models
+from django.db.models import Case, Count, Max, Q, When
 from django.conf import settings
 
 #=============================================================================
 # Wilhelm imports.
 #=============================================================================
 from . import conf
-from apps.archives.models import (Experiment,
-                                  ExperimentVersion)
+from apps.archives.models import ExperimentVersion
+from apps.archives.catalog import catalog
 import apps.subjects.models as subjects_models
 from apps.core.utils import django, datetime
-from apps.dataexport.utils import safe_export_data
+from apps.dataexport.utils import (safe_export_data,
+                                   tojson_tagged,
+                                   fromjson_tagged)
 
 #================================ End Imports ================================
 
@@ -90,6 +95,34 @@ class ExperimentSessionManager(models.Manager):
         # TODO (Sun 09 Aug 2015 16:32:29 BST): Export a dict, not a value of a dict
         return export_dict['Sessions'] 
 
+    def data_fingerprint(self, experiment):
+
+        """
+        Return a cheap fingerprint of the data of all the sessions of
+        `experiment`.
+
+        This is a hash over the (uid, last_activity, status) of every session,
+        got with one query. Any change to the data of a session changes its
+        last activity or status, and so the fingerprint.
+
+        """
+
+        fingerprint = hashlib.sha256()
+
+        for uid, last_activity, status\
+            in self.get_experiment_sessions(experiment)\
+            .order_by('uid')\
+            .values_list('uid', 'last_activity', 'status')\
+            .iterator():
+
+            fingerprint.update(
+                '%s,%s,%s\n' % (uid,
+                                last_activity.isoformat() if last_activity else '',
+                                status)
+            )
+
+        return fingerprint.hexdigest()
+
     def get_all_experiment_version_sessions(self, experiment_version):
 
         """ 
@@ -113,6 +146,73 @@ class ExperimentSessionManager(models.Manager):
         if len(my_experiment_sessions):
             return my_experiment_sessions.last()
 
+    def get_my_experiment_summaries(self, subject, experiments=None):
+
+        '''
+        Summarize the sessions of `subject` per experiment, for all
+        experiments, or those in `experiments`, with two queries whatever
+        the number of experiments.
+
+        Returns:
+            A dictionary, keyed by experiment class name, of dictionaries with
+            the number of sessions, the number of completions, and the status,
+            i.e. 'live', 'paused' or 'completed', and start and completion
+            dates of the most recent attempt. Experiments that the subject
+            has not visited are not in it.
+
+        '''
+
+        sessions = self.filter(subject=subject)
+
+        if experiments is not None:
+            sessions\
+                = sessions.filter(experiment_version__experiment__in=experiments)
+
+        summaries = {}
+
+        for summary in sessions.values('experiment_version__experiment')\
+                .annotate(number_of_sessions = Count('uid'),
+                          number_of_completions
+                          = Count(Case(When(status=conf.status_completed,
+                                            then='uid'))),
+                          latest_attempt = Max('attempt')):
+
+            summaries[summary.pop('experiment_version__experiment')] = summary
+
+        if not summaries:
+            return summaries
+
+        # Django 1.9 has no Subquery, so the most recent attempts are got
+        # with a second query rather than annotated on the first.
+        latest_attempts = reduce(
+            operator.or_,
+            [Q(experiment_version__experiment=class_name,
+               attempt=summary['latest_attempt'])
+             for class_name, summary in summaries.items()]
+        )
+
+        statuses = {conf.status_live: 'live',
+                    conf.status_paused: 'paused',
+                    conf.status_completed: 'completed'}
+
+        # Ordered so that the last session of each experiment is its most
+        # recent attempt.
+        for class_name, status, date_started, date_completed\
+            in sessions.filter(latest_attempts)\
+            .order_by('attempt', 'date_started')\
+            .values_list('experiment_version__experiment',
+                         'status',
+                         'date_started',
+                         'date_completed'):
+
+            summaries[class_name].update(
+                most_recent_attempt_status = statuses.get(status),
+                date_started = date_started,
+                date_completed = date_completed
+            )
+
+        return summaries
+
     def get_my_completions(self, experiment, subject):
 
         ''' 
@@ -211,17 +311,18 @@ class ExperimentSession(models.Model):
 
         try:
 
-            experiment_version\
-                = ExperimentVersion.objects.get(label = experiment_label)
+            experiment_version = catalog.get_current_version(experiment_label)
 
         except ObjectDoesNotExist:
 
-            experiment = Experiment.objects.get(class_name = experiment_label)
-            experiment_version = experiment.current_version
+            experiment_version\
+                = ExperimentVersion.objects.get(label = experiment_label)
         
         playlist_session = experiment_version.playlist.new_session_model()
         
-        completions = cls.objects.get_my_completions(experiment, subject)
+        completions\
+            = cls.objects.get_my_completions(experiment_version.experiment_id,
+                                             subject)
 
         now = datetime.now()
 
@@ -291,9 +392,21 @@ class ExperimentSession(models.Model):
 
         self.status = self.status_completed
         self.date_completed = datetime.now()
-        self.playlist_session.set_completed()
+
+        playlist_session = self.playlist_session
+        playlist_session.set_completed()
         self.save()
 
+        # The same playlist session updates its playlist's summaries and
+        # makes the stored feedback, so its slide feedback is worked out once.
+        playlist_session.experiment_session_completed(self)
+
+        try:
+            self.store_feedback(playlist_session=playlist_session)
+        except DatabaseError as e:
+            # The feedback page stores it when it is first looked at.
+            logger.exception('Could not store the session feedback: %s.' % e)
+
     def iterate_playlist(self):
         return self.playlist_session.iterate()
 
@@ -361,7 +474,15 @@ class ExperimentSession(models.Model):
 
         return export_dict
 
-    def feedback(self):
+    def feedback(self, playlist_session=None):
+
+        '''
+        Return the feedback of this session. `playlist_session`, if given, is
+        its playlist session, e.g. one whose slide feedback is already worked
+        out.
+        '''
+
+        playlist_session = playlist_session or self.playlist_session
 
         summary = dict()
 
@@ -371,10 +492,35 @@ class ExperimentSession(models.Model):
         summary['status'] = self.status
 
         summary.update(self.subject.profile_export())
-        summary.update(self.playlist_session.feedback())
+        summary.update(playlist_session.feedback())
 
         return summary
 
+    def store_feedback(self, overwrite=False, playlist_session=None):
+
+        '''
+        Work out the feedback of this, completed, session and store it, unless
+        it is already stored and not to be overwritten. Return the feedback as
+        it will be read back from the store.
+        '''
+
+        return ExperimentSessionFeedback.store(
+            self, overwrite, playlist_session
+        ).feedback
+
+    def get_stored_feedback(self):
+
+        '''
+        Return the stored feedback of this, completed, session, storing it
+        first if that has not been done yet. The fallback never overwrites
+        feedback that is stored on the primary database.
+        '''
+
+        try:
+            return self.stored_feedback.feedback
+        except ObjectDoesNotExist:
+            return self.store_feedback()
+
     def live_session_data_export(self):
 
         from apps.presenter.models import LiveExperimentSession
@@ -423,3 +569,69 @@ class ExperimentSession(models.Model):
 
     class Meta:
         unique_together = (('subject', 'experiment_version', 'attempt'),)
+
+
+class ExperimentSessionFeedback(models.Model):
+
+    '''
+    The feedback of a completed experiment session, stored as json.
+
+    A completed session does not change, so its feedback is worked out once,
+    when it is completed, rather than every time the subject looks at it. If
+    the way feedback is worked out changes, the rebuild_feedback command
+    stores it all again.
+    '''
+
+    experiment_session = models.OneToOneField(ExperimentSession,
+                                              primary_key=True,
+                                              related_name='stored_feedback')
+
+    feedback_json = models.TextField()
+    date_stored = models.DateTimeField()
+
+    @classmethod
+    def store(cls, experiment_session, overwrite=False, playlist_session=None):
+
+        '''
+        Work out and store the feedback of `experiment_session`, unless it is
+        already stored on the primary database, in which case that is
+        returned. Only if `overwrite`, as in the rebuild_feedback command, is
+        stored feedback replaced. `playlist_session` is passed on to
+        ExperimentSession.feedback.
+
+        The stored feedback is never overwritten otherwise, as feedback that
+        is worked out on a read path, e.g. from a lagging read replica, may be
+        stale.
+        '''
+
+        session_feedbacks = cls.objects.using(DEFAULT_DB_ALIAS)
+
+        if not overwrite:
+            try:
+                return session_feedbacks.get(
+                    experiment_session=experiment_session
+                )
+            except cls.DoesNotExist:
+                pass
+
+        defaults = dict(
+            feedback_json=tojson_tagged(
+                experiment_session.feedback(playlist_session)
+            ),
+            date_stored=datetime.now()
+        )
+
+        if overwrite:
+            session_feedback, created = session_feedbacks.update_or_create(
+                experiment_session=experiment_session, defaults=defaults
+            )
+        else:
+            session_feedback, created = session_feedbacks.get_or_create(
+                experiment_session=experiment_session, defaults=defaults
+            )
+
+        return session_feedback
+
+    @property
+    def feedback(self):
+        return fromjson_tagged(self.feedback_json)
@@ -100,3 +100,122 @@ class ImportTest(TestCase):
         # Should have status 'status_initialized'.
         self.assertEqual(session.status,
                          models.ExperimentSession.status_initialized)
+
+    def test_stored_feedback(self):
+
+        '''
+        Is a session's feedback stored when it is completed, and read back
+        with its datetimes as datetimes?
+        '''
+
+        subject_name = choice(testing.mock_subjects.keys())
+        subject = subjects_models.Subject.objects.get(user__username =
+                                                      subject_name)
+
+        session = models.ExperimentSession.new(subject, 'Rusty')
+        session.set_completed()
+
+        self.assertTrue(
+            models.ExperimentSessionFeedback.objects.filter(
+                experiment_session=session
+            ).exists()
+        )
+
+        stored_feedback = session.get_stored_feedback()
+
+        self.assertEqual(stored_feedback['experiment_name'],
+                         session.feedback()['experiment_name'])
+
+        self.assertEqual(stored_feedback['start_date'], session.date_started)
+
+    def test_missing_stored_feedback(self):
+
+        '''
+        Is the feedback of a completed session that has none stored worked out
+        and stored when it is read, without overwriting stored feedback?
+        '''
+
+        subject_name = choice(testing.mock_subjects.keys())
+        subject = subjects_models.Subject.objects.get(user__username =
+                                                      subject_name)
+
+        session = models.ExperimentSession.new(subject, 'Rusty')
+        session.set_completed()
+
+        models.ExperimentSessionFeedback.objects.filter(
+            experiment_session=session
+        ).delete()
+
+        session = models.ExperimentSession.objects.get(uid=session.uid)
+        stored_feedback = session.get_stored_feedback()
+
+        self.assertEqual(stored_feedback['experiment_name'],
+                         session.feedback()['experiment_name'])
+
+        self.assertTrue(
+            models.ExperimentSessionFeedback.objects.filter(
+                experiment_session=session
+            ).exists()
+        )
+
+        models.ExperimentSessionFeedback.objects.filter(
+            experiment_session=session
+        ).update(feedback_json='{"experiment_name": "Stored"}')
+
+        self.assertEqual(session.store_feedback()['experiment_name'], 'Stored')
+
+        self.assertEqual(
+            session.store_feedback(overwrite=True)['experiment_name'],
+            session.feedback()['experiment_name']
+        )
+
+    def test_experiment_summaries(self):
+
+        '''
+        Are a subject's sessions summarized per experiment, with a constant
+        number of queries?
+        '''
+
+        subject_name = choice(testing.mock_subjects.keys())
+        subject = subjects_models.Subject.objects.get(user__username =
+                                                      subject_name)
+
+        first_session = models.ExperimentSession.new(subject, 'Rusty')
+        first_session.set_completed()
+
+        second_session = models.ExperimentSession.new(subject, 'Rusty')
+        second_session.status = models.ExperimentSession.status_paused
+        second_session.save()
+
+        for experiment_name in ('Yarks', 'Moers'):
+            models.ExperimentSession.new(subject, experiment_name)\
+                .set_completed()
+
+        with self.assertNumQueries(2):
+            summaries\
+                = models.ExperimentSession.objects.get_my_experiment_summaries(
+                    subject
+                )
+
+        self.assertEqual(sorted(summaries.keys()), ['Moers', 'Rusty', 'Yarks'])
+
+        rusty = summaries['Rusty']
+        self.assertEqual(rusty['number_of_sessions'], 2)
+        self.assertEqual(rusty['number_of_completions'], 1)
+        self.assertEqual(rusty['latest_attempt'], 1)
+        self.assertEqual(rusty['most_recent_attempt_status'], 'paused')
+        self.assertEqual(rusty['date_started'], second_session.date_started)
+        self.assertIsNone(rusty['date_completed'])
+
+        self.assertEqual(summaries['Yarks']['number_of_completions'], 1)
+        self.assertEqual(summaries['Yarks']['most_recent_attempt_status'],
+                         'completed')
+
+        # Only the experiments asked for, and none for no sessions.
+        summaries\
+            = models.ExperimentSession.objects.get_my_experiment_summaries(
+                subject,
+                experiments=['Rusty', 'Fribs']
+            )
+
+        self.assertEqual(summaries.keys(), ['Rusty'])
@@ -32,11 +32,10 @@ from apps.core.utils.django import (http_response,
 from apps.sessions.models import ExperimentSession
 from apps.sessions.conf import status_completed
 from apps.archives.models import Experiment
-from apps.archives.views import get_most_recent_attempt_status
+from apps.archives.views import get_experiment_context
 from apps.dataexport.utils import tojson
 from apps.core.utils.django import http_redirect
-from apps.subjects.utils import has_unlimited_experiment_attempts
-from apps.core.utils.docutils import rst2innerhtml
+from apps.core.routers import read_replica
 
 
 #================================ End Imports ================================
@@ -342,10 +341,15 @@ def experiment_feedback(request, experiment_name):
     If there is no feedback for that experiment, i.e., subject has not
     completed the experiment, then send them to a 'no feedback yet' page.
 
+    This reads from the primary database, not the read replica, as feedback
+    that is not stored yet is worked out and stored here, and a lagging
+    replica could miss the session that has just been completed.
+
     """
 
     completed_experiment_sessions\
-        = get_completed_experiment_sessions(request, experiment_name)
+        = get_completed_experiment_sessions(request, experiment_name)\
+        .select_related('stored_feedback')
 
     if len(completed_experiment_sessions) == 0:
 
@@ -355,7 +359,7 @@ def experiment_feedback(request, experiment_name):
 
     else:
         completed_sessions_feedback\
-            = [experiment_session.feedback() 
+            = [experiment_session.get_stored_feedback()
                for experiment_session in completed_experiment_sessions]
 
         context = dict(feedbacks=completed_sessions_feedback,
@@ -389,6 +393,7 @@ def experiment_feedback(request, experiment_name):
         return http_response(request, template, context)
 
 @login_required
+@read_replica()
 def feedback(request):
 
     '''
@@ -403,54 +408,18 @@ def feedback(request):
 
     subject = get_subject_from_request(request)
 
+    summaries = ExperimentSession.objects.get_my_experiment_summaries(subject)
 
-    # This will get a unique list of experiments that have been
-    # *completed* by the subject.
-    completed_experiments = []
-    for experiment_session in ExperimentSession.objects.filter(subject=subject,
-                                                               status=status_completed):
-           completed_experiments.append(experiment_session.experiment_version.experiment)
-
-    completed_experiments = set(completed_experiments)
-
-
-    experiments = []
-    for experiment in completed_experiments:
-
-        experiment_context = dict(
-            url = experiment.name,
-            name = experiment.class_name,
-            title = experiment.title,
-            blurb = rst2innerhtml(experiment.blurb),
-            single_attempt_only = experiment.single_attempt_only,
+    # The experiments that have been *completed* by the subject.
+    completed_experiments\
+        = Experiment.objects.filter(
+            class_name__in=[class_name
+                            for class_name, summary in summaries.items()
+                            if summary['number_of_completions'] > 0]
         )
 
-        experiment_sessions\
-            = ExperimentSession.objects.get_my_this_experiment_sessions(experiment,
-                                                                        subject)
-
-        completions = ExperimentSession.objects.get_my_completions(experiment,
-                                                                   subject)
-
-        experiment_context['number_of_completions'] = completions
-
-        if (has_unlimited_experiment_attempts(request)
-                or (completions < experiment.attempts)):
-
-            experiment_context['attempts_remaining'] = True
-            experiment_context['number_of_attempts_remaining']\
-                = experiment.attempts - completions
-        else:
-            experiment_context['attempts_remaining'] = False
-            experiment_context['number_of_attempts_remaining'] = 0
-
-        (experiment_context['most_recent_attempt_status'],
-        experiment_context['date_started'],
-        experiment_context['date_completed'])\
-            = get_most_recent_attempt_status(experiment_sessions)
-
-
-        experiments.append(experiment_context)
+    experiments = [get_experiment_context(request, experiment, summaries)
+                   for experiment in completed_experiments]
 
     context = dict(experiments = experiments)
 
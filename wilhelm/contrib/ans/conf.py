@@ -14,3 +14,11 @@ data_export = Bunch(
 # number of the relevant items at a fixed number.
 
 recall_f1_score_number_of_relevant_items = 10.0
+
+# How many random dot displays' client side payloads are cached per process.
+random_dot_display_cache_size = 2048
+
+# The edges of the bins of the ratio of the larger to the smaller number of
+# circles, for psychometric curves and Weber fraction fits. Ratios beyond the
+# edges go in the first or last bin.
+psychometric_ratio_bins = (1.0, 1.1, 1.2, 1.33, 1.5, 1.75, 2.0, 2.5, 3.0, 4.0)
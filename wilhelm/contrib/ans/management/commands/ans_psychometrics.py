@@ -0,0 +1,54 @@
+from __future__ import absolute_import
+
+#=============================================================================
+# Standard library imports
+#=============================================================================
+import json
+
+#=============================================================================
+# Django imports
+#=============================================================================
+from django.core.management.base import BaseCommand
+
+#=============================================================================
+# Wilhelm imports
+#=============================================================================
+from apps.core.routers import read_replica
+from contrib.ans import psychometrics
+from contrib.ans.models import ANSPlaylist
+
+#================================ End Imports ================================
+
+class Command(BaseCommand):
+
+    help = """ans_psychometrics [--save]
+
+    Print the psychometric summary, i.e. accuracies, psychometric curve and
+    Weber fractions, of everyone's ANS trials in each ANS playlist. With
+    --save, save them as the playlists' norms, along with the aggregate
+    scores, as aggregate_ans_scores does."""
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--save',
+            dest='save',
+            action='store_true',
+            default=False,
+            help='Save the summaries as the norms shown on feedback pages.'
+            )
+
+    def handle(self, *args, **options):
+
+        for playlist in ANSPlaylist.objects.all():
+
+            if options['save']:
+                playlist.save_aggregate_scores()
+                summary = playlist.norms
+            else:
+                with read_replica():
+                    trials = playlist.get_trials()
+                summary = None if trials is None\
+                    else psychometrics.summarize(trials)
+
+            self.stdout.write(json.dumps(dict(playlist=playlist.uid,
+                                              summary=summary)))
@@ -0,0 +1,45 @@
+from __future__ import absolute_import
+
+#=============================================================================
+# Django imports
+#=============================================================================
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+#=============================================================================
+# Wilhelm imports
+#=============================================================================
+from contrib.ans.models import RandomDotDisplay
+from contrib.ans.randomdots import read_displays
+
+#================================ End Imports ================================
+
+class Command(BaseCommand):
+
+    help = """import_random_dot_displays [--batch-size 500] path [path ...]"""
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('paths',
+            nargs='+',
+            help='Json or json lines files of displays, or directories of them.'
+            )
+
+        parser.add_argument('--batch-size',
+            dest='batch_size',
+            type=int,
+            default=500,
+            help='How many displays to insert with each query.'
+            )
+
+    def handle(self, *args, **options):
+
+        for path in options['paths']:
+
+            with transaction.atomic():
+                created, skipped\
+                    = RandomDotDisplay.bulk_new(read_displays(path),
+                                                batch_size=options['batch_size'])
+
+            self.stdout.write('%s: %d displays created, %d already existed.'
+                              % (path, created, skipped))
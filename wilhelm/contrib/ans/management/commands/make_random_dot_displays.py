@@ -0,0 +1,116 @@
+from __future__ import absolute_import
+
+#=============================================================================
+# Standard library imports
+#=============================================================================
+import json
+
+#=============================================================================
+# Django imports
+#=============================================================================
+from django.core.management.base import BaseCommand
+
+#=============================================================================
+# Wilhelm imports
+#=============================================================================
+from contrib.ans.randomdots import make_displays
+
+#================================ End Imports ================================
+
+class Command(BaseCommand):
+
+    help = """make_random_dot_displays --numbers 10 20 [--per-number 10] [--density 0.4] [--convex-hull-proportion 0.6] [--tolerance 0.02] [--radius-range 0.05 0.15] [--processes N] [--seed 1] output.jsonl"""
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('output',
+            help='The json lines file to write the displays to, for import'
+                 ' with import_random_dot_displays.'
+            )
+
+        parser.add_argument('--numbers',
+            dest='numbers',
+            type=int,
+            nargs='+',
+            required=True,
+            help='The numbers of circles in the displays.'
+            )
+
+        parser.add_argument('--per-number',
+            dest='per_number',
+            type=int,
+            default=10,
+            help='How many displays to make of each number of circles.'
+            )
+
+        parser.add_argument('--density',
+            dest='density',
+            type=float,
+            default=None,
+            help='The target proportion of the display covered by circles.'
+            )
+
+        parser.add_argument('--convex-hull-proportion',
+            dest='convex_hull_proportion',
+            type=float,
+            default=None,
+            help='The target proportion of the display covered by the convex'
+                 ' hull of the circles.'
+            )
+
+        parser.add_argument('--tolerance',
+            dest='tolerance',
+            type=float,
+            default=0.02,
+            help='How far from the targets a display may be.'
+            )
+
+        parser.add_argument('--radius-range',
+            dest='radius_range',
+            type=float,
+            nargs=2,
+            default=[0.05, 0.15],
+            help='The smallest and largest circle radius.'
+            )
+
+        parser.add_argument('--processes',
+            dest='processes',
+            type=int,
+            default=None,
+            help='Number of processes that make displays.'
+            )
+
+        parser.add_argument('--seed',
+            dest='seed',
+            type=int,
+            default=1,
+            help='The seed from which the first display is searched for.'
+            )
+
+    def handle(self, *args, **options):
+
+        # Each display searches for its seed in its own range of seeds.
+        seed_spacing = 10**6
+
+        specifications = []
+        for number_of_circles in options['numbers']:
+            for _ in xrange(options['per_number']):
+
+                specifications.append(
+                    dict(number_of_circles = number_of_circles,
+                         radius_range = options['radius_range'],
+                         density = options['density'],
+                         convex_hull_proportion = options['convex_hull_proportion'],
+                         tolerance = options['tolerance'],
+                         first_seed = options['seed']
+                         + len(specifications) * seed_spacing)
+                )
+
+        displays = make_displays(specifications, options['processes'])
+
+        with open(options['output'], 'w') as f:
+            for display in displays:
+                f.write(json.dumps(display) + '\n')
+
+        self.stdout.write('Wrote %d displays to %s.'
+                          % (len(displays), options['output']))
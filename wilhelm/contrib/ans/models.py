@@ -4,6 +4,7 @@ from __future__ import absolute_import
 # Standard library imports
 #=============================================================================
 from collections import OrderedDict
+import base64
 import json
 import logging
 
@@ -11,7 +12,6 @@ import logging
 # Third party
 #=============================================================================
 import numpy as np
-from scipy import stats
 from jsonfield import JSONField
 
 #=============================================================================
@@ -29,9 +29,15 @@ from contrib.base.models import (Widget,
                                  SessionSlide,
                                  Playlist,
                                  SessionPlaylist,
-                                 SessionSlideAndPlaylistJoinModel)
+                                 SessionSlideAndPlaylistJoinModel,
+                                 SessionWidgetAndSlideJoinModel)
 
+from . import conf, psychometrics
+from .randomdots import display_keys
+from apps.core.routers import read_replica
 from apps.core.utils import numerical, datetime, django
+from apps.core.utils.collections import LRUCache
+from apps.core.utils.percentiles import score_distributions
 from apps.sessions.models import ExperimentSession
 from apps.archives.models import Experiment
 from apps.subjects.models import Subject
@@ -40,9 +46,26 @@ from apps.subjects.models import Subject
 logger = logging.getLogger('wilhelm')
 
 
-def percentileofscore(allscores, score):
-    percentile = stats.percentileofscore(allscores, score)
-    return int(percentile.round())
+def encode_circles(circles):
+
+    '''
+    Pack the (x, y, radius) of each circle as little endian float32s and
+    return them base64 encoded. The client decodes them in ANSWidget.js.
+
+    '''
+
+    return base64.b64encode(np.asarray(circles, dtype='<f4').tobytes())
+
+def decode_circles(encoded_circles):
+
+    ''' The inverse, up to float32 precision, of encode_circles.'''
+
+    return np.frombuffer(base64.b64decode(encoded_circles),
+                         dtype='<f4').reshape(-1, 3).tolist()
+
+# Displays never change once made, so their client side payloads are cached
+# for the life of the process.
+display_payload_cache = LRUCache(conf.random_dot_display_cache_size)
 
 class RandomDotDisplay(models.Model):
 
@@ -86,6 +109,60 @@ class RandomDotDisplay(models.Model):
             
         return random_dot_display
 
+    @classmethod
+    def bulk_new(cls, stimuli, batch_size=500):
+
+        '''
+        Create displays from the `stimuli`, an iterable of dictionaries like
+        those `new` takes, in batches of `batch_size` with one query to find
+        which uids already exist and one bulk insert for the rest. Displays
+        never change, so those whose uid exists are skipped.
+
+        Return the numbers of displays created and skipped.
+
+        '''
+
+        created = skipped = 0
+
+        batch = []
+        for stimulus in stimuli:
+
+            assert len(stimulus['circles']) == stimulus['number_of_circles'],\
+                'Len of "circles" != number_of_circles in %s' % stimulus['uid']
+
+            batch.append(stimulus)
+
+            if len(batch) == batch_size:
+                n_created, n_skipped = cls._bulk_create(batch)
+                created += n_created
+                skipped += n_skipped
+                batch = []
+
+        if batch:
+            n_created, n_skipped = cls._bulk_create(batch)
+            created += n_created
+            skipped += n_skipped
+
+        return created, skipped
+
+    @classmethod
+    def _bulk_create(cls, stimuli):
+
+        existing_uids = set(
+            cls.objects.filter(uid__in=[stimulus['uid'] for stimulus in stimuli])
+            .values_list('uid', flat=True)
+        )
+
+        new_displays = OrderedDict()
+        for stimulus in stimuli:
+            if stimulus['uid'] not in existing_uids:
+                new_displays[stimulus['uid']]\
+                    = cls(**{key: stimulus[key] for key in display_keys})
+
+        cls.objects.bulk_create(new_displays.values())
+
+        return len(new_displays), len(stimuli) - len(new_displays)
+
     @property
     def stimulus(self):
 
@@ -109,6 +186,62 @@ class RandomDotDisplay(models.Model):
 
         return _stimulus
 
+    @property
+    def payload(self):
+
+        '''
+        Return what the client needs to draw the display, with the circles
+        packed by encode_circles.
+
+        '''
+
+        return dict(uid = self.uid,
+                    number_of_circles = self.number_of_circles,
+                    circles = encode_circles(self.circles))
+
+    @classmethod
+    def get_payloads(cls, uids):
+
+        '''
+        Return a dictionary of the payloads of the displays `uids`. Those that
+        are not cached are read with a single query.
+
+        Raise ObjectDoesNotExist if any display does not exist.
+
+        '''
+
+        payloads = {}
+        for uid in set(uids):
+            payload = display_payload_cache.get(uid)
+            if payload is not None:
+                payloads[uid] = payload
+
+        missing_uids = set(uids).difference(payloads)
+
+        if missing_uids:
+
+            for uid, random_dot_display\
+                    in cls.objects.in_bulk(list(missing_uids)).items():
+
+                payloads[uid] = random_dot_display.payload
+                display_payload_cache.set(uid, payloads[uid])
+
+            if len(payloads) < len(set(uids)):
+                raise ObjectDoesNotExist(
+                    'No random dot displays %s'
+                    % ', '.join(sorted(set(uids).difference(payloads)))
+                )
+
+        return payloads
+
+    @classmethod
+    def get_numbers_of_circles(cls, uids):
+
+        ''' Return a dictionary of the number of circles of each of `uids`.'''
+
+        return dict(cls.objects.filter(uid__in=list(set(uids)))
+                    .values_list('uid', 'number_of_circles'))
+
 
 class ANSWidget(Widget):
 
@@ -149,13 +282,18 @@ class ANSWidget(Widget):
             scale_factor,
             separation):
 
-        for stimulus_pair in stimuli:
+        uids = set(uid for stimulus_pair in stimuli for uid in stimulus_pair)
 
-            left_display, right_display = stimulus_pair
+        # Raise an exception if any are missing.
+        missing_uids = uids.difference(
+            RandomDotDisplay.objects.filter(uid__in=list(uids))
+            .values_list('uid', flat=True)
+        )
 
-            # Raise exceptions if either one is missing
-            RandomDotDisplay.objects.get(uid = left_display)
-            RandomDotDisplay.objects.get(uid = right_display)
+        if missing_uids:
+            raise ObjectDoesNotExist(
+                'No random dot displays %s' % ', '.join(sorted(missing_uids))
+            )
 
         assert len(stimuli) >= number_of_trials
 
@@ -232,15 +370,19 @@ class SessionANSWidget(SessionWidget):
 
     def get_session_widget_data(self):
 
-        _session_stimuli = []
-        for left_uid, right_uid in self.session_stimuli_list:
+        '''
+        Return the displays, each just once, and the (left, right) display
+        uids of each trial.
 
-            _session_stimuli.append(
-                dict(left = RandomDotDisplay.objects.get(uid = left_uid).stimulus,
-                     right = RandomDotDisplay.objects.get(uid = right_uid).stimulus)
-            )
+        '''
 
-        return _session_stimuli
+        return dict(
+            displays = RandomDotDisplay.get_payloads(
+                [uid for stimulus_pair in self.session_stimuli_list
+                 for uid in stimulus_pair]
+            ),
+            trials = self.session_stimuli_list
+        )
 
     def get(self):
         logger.debug('Getting ANS test data.')
@@ -259,8 +401,8 @@ class SessionANSWidget(SessionWidget):
             try:
                 assert choice in (stimulus_left, stimulus_right), 'The chosen uid is not in the set of candidate uids'
 
-                left_size = RandomDotDisplay.objects.get(uid = stimulus_left).number_of_circles
-                right_size = RandomDotDisplay.objects.get(uid = stimulus_right).number_of_circles
+                left_size = numbers_of_circles[stimulus_left]
+                right_size = numbers_of_circles[stimulus_right]
 
                 if left_size > right_size:
                     correct_response = stimulus_left
@@ -272,7 +414,7 @@ class SessionANSWidget(SessionWidget):
                 else:
                     accuracy = False
 
-            except (AssertionError, ObjectDoesNotExist) as e:
+            except (AssertionError, KeyError) as e:
 
                 logger.exception(e)
 
@@ -287,6 +429,12 @@ class SessionANSWidget(SessionWidget):
 
             logger.debug('Processing data: %s' % repr(responses))
 
+            # The sizes of all the displays in the responses, in one query.
+            numbers_of_circles = RandomDotDisplay.get_numbers_of_circles(
+                [datum.get(key) for datum in responses
+                 for key in ('stimulus_left', 'stimulus_right')]
+            )
+
             response_data = []
 
             for datum in responses:
@@ -351,23 +499,69 @@ class SessionANSWidget(SessionWidget):
 
     def feedback(self):
 
-        mean = lambda x: sum(x)/float(len(x))
-
         if self.response_data:
 
             number_of_trials = len(self.response_data)
 
-            all_accuracy = [datum['accuracy'] for datum in self.response_data
-                            if datum['accuracy'] != None]
+            trials = psychometrics.Trials.from_response_data(
+                [(None, self.uid, self.response_data)]
+            )
 
-            number_of_hits = len(all_accuracy)
+            number_of_hits = int(trials.responded.sum())
 
-            return number_of_trials, number_of_hits, mean(all_accuracy)
+            accuracy = psychometrics.tolist(
+                psychometrics.test_accuracies(trials)
+            )[0]
+
+            return number_of_trials, number_of_hits, accuracy
 
         else:
 
             return None, None, None
 
+def get_trials(experiment_sessions):
+
+    '''
+    Return the trials of all the ANS tests in `experiment_sessions`, a
+    QuerySet of ExperimentSessions, as psychometrics.Trials.
+
+    The tests are found from the sessions through the slide and widget join
+    tables, with subqueries, so that this is one query for each join table
+    and one for the tests' response data, however many sessions there are.
+    '''
+
+    session_playlists = experiment_sessions.values('playlist_session_uid')
+
+    slide_joins = SessionSlideAndPlaylistJoinModel.objects.filter(
+        container_uid__in = session_playlists
+    )
+
+    widget_joins = SessionWidgetAndSlideJoinModel.objects.filter(
+        container_uid__in = slide_joins.values('element_uid')
+    )
+
+    playlist_subjects\
+        = dict(experiment_sessions.values_list('playlist_session_uid',
+                                               'subject_id'))
+
+    slide_playlists\
+        = dict(slide_joins.values_list('element_uid', 'container_uid'))
+
+    widget_slides\
+        = dict(widget_joins.values_list('element_uid', 'container_uid'))
+
+    tests = SessionANSWidget.objects.filter(
+        uid__in = widget_joins.values('element_uid'),
+        response_data__isnull = False
+    ).values_list('uid', 'response_data')
+
+    return psychometrics.Trials.from_response_data(
+        (playlist_subjects[slide_playlists[widget_slides[uid]]],
+         uid,
+         response_data)
+        for uid, response_data in tests.iterator()
+    )
+
 
 class ANSSlide(Slide):
 
@@ -442,17 +636,7 @@ class ANSPlaylist(Playlist):
 
         """
 
-        condition = lambda experiment: experiment.current_version.playlist.uid == self.uid
-        parent_experiments = filter(condition, Experiment.objects.all())
-
-        if parent_experiments == []:
-            return None
-        else:
-            error_msg = "This playlist object should have exactly one, not %d, Experiments object as a parent."
-            number_of_parents = len(parent_experiments)
-            assert number_of_parents == 1, error_msg % number_of_parents
-
-            return parent_experiments.pop()
+        return Experiment.objects.get_playlist_parent(self)
 
     def get_experiment_session_parents(self):
 
@@ -510,29 +694,43 @@ class ANSPlaylist(Playlist):
     # #####################################################################
     # #####################################################################
 
-    def get_aggregate_scores(self):
+    def get_trials(self):
+
+        '''
+        Return the trials of all real subjects' sessions of the Experiment of
+        this playlist, as psychometrics.Trials, or None if there is no such
+        Experiment.
+        '''
 
         experiment_sessions = self.get_real_experiment_session_parents()
 
-        approx_number_of_experiment_sessions = len(experiment_sessions)
+        if experiment_sessions is None:
+            return None
 
-        all_accuracy = []
-        for experiment_session in experiment_sessions:
+        return get_trials(experiment_sessions)
 
-            playlist_session = experiment_session.playlist_session
+    def get_aggregate_scores(self, trials=None):
 
-            all_slides_feedback = []
-            for element in playlist_session.filter_SlideAndPlaylistJoinModel:
-                try:
-                    all_slides_feedback.append(element.session_slide.feedback())
-                except ObjectDoesNotExist as e:
-                    logger.exception('Trouble getting element.session_slide.feedback: %s.' % e)
+        """Return the number of sessions and the accuracy of each test.
+
+        Returns:
+            A tuple of (int, list).
+            The int is the number of subjects' sessions of the Experiment.
+            The list is the accuracy of each ANS test done in them.
 
-            for slide_feedback in all_slides_feedback:
-                 number_of_trials, number_of_hits, accuracy\
-                     = slide_feedback['ANSWidget'] 
+        """
+
+        experiment_sessions = self.get_real_experiment_session_parents()
 
-                 all_accuracy.append(accuracy)
+        approx_number_of_experiment_sessions = experiment_sessions.count()
+
+        if trials is None:
+            trials = get_trials(experiment_sessions)
+
+        all_accuracy = [accuracy
+                        for accuracy in psychometrics.tolist(
+                            psychometrics.test_accuracies(trials))
+                        if accuracy is not None]
 
         return approx_number_of_experiment_sessions, all_accuracy
 
@@ -541,14 +739,42 @@ class ANSPlaylist(Playlist):
         """Save aggregate scores.
 
         If there are aggregate scores, save them as the value of the misc
-        attribute.
+        attribute, along with the psychometric summary of the same trials,
+        i.e. the norms.
 
         """
 
-        approx_number_of_experiment_sessions, all_accuracy = self.get_aggregate_scores()
-        self.misc = (approx_number_of_experiment_sessions, all_accuracy)
+        with read_replica():
+
+            trials = self.get_trials()
+
+            if trials is None:
+                return
+
+            approx_number_of_experiment_sessions, all_accuracy\
+                = self.get_aggregate_scores(trials)
+
+        self.misc = (approx_number_of_experiment_sessions,
+                     all_accuracy,
+                     psychometrics.summarize(trials))
         self.save()
 
+    @property
+    def norms(self):
+
+        """Return the psychometric summary of everyone's responses.
+
+        This is saved in misc, after the aggregate scores, by
+        save_aggregate_scores; see psychometrics.summarize. It is None if the
+        aggregate scores have not been saved since it was added.
+
+        """
+
+        try:
+            return self.misc[2]
+        except (TypeError, IndexError):
+            return None
+
 def process_feedback(slide_feedback):
 
     for each_slide_feedback in slide_feedback:
@@ -589,13 +815,35 @@ class SessionANSPlaylist(SessionPlaylist):
 
             feedback = super(SessionANSPlaylist, self).feedback()
 
+            playlist = self.playlist
+
             try:
                 approx_number_of_sessions, all_accuracy\
-                    = self.playlist.misc
+                    = playlist.misc[:2]
             except Exception as e:
                 logger.exception('Trouble getting aggregation scores: %s.' % e)
                 approx_number_of_sessions, all_accuracy = None, None
 
+            try:
+                tests = SessionANSWidget.objects.filter(
+                    uid__in = SessionWidgetAndSlideJoinModel.objects.filter(
+                        container_uid__in = self.filter_SlideAndPlaylistJoinModel\
+                        .values('element_uid')
+                    ).values('element_uid')
+                ).values_list('uid', 'response_data')
+
+                trials = psychometrics.Trials.from_response_data(
+                    (None, uid, response_data) for uid, response_data in tests
+                )
+
+                feedback['weber_fraction'] = psychometrics.weber_fraction(trials)
+                feedback['population_weber_fraction']\
+                    = (playlist.norms or {}).get('weber_fraction')
+            except Exception as e:
+                logger.exception('Could not calculate Weber fractions: %s.' % e)
+                feedback['weber_fraction'] = None
+                feedback['population_weber_fraction'] = None
+
             if len(feedback['Slides']) > 0:
 
                 overall_accuracy = []
@@ -613,8 +861,11 @@ class SessionANSPlaylist(SessionPlaylist):
                             percentile = None
                         else:
                             overall_accuracy.append(accuracy)
-                            percentile = percentileofscore(all_accuracy,
-                                                           accuracy)
+                            percentile = score_distributions.percentile(
+                                (self.playlist_uid, 'accuracy'),
+                                all_accuracy,
+                                accuracy
+                            )
 
                     except Exception as e:
 
@@ -634,7 +885,11 @@ class SessionANSPlaylist(SessionPlaylist):
 
             try:
                 feedback['overall_accuracy_percentile']\
-                    = percentileofscore(all_accuracy, np.mean(overall_accuracy))
+                    = score_distributions.percentile(
+                        (self.playlist_uid, 'accuracy'),
+                        all_accuracy,
+                        np.mean(overall_accuracy)
+                    )
 
             except Exception as e:
                 logger.exception('Could not calculate overall percentile: %s.' % e)
@@ -0,0 +1,289 @@
+'''
+Psychometric summaries of ANS (approximate number system) test responses.
+
+The trials of many sessions are put into NumPy arrays, one element per
+trial, in one pass over the sessions' response data. Everything else, i.e.
+accuracies per test and per subject, psychometric curves over the ratio of
+the larger to the smaller number of circles, and Weber fractions, is then
+worked out over whole arrays at once.
+
+The Weber fraction w is that of the standard model of numerical
+discrimination, in which the probability of choosing the larger of n1 and n2
+circles is
+
+    Phi((n1 - n2) / (w * sqrt(n1**2 + n2**2)))
+
+with Phi the standard normal cumulative distribution function. With
+x = (r - 1) / sqrt(r**2 + 1), r being the ratio n1/n2, the probit of that
+probability is x / w, so 1/w is found by least squares through the origin of
+the probits of the observed accuracies on x, binned by ratio.
+'''
+
+from __future__ import absolute_import, division
+
+#=============================================================================
+# Third party
+#=============================================================================
+import numpy as np
+from scipy.special import ndtri
+
+#=============================================================================
+# Wilhelm imports
+#=============================================================================
+from . import conf
+
+#================================ End Imports ================================
+
+class Trials(object):
+
+    '''
+    ANS trials as arrays, one element per trial:
+
+    subject: the index of the subject, into `subject_ids`.
+    test: the index of the test, i.e. session widget, into `test_ids`.
+    left, right: the numbers of circles on the left and on the right.
+    chose_left: whether the left display was chosen.
+    accuracy: 1.0 or 0.0 if the larger display was chosen or not, nan if
+        there was no response.
+    latency: the response latency, nan if there was no response.
+
+    '''
+
+    def __init__(self, subject_ids, test_ids, subject, test, left, right,
+                 chose_left, accuracy, latency):
+
+        self.subject_ids = subject_ids
+        self.test_ids = test_ids
+        self.subject = subject
+        self.test = test
+        self.left = left
+        self.right = right
+        self.chose_left = chose_left
+        self.accuracy = accuracy
+        self.latency = latency
+
+    @classmethod
+    def from_response_data(cls, tests):
+
+        '''
+        Make the arrays from `tests`, an iterable of (subject id, test id,
+        response data) tuples, the response data being that saved by
+        SessionANSWidget.post.
+
+        '''
+
+        subject_index = {}
+        test_ids = []
+
+        columns = ([], [], [], [], [], [], [])
+        subject, test, left, right, chose_left, accuracy, latency = columns
+
+        for subject_id, test_id, response_data in tests:
+
+            i = subject_index.setdefault(subject_id, len(subject_index))
+            j = len(test_ids)
+            test_ids.append(test_id)
+
+            for datum in response_data or []:
+
+                # Trials whose displays could not be found have no sizes.
+                if not datum\
+                        or datum.get('stimulus_left_number_of_circles') is None:
+                    continue
+
+                subject.append(i)
+                test.append(j)
+                left.append(datum['stimulus_left_number_of_circles'])
+                right.append(datum['stimulus_right_number_of_circles'])
+                chose_left.append(datum.get('choice') == datum['stimulus_left'])
+                accuracy.append(datum.get('accuracy'))
+                latency.append(datum.get('latency'))
+
+        subject_ids = sorted(subject_index, key=subject_index.get)
+
+        # None, for a missed trial, becomes nan.
+        return cls(subject_ids,
+                   test_ids,
+                   np.array(subject, dtype=int),
+                   np.array(test, dtype=int),
+                   np.array(left, dtype=float),
+                   np.array(right, dtype=float),
+                   np.array(chose_left, dtype=bool),
+                   np.array(accuracy, dtype=float),
+                   np.array(latency, dtype=float))
+
+    def __len__(self):
+        return len(self.accuracy)
+
+    @property
+    def responded(self):
+        return ~np.isnan(self.accuracy)
+
+    @property
+    def ratio(self):
+        ''' The ratio of the larger to the smaller number of circles.'''
+        return np.maximum(self.left, self.right)\
+            / np.minimum(self.left, self.right)
+
+
+def group_means(groups, values, number_of_groups):
+
+    '''
+    Return the mean, ignoring nans, of `values` in each of the groups, and
+    the number of values that are not nan in each, as arrays indexed by group.
+    Groups without any are nan.
+
+    '''
+
+    valid = ~np.isnan(values)
+
+    counts = np.bincount(groups[valid], minlength=number_of_groups)
+    sums = np.bincount(groups[valid],
+                       weights=values[valid],
+                       minlength=number_of_groups)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts, counts
+
+def test_accuracies(trials):
+
+    ''' Return the accuracy of each test, as an array indexed by test.'''
+
+    return group_means(trials.test, trials.accuracy, len(trials.test_ids))[0]
+
+def subject_accuracies(trials):
+
+    ''' Return the accuracy of each subject, as an array indexed by subject.'''
+
+    return group_means(trials.subject,
+                       trials.accuracy,
+                       len(trials.subject_ids))[0]
+
+def ratio_bins(trials, bin_edges=conf.psychometric_ratio_bins):
+
+    '''
+    Return the index of the ratio bin of each trial. Ratios outside the edges
+    go in the first or last bin.
+
+    '''
+
+    return np.digitize(trials.ratio, bin_edges[1:-1])
+
+def psychometric_curve(trials, bin_edges=conf.psychometric_ratio_bins):
+
+    '''
+    Return the mean ratio, accuracy, mean latency and number of responses in
+    each ratio bin, as arrays.
+
+    '''
+
+    bins = ratio_bins(trials, bin_edges)
+    number_of_bins = len(bin_edges) - 1
+
+    responded = trials.responded
+
+    ratio, _ = group_means(bins[responded],
+                           trials.ratio[responded],
+                           number_of_bins)
+
+    accuracy, counts = group_means(bins, trials.accuracy, number_of_bins)
+    latency, _ = group_means(bins, trials.latency, number_of_bins)
+
+    return ratio, accuracy, latency, counts
+
+def weber_fractions(groups,
+                    number_of_groups,
+                    trials,
+                    bin_edges=conf.psychometric_ratio_bins):
+
+    '''
+    Fit a Weber fraction to the trials of each of the groups, e.g. subjects,
+    all at once, and return them as an array indexed by group.
+
+    Each group's accuracies are binned by ratio, and the probits of the
+    binned accuracies are regressed on x = (r - 1) / sqrt(r**2 + 1) through
+    the origin, weighted by the number of responses in each bin. Groups
+    whose responses are no better than chance have no Weber fraction, i.e.
+    nan.
+
+    '''
+
+    number_of_bins = len(bin_edges) - 1
+    cells = groups * number_of_bins + ratio_bins(trials, bin_edges)
+    number_of_cells = number_of_groups * number_of_bins
+
+    responded = trials.responded
+
+    ratio, _ = group_means(cells[responded],
+                           trials.ratio[responded],
+                           number_of_cells)
+
+    accuracy, counts = group_means(cells, trials.accuracy, number_of_cells)
+
+    # Hits and misses are each nudged by a half, so that bins of all hits or
+    # all misses still have finite probits.
+    hits = np.nan_to_num(accuracy) * counts
+    probits = ndtri((hits + 0.5) / (counts + 1))
+
+    x = np.nan_to_num((ratio - 1) / np.sqrt(ratio**2 + 1))
+
+    xz = (counts * x * probits).reshape(number_of_groups, number_of_bins)
+    xx = (counts * x**2).reshape(number_of_groups, number_of_bins)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        inverse_weber_fractions = xz.sum(axis=1) / xx.sum(axis=1)
+
+    inverse_weber_fractions[~(inverse_weber_fractions > 0)] = np.nan
+
+    return 1 / inverse_weber_fractions
+
+def weber_fraction(trials, bin_edges=conf.psychometric_ratio_bins):
+
+    ''' Return the Weber fraction fitted to all `trials`, or None.'''
+
+    return tolist(weber_fractions(np.zeros(len(trials), dtype=int),
+                                  1,
+                                  trials,
+                                  bin_edges))[0]
+
+def tolist(values):
+
+    ''' Return the array `values` as a list, with None in place of nan.'''
+
+    return [None if np.isnan(value) else float(value) for value in values]
+
+def summarize(trials, bin_edges=conf.psychometric_ratio_bins):
+
+    '''
+    Return a summary of `trials`, as a dictionary that can be saved as json:
+    the population accuracy and Weber fraction, the psychometric curve, and
+    the accuracy and Weber fraction of each subject.
+
+    '''
+
+    number_of_subjects = len(trials.subject_ids)
+
+    ratio, accuracy, latency, counts = psychometric_curve(trials, bin_edges)
+
+    subject_weber_fractions = weber_fractions(trials.subject,
+                                              number_of_subjects,
+                                              trials,
+                                              bin_edges)
+
+    responded = trials.responded
+
+    return dict(
+        number_of_subjects = number_of_subjects,
+        number_of_trials = len(trials),
+        number_of_responses = int(responded.sum()),
+        accuracy = tolist([np.mean(trials.accuracy[responded])
+                           if responded.any() else np.nan])[0],
+        weber_fraction = weber_fraction(trials, bin_edges),
+        psychometric_curve = dict(bin_edges = list(bin_edges),
+                                  ratio = tolist(ratio),
+                                  accuracy = tolist(accuracy),
+                                  latency = tolist(latency),
+                                  number_of_responses = counts.tolist()),
+        subject_accuracies = tolist(subject_accuracies(trials)),
+        subject_weber_fractions = tolist(subject_weber_fractions)
+    )
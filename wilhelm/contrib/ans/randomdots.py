@@ -0,0 +1,263 @@
+'''
+Making random dot displays, the stimuli of the ANS (approximate number
+system) test, and reading them from files.
+
+A display is a set of non-overlapping circles inside a bounding circle. Its
+density is the proportion of the bounding circle's area that the circles
+cover, and its convex hull proportion is the proportion covered by the convex
+hull of the circles' centres. To make displays with a given density and
+convex hull proportion, displays are made from successive seeds until one is
+within tolerance of both. Displays are made in parallel across processes.
+
+Displays are read, for import, from json files of one display or a list of
+them, e.g. random_dot_display.json, or from json lines files of one display
+per line.
+'''
+
+from __future__ import absolute_import, division
+
+#=============================================================================
+# Standard library imports
+#=============================================================================
+import hashlib
+import json
+import multiprocessing
+import os
+
+#=============================================================================
+# Third party
+#=============================================================================
+import numpy as np
+from scipy.spatial import ConvexHull
+
+#================================ End Imports ================================
+
+display_keys = ('uid',
+                'density',
+                'convex_hull_proportion',
+                'radius_range',
+                'bounding_circle_area',
+                'seed',
+                'bounding_circle_parameters',
+                'number_of_circles',
+                'circles')
+
+# Candidate positions tried, all at once, for each circle.
+candidates_per_circle = 256
+
+# How many seeds to try for a display with the target density and convex
+# hull proportion before giving up.
+max_seeds = 10000
+
+class DisplayError(Exception):
+    pass
+
+def make_uid(seed, number_of_circles, radius_range, bounding_circle_parameters):
+
+    '''
+    Return a 7 hex character uid that is determined by the parameters from
+    which the display is made.
+
+    '''
+
+    parameters = json.dumps([seed,
+                             number_of_circles,
+                             list(radius_range),
+                             list(bounding_circle_parameters)])
+
+    return hashlib.sha1(parameters).hexdigest()[:7]
+
+def place_circles(number_of_circles,
+                  radius_range,
+                  rng,
+                  bounding_circle_parameters=(0, 0, 1.0)):
+
+    '''
+    Return a (number_of_circles, 3) array of the (x, y, radius) of circles,
+    with radii uniform in `radius_range`, that do not overlap each other and
+    lie inside the bounding circle.
+
+    Each circle's position is chosen from a batch of candidate positions, all
+    of which are checked against the circles so far at once.
+
+    Raise DisplayError if there is no room for a circle.
+
+    '''
+
+    x0, y0, bounding_radius = bounding_circle_parameters
+
+    radii = np.sort(rng.uniform(radius_range[0],
+                                radius_range[1],
+                                number_of_circles))[::-1]
+
+    circles = np.empty((number_of_circles, 3))
+
+    for i, radius in enumerate(radii):
+
+        # Uniformly distributed positions in the disc in which the circle's
+        # centre keeps the circle inside the bounding circle.
+        r = (bounding_radius - radius)\
+            * np.sqrt(rng.uniform(size=candidates_per_circle))
+        theta = rng.uniform(0, 2 * np.pi, size=candidates_per_circle)
+        candidates = np.column_stack((x0 + r * np.cos(theta),
+                                      y0 + r * np.sin(theta)))
+
+        if i > 0:
+            distances = np.sqrt(
+                ((candidates[:, None, :] - circles[None, :i, :2])**2).sum(axis=2)
+            )
+            fits = (distances >= radius + circles[None, :i, 2]).all(axis=1)
+            candidates = candidates[fits]
+
+        if len(candidates) == 0:
+            raise DisplayError('No room for circle %d of %d.'
+                               % (i + 1, number_of_circles))
+
+        circles[i, :2] = candidates[0]
+        circles[i, 2] = radius
+
+    return circles
+
+def display_statistics(circles, bounding_circle_area):
+
+    ''' Return the density and convex hull proportion of `circles`.'''
+
+    density = (np.pi * circles[:, 2]**2).sum() / bounding_circle_area
+
+    # In two dimensions, the hull's "volume" is its area.
+    convex_hull_proportion\
+        = ConvexHull(circles[:, :2]).volume / bounding_circle_area
+
+    return density, convex_hull_proportion
+
+def make_display(number_of_circles,
+                 radius_range,
+                 seed,
+                 bounding_circle_parameters=(0, 0, 1.0)):
+
+    '''
+    Return the random dot display made from `seed`, as a dictionary with the
+    keys in `display_keys`.
+
+    '''
+
+    rng = np.random.RandomState(seed)
+
+    circles = place_circles(number_of_circles,
+                            radius_range,
+                            rng,
+                            bounding_circle_parameters)
+
+    bounding_circle_area = np.pi * bounding_circle_parameters[2]**2
+
+    density, convex_hull_proportion\
+        = display_statistics(circles, bounding_circle_area)
+
+    return dict(uid = make_uid(seed,
+                               number_of_circles,
+                               radius_range,
+                               bounding_circle_parameters),
+                density = float(density),
+                convex_hull_proportion = float(convex_hull_proportion),
+                radius_range = list(radius_range),
+                bounding_circle_area = float(bounding_circle_area),
+                seed = int(seed),
+                bounding_circle_parameters = list(bounding_circle_parameters),
+                number_of_circles = number_of_circles,
+                circles = circles.tolist())
+
+def is_near(value, target, tolerance):
+    return target is None or abs(value - target) <= tolerance
+
+def make_target_display(number_of_circles,
+                        radius_range,
+                        density,
+                        convex_hull_proportion,
+                        tolerance,
+                        first_seed,
+                        bounding_circle_parameters=(0, 0, 1.0)):
+
+    '''
+    Return the display, made from the first of the seeds from `first_seed`
+    on, whose density and convex hull proportion are both within `tolerance`
+    of those given. A target of None is no constraint.
+
+    '''
+
+    for seed in xrange(first_seed, first_seed + max_seeds):
+
+        try:
+            display = make_display(number_of_circles,
+                                   radius_range,
+                                   seed,
+                                   bounding_circle_parameters)
+        except DisplayError:
+            continue
+
+        if is_near(display['density'], density, tolerance)\
+                and is_near(display['convex_hull_proportion'],
+                            convex_hull_proportion,
+                            tolerance):
+            return display
+
+    raise DisplayError(
+        'No display of %d circles with density %s and convex hull proportion'
+        ' %s in %d seeds from %d.' % (number_of_circles,
+                                      density,
+                                      convex_hull_proportion,
+                                      max_seeds,
+                                      first_seed)
+    )
+
+def _make_target_display(kwargs):
+    return make_target_display(**kwargs)
+
+def make_displays(specifications, processes=None):
+
+    '''
+    Make a display for each of `specifications`, which are dictionaries of
+    the arguments to make_target_display, using a pool of `processes`
+    processes. Return them in the same order.
+
+    '''
+
+    pool = multiprocessing.Pool(processes)
+
+    try:
+        return pool.map(_make_target_display, specifications)
+    finally:
+        pool.close()
+        pool.join()
+
+def read_displays(path):
+
+    '''
+    Yield the displays in the file, or all the .json and .jsonl files in the
+    directory, at `path`.
+
+    '''
+
+    if os.path.isdir(path):
+
+        for filename in sorted(os.listdir(path)):
+            if os.path.splitext(filename)[1] in ('.json', '.jsonl'):
+                for display in read_displays(os.path.join(path, filename)):
+                    yield display
+
+    elif os.path.splitext(path)[1] == '.jsonl':
+
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    else:
+
+        with open(path) as f:
+            displays = json.load(f)
+
+        if isinstance(displays, dict):
+            displays = [displays]
+
+        for display in displays:
+            yield display
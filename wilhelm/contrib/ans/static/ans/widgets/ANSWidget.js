@@ -30,7 +30,21 @@ var ANSWidgetObject = function(domtag, gatewayurl, ping_uid)
     // Parse the incoming json data.
     self.ParseJsonData = function(data) {
 
-        self.Stimuli = data.stimuli;
+        // Each display is sent once, with its circles packed as float32s.
+        var displays = {};
+        for (var uid in data.stimuli.displays) {
+            displays[uid] = data.stimuli.displays[uid];
+            displays[uid].circles = decode_circles(displays[uid].circles);
+        }
+
+        // Each trial gets its own copy of its displays, as their centers,
+        // scales and colors are set per trial, and a display may be on the
+        // left in one trial and on the right in another.
+        self.Stimuli = data.stimuli.trials.map(function(trial) {
+            return {left: $.extend({}, displays[trial[0]]),
+                    right: $.extend({}, displays[trial[1]])};
+        });
+
         self.StartButton.text(data.start_message);
         self.separation = data.separation;
         self.scale_factor = data.scale_factor;
@@ -198,3 +212,21 @@ var euclidean_distance = function(pointA, pointB){
     var sum_of_squares = Math.pow(pointA[0] - pointB[0], 2) + Math.pow(pointA[1] - pointB[1], 2);
     return Math.sqrt(sum_of_squares);
 }
+
+// Decode the base64 string of little endian float32 (x, y, radius) triples
+// made by encode_circles in contrib/ans/models.py.
+var decode_circles = function(encoded_circles){
+    var binary = atob(encoded_circles);
+    var view = new DataView(new ArrayBuffer(binary.length));
+    for (var i = 0; i < binary.length; i++) {
+        view.setUint8(i, binary.charCodeAt(i));
+    }
+
+    var circles = [];
+    for (var offset = 0; offset < binary.length; offset += 12) {
+        circles.push([view.getFloat32(offset, true),
+                      view.getFloat32(offset + 4, true),
+                      view.getFloat32(offset + 8, true)]);
+    }
+    return circles;
+}
@@ -0,0 +1,114 @@
+"""
+Tests of the models of the `ans` contributed package.
+
+"""
+
+from __future__ import absolute_import
+
+#=============================================================================
+# Standard library imports.
+#=============================================================================
+import base64
+import struct
+
+#=============================================================================
+# Django imports.
+#=============================================================================
+from django.test import TestCase
+
+#=============================================================================
+# Wilhelm imports.
+#=============================================================================
+from contrib.ans.models import (RandomDotDisplay,
+                                encode_circles,
+                                decode_circles)
+
+#================================ End Imports ================================
+
+class CircleEncoding(TestCase):
+
+    # Exactly representable as float32s.
+    circles = [[0.5, -0.25, 0.125],
+               [-1.75, 2.0, 0.0625],
+               [0.0, 0.0, 1.0]]
+
+    def test_round_trip(self):
+
+        '''
+        Do decoded circles equal the encoded ones, exactly when they are
+        float32s and to float32 precision otherwise?
+        '''
+
+        self.assertEqual(decode_circles(encode_circles(self.circles)),
+                         self.circles)
+
+        circles = [[0.1, -0.3, 0.07]]
+
+        for circle, decoded_circle in zip(
+                circles, decode_circles(encode_circles(circles))):
+            for value, decoded_value in zip(circle, decoded_circle):
+                self.assertAlmostEqual(value, decoded_value, places=6)
+
+    def test_payload_layout(self):
+
+        '''
+        Is the payload little endian float32 (x, y, radius) triples, as
+        decoded by decode_circles in ANSWidget.js?
+        '''
+
+        payload = base64.b64decode(encode_circles(self.circles))
+
+        self.assertEqual(len(payload), 12 * len(self.circles))
+
+        self.assertEqual(
+            [list(struct.unpack_from('<3f', payload, offset))
+             for offset in range(0, len(payload), 12)],
+            self.circles
+        )
+
+
+class RandomDotDisplayBulkNew(TestCase):
+
+    def make_stimulus(self, uid, density=0.2):
+
+        circles = [[0.0, 0.0, 0.1], [0.5, 0.0, 0.1]]
+
+        return dict(uid = uid,
+                    density = density,
+                    convex_hull_proportion = 0.1,
+                    radius_range = [0.1, 0.1],
+                    bounding_circle_area = 3.14,
+                    seed = 0,
+                    bounding_circle_parameters = [0, 0, 1.0],
+                    number_of_circles = len(circles),
+                    circles = circles)
+
+    def test_bulk_new_skips_existing_uids(self):
+
+        '''
+        Are displays whose uids already exist skipped, and left unchanged,
+        across batches?
+        '''
+
+        self.assertEqual(
+            RandomDotDisplay.bulk_new([self.make_stimulus('aaaaaaa'),
+                                       self.make_stimulus('bbbbbbb')]),
+            (2, 0)
+        )
+
+        # A changed display with an existing uid is still skipped.
+        self.assertEqual(
+            RandomDotDisplay.bulk_new([self.make_stimulus('aaaaaaa', 0.9),
+                                       self.make_stimulus('ccccccc'),
+                                       self.make_stimulus('bbbbbbb')],
+                                      batch_size=2),
+            (1, 2)
+        )
+
+        self.assertEqual(
+            sorted(RandomDotDisplay.objects.values_list('uid', flat=True)),
+            ['aaaaaaa', 'bbbbbbb', 'ccccccc']
+        )
+
+        self.assertEqual(RandomDotDisplay.objects.get(uid='aaaaaaa').density,
+                         0.2)
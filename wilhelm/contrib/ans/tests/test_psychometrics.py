@@ -0,0 +1,229 @@
+"""
+Tests of the psychometric summaries of the `ans` contributed package.
+
+"""
+
+from __future__ import absolute_import
+
+#=============================================================================
+# Third party imports.
+#=============================================================================
+import numpy as np
+
+#=============================================================================
+# Django imports.
+#=============================================================================
+from django.test import TestCase
+
+#=============================================================================
+# Wilhelm imports.
+#=============================================================================
+from contrib.ans import psychometrics
+
+#================================ End Imports ================================
+
+def datum(left, right, accuracy):
+
+    '''
+    Return a trial as SessionANSWidget.post saves it. An accuracy of None is
+    a missed trial.
+    '''
+
+    if accuracy is None:
+        choice, latency = None, None
+    elif (left > right) == bool(accuracy):
+        choice, latency = 'left', 0.5
+    else:
+        choice, latency = 'right', 0.5
+
+    return dict(stimulus_left = 'left',
+                stimulus_right = 'right',
+                stimulus_left_number_of_circles = left,
+                stimulus_right_number_of_circles = right,
+                choice = choice,
+                accuracy = accuracy,
+                latency = latency)
+
+
+class Psychometrics(TestCase):
+
+    # Three bins: ratios in [1, 1.5), [1.5, 2) and [2, 3], and beyond.
+    bin_edges = (1.0, 1.5, 2.0, 3.0)
+
+    def setUp(self):
+
+        # Subject a does well. Subject b is at chance. Subject c missed every
+        # trial. The trials of each bin all have the same ratio, i.e. 1.2,
+        # 1.5 or 2.0.
+        tests = [
+            ('a', 'a1', [datum(12, 10, 1.0),
+                         datum(10, 12, 1.0),
+                         datum(12, 10, 1.0),
+                         datum(10, 12, 0.0),
+                         datum(12, 10, None),
+                         datum(15, 10, 1.0),
+                         # A trial whose displays could not be found.
+                         dict(stimulus_left = 'left',
+                              stimulus_left_number_of_circles = None)]),
+            ('a', 'a2', [datum(10, 15, 1.0),
+                         datum(20, 10, 1.0),
+                         datum(10, 20, 1.0)]),
+            ('b', 'b1', [datum(12, 10, 0.0),
+                         datum(10, 12, 0.0),
+                         datum(20, 10, 1.0),
+                         datum(10, 20, 0.0)]),
+            ('c', 'c1', [datum(12, 10, None),
+                         datum(20, 10, None)]),
+            ('c', 'c2', None),
+        ]
+
+        self.trials = psychometrics.Trials.from_response_data(tests)
+
+    def assert_values_equal(self, values, expected_values):
+
+        ''' Compare lists of numbers, to 6 places, and Nones.'''
+
+        self.assertEqual(len(values), len(expected_values))
+
+        for value, expected_value in zip(values, expected_values):
+            if expected_value is None:
+                self.assertIsNone(value)
+            else:
+                self.assertAlmostEqual(value, expected_value, places=6)
+
+    def test_trials(self):
+
+        '''
+        Are trials without display sizes dropped, and missed trials kept,
+        with nan accuracies and latencies?
+        '''
+
+        self.assertEqual(self.trials.subject_ids, ['a', 'b', 'c'])
+        self.assertEqual(self.trials.test_ids, ['a1', 'a2', 'b1', 'c1', 'c2'])
+
+        self.assertEqual(len(self.trials), 15)
+        self.assertEqual(self.trials.responded.sum(), 12)
+
+        self.assertEqual(self.trials.subject.tolist(),
+                         [0] * 9 + [1] * 4 + [2] * 2)
+
+        self.assertTrue(np.isnan(self.trials.accuracy[4]))
+        self.assertTrue(np.isnan(self.trials.latency[4]))
+
+        self.assertEqual(self.trials.chose_left[:4].tolist(),
+                         [True, False, True, True])
+
+    def test_ratio_bins(self):
+
+        '''
+        Does each ratio go in the bin whose lower edge it is at or above, and
+        ratios beyond the last edge in the last bin?
+        '''
+
+        trials = psychometrics.Trials.from_response_data(
+            [('a', 'a1', [datum(12, 10, 1.0),
+                          datum(10, 15, 1.0),
+                          datum(18, 10, 1.0),
+                          datum(10, 20, 1.0),
+                          datum(40, 10, 1.0)])]
+        )
+
+        self.assertEqual(trials.ratio.tolist(), [1.2, 1.5, 1.8, 2.0, 4.0])
+
+        self.assertEqual(
+            psychometrics.ratio_bins(trials, self.bin_edges).tolist(),
+            [0, 1, 1, 2, 2]
+        )
+
+    def test_group_means(self):
+
+        '''
+        Are nans ignored, and groups with no values nan?
+        '''
+
+        means, counts = psychometrics.group_means(
+            np.array([0, 0, 1, 1, 2]),
+            np.array([1.0, np.nan, 0.0, 1.0, np.nan]),
+            4
+        )
+
+        self.assert_values_equal(psychometrics.tolist(means),
+                                 [1.0, 0.5, None, None])
+        self.assertEqual(counts.tolist(), [1, 2, 0, 0])
+
+    def test_accuracies(self):
+
+        self.assert_values_equal(
+            psychometrics.tolist(psychometrics.test_accuracies(self.trials)),
+            [0.8, 1.0, 0.25, None, None]
+        )
+
+        self.assert_values_equal(
+            psychometrics.tolist(psychometrics.subject_accuracies(self.trials)),
+            [0.875, 0.25, None]
+        )
+
+    def test_psychometric_curve(self):
+
+        ratio, accuracy, latency, counts\
+            = psychometrics.psychometric_curve(self.trials, self.bin_edges)
+
+        self.assert_values_equal(ratio.tolist(), [1.2, 1.5, 2.0])
+        self.assert_values_equal(accuracy.tolist(), [0.5, 1.0, 0.75])
+        self.assert_values_equal(latency.tolist(), [0.5, 0.5, 0.5])
+        self.assertEqual(counts.tolist(), [6, 2, 4])
+
+    def test_weber_fractions(self):
+
+        '''
+        Are the Weber fractions those of the weighted least squares fit,
+        through the origin, of the probits of the binned accuracies on
+        x = (r - 1) / sqrt(r**2 + 1), worked out by hand? That is
+
+            w = sum(n * x**2) / sum(n * x * z)
+
+        over the bins, where a bin of n responses with h hits has the probit
+        z = Phi^-1((h + 0.5) / (n + 1)).
+        '''
+
+        # Subject a: bins of (n, h) = (4, 3), (2, 2) and (2, 2) at ratios
+        # 1.2, 1.5 and 2.0. Subject b: (2, 0), (0, 0) and (2, 1), so that
+        # sum(n * x * z) < 0, i.e. worse than chance. Subject c: no
+        # responses.
+        self.assert_values_equal(
+            psychometrics.tolist(
+                psychometrics.weber_fractions(self.trials.subject,
+                                              3,
+                                              self.trials,
+                                              self.bin_edges)
+            ),
+            [0.3708018894114429, None, None]
+        )
+
+        # Everyone: (6, 3), (2, 2) and (4, 3), so the first bin's probit is
+        # Phi^-1(0.5) = 0.
+        self.assertAlmostEqual(
+            psychometrics.weber_fraction(self.trials, self.bin_edges),
+            0.7135032071225538,
+            places=6
+        )
+
+    def test_summarize(self):
+
+        summary = psychometrics.summarize(self.trials, self.bin_edges)
+
+        self.assertEqual(summary['number_of_subjects'], 3)
+        self.assertEqual(summary['number_of_trials'], 15)
+        self.assertEqual(summary['number_of_responses'], 12)
+        self.assertAlmostEqual(summary['accuracy'], 8 / 12.0)
+        self.assertAlmostEqual(summary['weber_fraction'],
+                               0.7135032071225538,
+                               places=6)
+
+        self.assert_values_equal(summary['subject_accuracies'],
+                                 [0.875, 0.25, None])
+        self.assert_values_equal(summary['subject_weber_fractions'],
+                                 [0.3708018894114429, None, None])
+
+        self.assertEqual(summary['psychometric_curve']['number_of_responses'],
+                         [6, 2, 4])
@@ -0,0 +1,95 @@
+"""
+Tests of making the random dot displays of the `ans` contributed package.
+
+"""
+
+from __future__ import absolute_import
+
+#=============================================================================
+# Third party imports.
+#=============================================================================
+import numpy as np
+
+#=============================================================================
+# Django imports.
+#=============================================================================
+from django.test import TestCase
+
+#=============================================================================
+# Wilhelm imports.
+#=============================================================================
+from contrib.ans.randomdots import DisplayError, place_circles
+
+#================================ End Imports ================================
+
+class PlaceCircles(TestCase):
+
+    # Allow for rounding in the distances between the circles.
+    tolerance = 1e-9
+
+    def assert_placed(self,
+                      circles,
+                      number_of_circles,
+                      radius_range,
+                      bounding_circle_parameters):
+
+        x0, y0, bounding_radius = bounding_circle_parameters
+
+        self.assertEqual(circles.shape, (number_of_circles, 3))
+
+        x, y, radii = circles[:, 0], circles[:, 1], circles[:, 2]
+
+        self.assertTrue((radii >= radius_range[0]).all())
+        self.assertTrue((radii <= radius_range[1]).all())
+
+        # Inside the bounding circle.
+        self.assertTrue(
+            (np.hypot(x - x0, y - y0) + radii
+             <= bounding_radius + self.tolerance).all()
+        )
+
+        # No two circles overlap.
+        for i in range(number_of_circles):
+            for j in range(i):
+                self.assertGreaterEqual(
+                    np.hypot(x[i] - x[j], y[i] - y[j]),
+                    radii[i] + radii[j] - self.tolerance
+                )
+
+    def test_circles_do_not_overlap_and_are_in_bounds(self):
+
+        '''
+        For a range of seeds, and bounding circles other than the unit circle,
+        are the circles' radii in range, inside the bounding circle, and
+        without overlaps?
+        '''
+
+        radius_range = (0.04, 0.08)
+
+        for bounding_circle_parameters in [(0, 0, 1.0), (2.0, -1.0, 3.0)]:
+
+            scale = bounding_circle_parameters[2]
+            scaled_radius_range = (scale * radius_range[0],
+                                   scale * radius_range[1])
+
+            for seed in range(20):
+
+                circles = place_circles(20,
+                                        scaled_radius_range,
+                                        np.random.RandomState(seed),
+                                        bounding_circle_parameters)
+
+                self.assert_placed(circles,
+                                   20,
+                                   scaled_radius_range,
+                                   bounding_circle_parameters)
+
+    def test_no_room(self):
+
+        '''
+        Is DisplayError raised when the circles cannot all fit?
+        '''
+
+        # Two circles of radius 0.6 cannot both fit in the unit circle.
+        with self.assertRaises(DisplayError):
+            place_circles(2, (0.6, 0.6), np.random.RandomState(0))
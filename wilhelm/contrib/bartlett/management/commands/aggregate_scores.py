@@ -3,6 +3,9 @@ from contrib.bartlett import models
 
 class Command(BaseCommand):
 
+    help = '''aggregate_scores: rebuild the aggregate scores of all playlists
+    from scratch. They are otherwise updated as each session is completed.'''
+
     def handle(self, *args, **options):
         [x.save_aggregate_scores() for x in models.Playlist.objects.all()]
         [x.save_aggregate_scores() for x in models.PlaylistV2.objects.all()]
@@ -10,19 +10,21 @@ from collections import defaultdict
 # Third party imports.
 #=============================================================================
 from numpy.random import permutation
-from scipy.stats import percentileofscore
 from jsonfield import JSONField
 
 #=============================================================================
 # Django imports
 #=============================================================================
+from django.db import transaction
 from django.db.models import IntegerField
 
 #=============================================================================
 # Wilhelm imports
 #=============================================================================
 from contrib.base import models
+from apps.core.routers import read_replica
 from apps.core.utils import numerical
+from apps.core.utils.percentiles import score_distributions
 from apps.sessions.models import ExperimentSession
 from apps.archives.models import Experiment
 from apps.subjects.models import Subject
@@ -105,17 +107,7 @@ class _Playlist(models.Playlist):
 
         """
 
-        condition = lambda experiment: experiment.current_version.playlist.uid == self.uid
-        parent_experiments = filter(condition, Experiment.objects.all())
-
-        if parent_experiments == []:
-            return None
-        else:
-            error_msg = "This playlist object should have exactly one, not %d, Experiments object as a parent."
-            number_of_parents = len(parent_experiments)
-            assert number_of_parents == 1, error_msg % number_of_parents
-
-            return parent_experiments.pop()
+        return Experiment.objects.get_playlist_parent(self)
 
 
     def get_experiment_session_parents(self):
@@ -174,11 +166,15 @@ class _Playlist(models.Playlist):
 
         """Return aggregation of scores from the Experiment.
 
-        NOTE that this function will be beastly slow. It should only be used in
-        an asynchronous task queue.
+        NOTE that this function is slow. It is only needed to rebuild the
+        aggregate scores from scratch, as they are otherwise kept up to date,
+        by add_session_scores, as each session is completed.
 
-        Go through all "ExperimentSession"s of the Experiment of which this
-        Playlist is an descendant. Get all the Recognition and Recall results.
+        Go through all completed "ExperimentSession"s of the Experiment of
+        which this Playlist is an descendant. Sessions that are live or paused
+        are left out, as their scores are added when they are completed.
+
+        Get all the Recognition and Recall results.
         Calculate the F1 score for the Recall tests, and the accuracy for the
         Recognition tests. Concatenate these scores into separate lists for
         Recall and Recognition.
@@ -193,52 +189,33 @@ class _Playlist(models.Playlist):
        
         sessions = self.get_real_experiment_session_parents()
 
-        try:
-
-            real_subjects = Subject.objects.get_real_subjects()
-            subjects = [session.subject.uid for session in sessions
-                        if session.subject in real_subjects]
+        if sessions is not None:
+            sessions = sessions.filter(
+                status = ExperimentSession.status_completed
+            )
 
-            n_unique_subjects = len(set(subjects))
+        try:
+            n_unique_subjects\
+                = sessions.values('subject_id').distinct().count()
 
-        except:
+        except AttributeError:
             n_unique_subjects = None
             logger.exception('Could not calculate number of unique subjects.')
 
         aggregate_scores = None
         if sessions:
 
-            try:
-               
-                results = []
-                for session in sessions:
+            aggregate_scores = defaultdict(list)
 
-                    slides_completed, slides_remaining\
-                        = session.slides_completed_slides_remaining
+            for session in sessions:
 
-                    try:
-                        for slide_feedback in session.feedback()['Slides'][:slides_completed]:
-
-                            results.append(process_feedback(slide_feedback))
-                    except Exception as e:
-                        logger.exception('Something bad happened: %s.' % e)
+                try:
+                    for test, score in session.playlist_session.scores():
+                        aggregate_scores[test].append(score)
+                except Exception as e:
+                    logger.exception('Something bad happened: %s.' % e)
 
-                aggregate_scores = defaultdict(list)
-                for test, score in results:
-                    aggregate_scores[test].append(score)
-
-                for memory_test, scores in aggregate_scores.items():
-
-                    aggregate_scores[memory_test]\
-                        = filter(lambda score: type(score) in (float, int),
-                                 scores)
-
-            except Exception as e:
-                print(e)
-
-                logger.exception('Something went wrong: %s.' % e)
-    
-                aggregate_scores = None
+            aggregate_scores = dict(aggregate_scores)
 
         return n_unique_subjects, aggregate_scores
 
@@ -251,10 +228,61 @@ class _Playlist(models.Playlist):
 
         """
 
-        n_unique_subjects, aggregate_scores = self.get_aggregate_scores()
+        with read_replica():
+            n_unique_subjects, aggregate_scores = self.get_aggregate_scores()
+
         self.misc = (n_unique_subjects, aggregate_scores)
         self.save()
 
+    def add_session_scores(self, experiment_session, scores):
+
+        """Add the scores of a completed session to the aggregate scores.
+
+        The session's `scores`, a list of (test type, score) tuples, are
+        appended to the aggregate scores in the misc attribute, and the number
+        of unique subjects goes up by one if this is the subject's first
+        completed session of the Experiment. Test and temp subjects are not
+        counted.
+
+        The playlist row is locked while it is updated, and whether the
+        subject is new is only checked once it is locked, so that sessions
+        that are completed at the same time neither lose each other's scores
+        nor both count the same subject as new.
+
+        """
+
+        subject = experiment_session.subject
+
+        if subject.temp_subject or subject.test_subject:
+            return
+
+        with transaction.atomic():
+
+            playlist = type(self).objects.select_for_update().get(uid = self.uid)
+
+            is_new_subject = not ExperimentSession.objects.filter(
+                subject = subject,
+                experiment_version__experiment_id\
+                = experiment_session.experiment_version.experiment_id,
+                status = ExperimentSession.status_completed
+            ).exclude(uid = experiment_session.uid).exists()
+
+            try:
+                n_unique_subjects, aggregate_scores = playlist.misc
+            except (TypeError, ValueError):
+                n_unique_subjects, aggregate_scores = None, None
+
+            n_unique_subjects = (n_unique_subjects or 0) + int(is_new_subject)
+            aggregate_scores = aggregate_scores or {}
+
+            for test, score in scores:
+                aggregate_scores.setdefault(test, []).append(score)
+
+            playlist.misc = (n_unique_subjects, aggregate_scores)
+            playlist.save()
+
+        self.misc = playlist.misc
+
 
 class _SessionPlaylist(models.SessionPlaylist):
 
@@ -334,6 +362,39 @@ class _SessionPlaylist(models.SessionPlaylist):
             return [slides.new_session_model() for slide in slides]
 
 
+    def scores(self):
+
+        """Return the scores of the completed slides of this session.
+
+        Returns:
+            A list of (test type, score) tuples, the test type being Recall,
+            with an F1 score, or Recognition, with an accuracy score.
+
+        """
+
+        scores = []
+        for element, slide_feedback in self.slides_feedback():
+
+            if not element.completed:
+                continue
+
+            try:
+                test, score = process_feedback(slide_feedback)
+            except (TypeError, KeyError):
+                continue
+
+            if type(score) in (float, int):
+                scores.append((test, score))
+
+        return scores
+
+    def experiment_session_completed(self, experiment_session):
+
+        try:
+            self.playlist.add_session_scores(experiment_session, self.scores())
+        except Exception as e:
+            logger.exception('Could not add session scores: %s.' % e)
+
     def feedback(self):
 
         try:
@@ -354,10 +415,11 @@ class _SessionPlaylist(models.SessionPlaylist):
                         if score == None:
                             percentile = None
                         else:
-                            percentile\
-                                = percentileofscore(aggregate_scores[test_type],
-                                                    score)
-                            percentile = int(percentile.round())
+                            percentile = score_distributions.percentile(
+                                (self.playlist_uid, test_type),
+                                aggregate_scores[test_type],
+                                score
+                            )
                     except Exception as e:
                         logger.exception('Could not calculate percentile: %s.' % e)
                         percentile = None
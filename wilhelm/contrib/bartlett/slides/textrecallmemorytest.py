@@ -73,7 +73,8 @@ class SessionTextRecallMemoryTest(SessionSlide):
             summary.update(session_widgets_feedback['Tetris'])
             summary.update(session_widgets_feedback['WordRecallTest'])
 
-            text_tokens = map(str.lower, summary['Text_tokens'])
+            text_tokens = frozenset(token.lower()
+                                    for token in summary['Text_tokens'])
 
             summary.update(calculate_recall_rates(text_tokens, 
                                                   summary['recalled_words']))
@@ -0,0 +1,95 @@
+"""
+Tests of the models of the `bartlett` contributed package.
+
+"""
+
+from __future__ import absolute_import
+
+#=============================================================================
+# Standard library imports.
+#=============================================================================
+import datetime
+import shutil
+
+#=============================================================================
+# Django imports.
+#=============================================================================
+from django.test import TestCase
+
+#=============================================================================
+# Wilhelm imports.
+#=============================================================================
+from apps import testing
+from apps.archives.models import Experiment, ExperimentRepository
+from apps.sessions.models import ExperimentSession
+from apps.subjects import utils as subjects_utils
+from apps.subjects.models import Subject
+from apps.testing import utils as testing_utils
+from contrib.bartlett import models
+
+#================================ End Imports ================================
+
+class AggregateScores(TestCase):
+
+    def setUp(self):
+
+        subjects_utils.subject_enroll(testing.mock_subjects)
+
+        self.mock_repository_setup_dir\
+            = testing_utils.make_mock_repository_files()
+
+        self.mock_repository\
+            = testing_utils.MockExperimentRepository(
+                setup_dir = self.mock_repository_setup_dir)
+
+        self.mock_repository.initialize()
+        self.mock_repository.update(revisions=1)
+
+        experiment_repository = ExperimentRepository.objects.create(
+            name = 'mock',
+            description = 'A mock repository',
+            date_created = datetime.datetime.now(),
+            is_active = True,
+            path = self.mock_repository.path
+        )
+        experiment_repository.make_archives()
+
+        Experiment.objects.set_default_current_version()
+
+        # Every completed session scores 0.5 on a recall test.
+        self.scores = models._SessionPlaylist.scores
+        models._SessionPlaylist.scores = lambda self: [('Recall', 0.5)]
+
+    def tearDown(self):
+        models._SessionPlaylist.scores = self.scores
+        shutil.rmtree(self.mock_repository.path)
+        shutil.rmtree(self.mock_repository_setup_dir)
+
+    def test_completion_after_rebuild(self):
+
+        '''
+        If the aggregate scores are rebuilt while a session is live, and it is
+        then completed, is it counted once, not twice?
+        '''
+
+        subject, other_subject = Subject.objects.filter(
+            user__username__in = testing.mock_subjects.keys()
+        ).order_by('user__username')[:2]
+
+        completed_session = ExperimentSession.new(subject, 'Rusty')
+        completed_session.set_completed()
+
+        live_session = ExperimentSession.new(other_subject, 'Rusty')
+        live_session.make_live()
+
+        playlist = completed_session.experiment_version.playlist
+
+        playlist.save_aggregate_scores()
+
+        self.assertEqual(type(playlist).objects.get(uid=playlist.uid).misc,
+                         [1, {'Recall': [0.5]}])
+
+        live_session.set_completed()
+
+        self.assertEqual(type(playlist).objects.get(uid=playlist.uid).misc,
+                         [2, {'Recall': [0.5, 0.5]}])
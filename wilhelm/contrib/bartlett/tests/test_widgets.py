@@ -0,0 +1,88 @@
+"""
+Tests of the widgets of the `bartlett` contributed package.
+
+"""
+
+from __future__ import absolute_import
+
+#=============================================================================
+# Standard library imports.
+#=============================================================================
+import json
+
+#=============================================================================
+# Django imports.
+#=============================================================================
+from django.test import TestCase
+
+#=============================================================================
+# Wilhelm imports.
+#=============================================================================
+from contrib.bartlett.models import (WordRecognitionTest,
+                                     SessionWordRecognitionTest)
+
+#================================ End Imports ================================
+
+class WordRecognitionTestPost(TestCase):
+
+    def setUp(self):
+
+        widget = WordRecognitionTest.new(inwords = ['apple', 'bread'],
+                                         outwords = ['chair', 'table'],
+                                         start_msg = 'Start',
+                                         isi = 0.2,
+                                         fadeInDuration = 0.2,
+                                         fadeOutDuration = 0.2,
+                                         timeOutDuration = 3)
+
+        self.session_widget = SessionWordRecognitionTest.new(widget)
+
+    def test_post_responses(self):
+
+        '''
+        Are the posted recognition responses stored as binary choices, in
+        order, and is their accuracy as hand counted?
+        '''
+
+        # Timestamps are in milliseconds. The table trial timed out.
+        responses = [
+            dict(word='apple', response='present', order=0,
+                 onset=1400000000000, responseTime=1400000000500),
+            dict(word='bread', response='absent', order=1,
+                 onset=1400000001000, responseTime=1400000001250),
+            dict(word='chair', response='absent', order=2,
+                 onset=1400000002000, responseTime=1400000002750),
+            dict(word='table', response=None, order=3,
+                 onset=1400000003000, responseTime=None),
+        ]
+
+        self.session_widget.post({'responses': json.dumps(responses)})
+
+        self.assertTrue(self.session_widget.completed)
+
+        choices = list(self.session_widget.get_response_data())
+
+        self.assertEqual([choice.stimulus.word for choice in choices],
+                         ['apple', 'bread', 'chair', 'table'])
+
+        self.assertEqual([choice.response for choice in choices],
+                         [True, False, False, None])
+
+        self.assertEqual([choice.response_latency for choice in choices],
+                         [0.5, 0.25, 0.75, None])
+
+        self.assertEqual(
+            [datum['response_accuracy']
+             for datum in self.session_widget.response_data_denormalized],
+            [True, False, True, None]
+        )
+
+        feedback = self.session_widget.feedback()
+
+        self.assertEqual(feedback['hit_total'], 3)
+        self.assertEqual(feedback['miss_total'], 1)
+        self.assertEqual(feedback['true_positive'], ['apple'])
+        self.assertEqual(feedback['false_negative'], ['bread'])
+        self.assertEqual(feedback['true_negative'], ['chair'])
+        self.assertEqual(feedback['false_positive'], [])
+        self.assertEqual(feedback['accuracy'], 0.5)
@@ -79,6 +79,9 @@ def WordRecognitionTestStimuliCheck(memorandum, inwords, outwords):
 
 def calculate_recall_rates(memoranda, recalled_words):
 
+        # Each recalled word is looked up in the memoranda.
+        memoranda = frozenset(memoranda)
+
         recall_count = len(recalled_words)
 
         true_recalls = []
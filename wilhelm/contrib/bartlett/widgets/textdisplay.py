@@ -15,12 +15,11 @@ from django.db import models
 # Wilhelm imports
 #=============================================================================
 from .widgets import Widget, SessionWidget
-from contrib.bartlett.utils import nonstopword_unique_tokens
 from contrib.stimuli.textual.models import TextStimulus
 from apps.core import fields
 from apps.core.utils import datetime
 from apps.core.utils.datetime import approximate_minutes_from_seconds
-from apps.core.utils.strings import abbreviate_text, tokenize
+from apps.core.utils.strings import abbreviate_text
 from apps.dataexport.utils import safe_export_data
 
 #================================ End Imports ================================
@@ -188,9 +187,8 @@ class SessionTextDisplay(SessionWidget):
         summary['Memoranda_type'] = 'Text'
         summary['Text_title'] = self.widget.title
         summary['Text_abbreviated'] = abbreviate_text(self.widget.text)
-        summary['Text_tokens'] = tokenize(self.widget.text)
-        summary['Text_keywords']\
-            = nonstopword_unique_tokens(tokenize(self.widget.text))
+        summary['Text_tokens'], summary['Text_keywords']\
+            = self.widget.textstimulus.get_token_index()
         summary['Reading_time'] = self.reading_time
 
         return summary
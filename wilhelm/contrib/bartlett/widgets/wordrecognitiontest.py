@@ -130,23 +130,32 @@ class SessionWordRecognitionTest(SessionWordlistMixin, SessionWidget):
 
             logger.debug('Processing data: %s' % repr(responses))
 
+            # The items of the wordlist, by word, with one query.
+            items = defaultdict(list)
+            for item in self.widget.wordliststimulus.wordlist_items:
+                items[item.word].append(item)
 
+            choices = []
             for datum in responses:
 
-                stimulus_onset_datetime\
-                    = datetime.fromtimestamp(datum['onset'])
+                try:
 
-                if datum['responseTime'] is None:
-                    response_datetime = None
-                    logger.debug('No responseTime. Missed trial?')
-                else:
-                    response_datetime\
-                        = datetime.fromtimestamp(datum['responseTime'])
+                    stimulus_onset_datetime\
+                        = datetime.fromtimestamp(datum['onset'])
 
-                stimulus\
-                    = self.widget.wordliststimulus.get_item(datum['word'])
+                    if datum['responseTime'] is None:
+                        response_datetime = None
+                        logger.debug('No responseTime. Missed trial?')
+                    else:
+                        response_datetime\
+                            = datetime.fromtimestamp(datum['responseTime'])
 
-                try:
+                    if len(items[datum['word']]) != 1:
+                        raise ValueError('%d items with the word %s'
+                                         % (len(items[datum['word']]),
+                                            datum['word']))
+
+                    stimulus = items[datum['word']][0]
 
                     if datum['response'] == 'present':
                         response = True
@@ -161,16 +170,19 @@ class SessionWordRecognitionTest(SessionWordlistMixin, SessionWidget):
                         logger.error(
                             'Response should be "absent" or "present" or None')
 
+                    choices.append(
+                        dict(stimulus = stimulus,
+                             response = response,
+                             order = datum['order'],
+                             stimulus_onset_datetime = stimulus_onset_datetime,
+                             response_datetime = response_datetime)
+                    )
 
-                    BinaryChoiceModel.new(self,
-                                          stimulus,
-                                          response = response,
-                                          order = datum['order'],
-                                          stimulus_onset_datetime = stimulus_onset_datetime,
-                                          response_datetime = response_datetime)
                 except Exception as e:
                     logger.warning(
-                        'Could not process binary response datum: %s' % e.message)
+                        'Could not process binary response datum: %s' % e)
+
+            BinaryChoiceModel.bulk_new(self, choices)
 
             self.set_completed()
 
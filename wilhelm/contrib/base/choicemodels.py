@@ -72,6 +72,39 @@ class ChoiceModel(Model):
         stimulus_model = self.stimulus_ct.model_class()
         return stimulus_model.objects.get(uid = self.stimulus_uid)
 
+    @classmethod
+    def build(cls,
+              sessionwidget,
+              stimulus,
+              order,
+              stimulus_onset_datetime,
+              response_datetime,
+              **fields):
+
+        """
+        Return a new, but unsaved, choice model instance, e.g. for
+        bulk_create.
+
+        """
+
+        # ContentType.objects caches its lookups, so this costs no queries
+        # after the first time.
+        sessionwidget_ct = ContentType.objects.get_for_model(sessionwidget)
+        sessionwidget_uid = sessionwidget.uid
+
+        stimulus_ct = ContentType.objects.get_for_model(stimulus)
+        stimulus_uid = stimulus.uid
+
+        return cls(sessionwidget_ct = sessionwidget_ct,
+                   sessionwidget_uid = sessionwidget_uid,
+                   stimulus_ct = stimulus_ct,
+                   stimulus_uid = stimulus_uid,
+                   uid = django.uid(),
+                   order = order,
+                   stimulus_onset_datetime = stimulus_onset_datetime,
+                   response_datetime = response_datetime,
+                   **fields)
+
     @classmethod
     def new(cls,
             sessionwidget,
@@ -80,21 +113,13 @@ class ChoiceModel(Model):
             stimulus_onset_datetime,
             response_datetime):
 
-        sessionwidget_ct = ContentType.objects.get_for_model(sessionwidget)
-        sessionwidget_uid = sessionwidget.uid
-
-        stimulus_ct = ContentType.objects.get_for_model(stimulus)
-        stimulus_uid = stimulus.uid
+        choice_model = cls.build(sessionwidget,
+                                 stimulus,
+                                 order,
+                                 stimulus_onset_datetime,
+                                 response_datetime)
 
-        choice_model = cls.objects.create(
-                           sessionwidget_ct = sessionwidget_ct,
-                           sessionwidget_uid = sessionwidget_uid,
-                           stimulus_ct = stimulus_ct,
-                           stimulus_uid = stimulus_uid,
-                           uid = django.uid(),
-                           order = order,
-                           stimulus_onset_datetime = stimulus_onset_datetime,
-                           response_datetime = response_datetime)
+        choice_model.save(force_insert=True)
 
         return choice_model
 
@@ -114,14 +139,27 @@ class BinaryChoiceModel(ChoiceModel):
             stimulus_onset_datetime,
             response_datetime):
 
-        binary_choice_model\
-            = super(BinaryChoiceModel, cls).new(sessionwidget, 
-                                                stimulus, 
-                                                order, 
-                                                stimulus_onset_datetime, 
-                                                response_datetime)
+        binary_choice_model = cls.build(sessionwidget,
+                                        stimulus,
+                                        order,
+                                        stimulus_onset_datetime,
+                                        response_datetime,
+                                        response = response)
 
-        binary_choice_model.response = response
-        binary_choice_model.save()
+        binary_choice_model.save(force_insert=True)
 
         return binary_choice_model
+
+    @classmethod
+    def bulk_new(cls, sessionwidget, choices):
+
+        """
+        Create, with one query, a binary choice model instance for each of
+        `choices`, which are dictionaries of the arguments to `new` other than
+        `sessionwidget`.
+
+        """
+
+        return cls.objects.bulk_create(
+            [cls.build(sessionwidget, **choice) for choice in choices]
+        )
@@ -395,6 +395,18 @@ class SessionPlaylist(SessionModel):
 
         return session_playlist
 
+    def experiment_session_completed(self, experiment_session):
+
+        '''
+        Called when `experiment_session`, the experiment session of this
+        playlist session, is completed. Playlists that keep summaries of their
+        sessions, e.g. aggregate scores, update them here, from
+        `slides_feedback` so that it is not worked out again when the
+        session's feedback is stored.
+        '''
+
+        pass
+
     def iterate(self):
 
         if self.is_slides_remaining:
@@ -631,6 +643,25 @@ class SessionPlaylist(SessionModel):
         return export_dict
 
 
+    def slides_feedback(self):
+
+        """
+        Return (slide and playlist join, slide feedback) tuples for the slides
+        of this playlist session, in order.
+
+        They are worked out once per instance, so that a completed session
+        can update e.g. aggregate scores and store its feedback from the same
+        slide feedback.
+        """
+
+        try:
+            return self._slides_feedback
+        except AttributeError:
+            self._slides_feedback\
+                = [(element, element.session_slide.feedback())
+                   for element in self.filter_SlideAndPlaylistJoinModel]
+            return self._slides_feedback
+
     def feedback(self):
 
         """
@@ -642,8 +673,8 @@ class SessionPlaylist(SessionModel):
         summary[data_export_conf.object_name] = 'Generic playlist'
 
         summary[data_export_conf.playlist_slides]\
-            = [element.session_slide.feedback() 
-               for element in self.filter_SlideAndPlaylistJoinModel]
+            = [slide_feedback
+               for element, slide_feedback in self.slides_feedback()]
 
         # TODO (Sat 13 Aug 2016 19:52:15 BST): 
         # This is really general. It is specific to bartlett. It should be
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+def make_wordlist_hash(wordlist, expected_responses=None):
+
+    # A copy of contrib.stimuli.textual.models.make_wordlist_hash, as it was
+    # when this migration was written, so that later changes to the model
+    # module cannot change the hashes that are backfilled here.
+
+    if expected_responses is None:
+        content = list(wordlist)
+    else:
+        content = zip(wordlist, expected_responses)
+
+    return hashlib.sha256(json.dumps(content)).hexdigest()
+
+
+def backfill_wordlist_hashes(apps, schema_editor):
+
+    for stimulus_model, items_model, with_expected_responses in [
+            ('WordlistStimulus', 'WordlistItems', False),
+            ('WordlistTestStimulus', 'WordlistTestItems', True)]:
+
+        WordlistStimulus = apps.get_model('textual', stimulus_model)
+        WordlistItems = apps.get_model('textual', items_model)
+
+        for wordlist_stimulus in WordlistStimulus.objects.all():
+
+            fields = ['lexicon__word']
+            if with_expected_responses:
+                fields.append('expected_response')
+
+            items = list(WordlistItems.objects
+                         .filter(wordlist_stimulus=wordlist_stimulus)
+                         .order_by('order')
+                         .values_list(*fields))
+
+            wordlist = [item[0] for item in items]
+
+            if with_expected_responses:
+                expected_responses = [item[1] for item in items]
+            else:
+                expected_responses = None
+
+            wordlist_stimulus.wordlist_hash\
+                = make_wordlist_hash(wordlist, expected_responses)
+            wordlist_stimulus.save(update_fields=['wordlist_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('textual', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wordliststimulus',
+            name='wordlist_hash',
+            field=models.CharField(db_index=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='wordlistteststimulus',
+            name='wordlist_hash',
+            field=models.CharField(db_index=True, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_wordlist_hashes,
+                             migrations.RunPython.noop),
+    ]
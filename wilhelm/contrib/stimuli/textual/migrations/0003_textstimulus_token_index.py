@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+import re
+import string
+
+from django.db import migrations, models
+import jsonfield.fields
+
+# A copy of the tokenizer of contrib.stimuli.textual.models.make_token_index,
+# i.e. of apps.core.utils.strings.tokenize and rmstopwords and their
+# stopwords, as it was when this migration was written, so that later changes
+# to those modules cannot change the tokens that are backfilled here.
+
+possessive_regex = re.compile(r'\'s')
+nonprintable_regex = re.compile(r'[^%s]' % re.escape(string.printable))
+
+stopwords = frozenset([
+    'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm', 'n', 'o',
+    'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z', 'th', 're', 'nd',
+    'ed', 'wa', 'ha', 'about', 'above', 'across', 'after', 'afterwards',
+    'again', 'against', 'all', 'almost', 'alone', 'along', 'already', 'also',
+    'although', 'always', 'am', 'among', 'amongst', 'amoungst', 'amount', 'an',
+    'and', 'another', 'any', 'anyhow', 'anyone', 'anything', 'anyway',
+    'anywhere', 'are', 'around', 'as', 'at', 'back', 'be', 'became', 'because',
+    'become', 'becomes', 'becoming', 'been', 'before', 'beforehand', 'behind',
+    'being', 'below', 'beside', 'besides', 'between', 'beyond', 'bill', 'both',
+    'bottom', 'but', 'by', 'call', 'can', 'cannot', 'cant', 'co', 'computer',
+    'con', 'could', 'couldnt', 'cry', 'de', 'describe', 'detail', 'do', 'done',
+    'down', 'due', 'during', 'each', 'eg', 'eight', 'either', 'eleven', 'else',
+    'elsewhere', 'empty', 'enough', 'etc', 'even', 'ever', 'every', 'everyone',
+    'everything', 'everywhere', 'except', 'few', 'fifteen', 'fify', 'fill',
+    'find', 'fire', 'first', 'five', 'for', 'former', 'formerly', 'forty',
+    'found', 'four', 'from', 'front', 'full', 'further', 'get', 'give', 'go',
+    'had', 'has', 'hasnt', 'have', 'he', 'hence', 'her', 'here', 'hereafter',
+    'hereby', 'herein', 'hereupon', 'hers', 'herse"', 'him', 'himse"', 'his',
+    'how', 'however', 'hundred', 'i', 'ie', 'if', 'in', 'inc', 'indeed',
+    'interest', 'into', 'is', 'it', 'its', 'itse"', 'keep', 'last', 'latter',
+    'latterly', 'least', 'less', 'ltd', 'made', 'many', 'may', 'me',
+    'meanwhile', 'might', 'mill', 'mine', 'more', 'moreover', 'most', 'mostly',
+    'move', 'much', 'must', 'my', 'myse"', 'name', 'namely', 'neither',
+    'never', 'nevertheless', 'next', 'nine', 'no', 'nobody', 'none', 'noone',
+    'nor', 'not', 'nothing', 'now', 'nowhere', 'of', 'off', 'often', 'on',
+    'once', 'one', 'only', 'onto', 'or', 'other', 'others', 'otherwise', 'our',
+    'ours', 'ourselves', 'out', 'over', 'own', 'part', 'per', 'perhaps',
+    'please', 'put', 'rather', 're', 'same', 'see', 'seem', 'seemed',
+    'seeming', 'seems', 'serious', 'several', 'she', 'should', 'show', 'side',
+    'since', 'sincere', 'six', 'sixty', 'so', 'some', 'somehow', 'someone',
+    'something', 'sometime', 'sometimes', 'somewhere', 'still', 'such',
+    'system', 'take', 'ten', 'than', 'that', 'the', 'their', 'them',
+    'themselves', 'then', 'thence', 'there', 'thereafter', 'thereby',
+    'therefore', 'therein', 'thereupon', 'these', 'they', 'thick', 'thin',
+    'third', 'this', 'those', 'though', 'three', 'through', 'throughout',
+    'thru', 'thus', 'to', 'together', 'too', 'top', 'toward', 'towards',
+    'twelve', 'twenty', 'two', 'un', 'under', 'until', 'up', 'upon', 'us',
+    'very', 'via', 'was', 'we', 'well', 'were', 'what', 'whatever', 'when',
+    'whence', 'whenever', 'where', 'whereafter', 'whereas', 'whereby',
+    'wherein', 'whereupon', 'wherever', 'whether', 'which', 'while', 'whither',
+    'who', 'whoever', 'whole', 'whom', 'whose', 'why', 'will', 'with',
+    'within', 'without', 'would', 'yet', 'you', 'your', 'yours', 'yourself',
+    'yourselves'])
+
+def tokenize(text):
+
+    text = possessive_regex.sub('', text)
+    s = nonprintable_regex.sub('', text)
+
+    s = str(s).translate(None, string.punctuation)
+
+    return s.lower().split()
+
+def make_token_index(text):
+
+    tokens = tokenize(text) if text else []
+    keywords = sorted(word for word in set(tokens) if word not in stopwords)
+
+    return tokens, keywords
+
+
+def backfill_token_indexes(apps, schema_editor):
+
+    TextStimulus = apps.get_model('textual', 'TextStimulus')
+
+    for text_stimulus in TextStimulus.objects.exclude(text=None):
+
+        text_stimulus.tokens, text_stimulus.keywords\
+            = make_token_index(text_stimulus.text)
+
+        text_stimulus.indexed_text_checksum\
+            = hashlib.sha1(text_stimulus.text.encode('utf-8')).hexdigest()
+
+        text_stimulus.save(update_fields=['tokens',
+                                          'keywords',
+                                          'indexed_text_checksum'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('textual', '0002_wordlist_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='textstimulus',
+            name='tokens',
+            field=jsonfield.fields.JSONField(null=True),
+        ),
+        migrations.AddField(
+            model_name='textstimulus',
+            name='keywords',
+            field=jsonfield.fields.JSONField(null=True),
+        ),
+        migrations.AddField(
+            model_name='textstimulus',
+            name='indexed_text_checksum',
+            field=models.CharField(max_length=40, null=True),
+        ),
+        migrations.RunPython(backfill_token_indexes,
+                             migrations.RunPython.noop),
+    ]
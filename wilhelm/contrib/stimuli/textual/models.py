@@ -7,7 +7,14 @@ from __future__ import absolute_import
 #=============================================================================
 # Standard library imports.
 #=============================================================================
+from collections import OrderedDict
 import hashlib
+import json
+
+#=============================================================================
+# Third party imports.
+#=============================================================================
+from jsonfield import JSONField
 
 #=============================================================================
 # Django imports. 
@@ -16,31 +23,97 @@ from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
 from django.db import models
 from django.db.models import Model
 from django.conf import settings
+from django.utils.encoding import force_text
 
 #=============================================================================
 # Wilhelm imports.
 #=============================================================================
-from apps.core.utils import django
+from apps.core.utils import django, strings
 
 #================================ End Imports ================================
 
+def make_wordlist_hash(wordlist, expected_responses=None):
+
+    """
+    Return a sha256 checksum of the ordered `wordlist` and, if given, the
+    `expected_responses` to its words. Wordlist stimuli are looked up by it.
+
+    """
+
+    if expected_responses is None:
+        content = list(wordlist)
+    else:
+        content = zip(wordlist, expected_responses)
+
+    return hashlib.sha256(json.dumps(content)).hexdigest()
+
+def make_token_index(text):
+
+    """
+    Return the tokens of `text` and its unique tokens that are not stopwords,
+    sorted.
+
+    """
+
+    tokens = strings.tokenize(text) if text else []
+    keywords = sorted(strings.rmstopwords(set(tokens)))
+
+    return tokens, keywords
+
 class TextStimulus(Model):
 
     text = models.TextField(null=True)
     title = models.TextField(default='A Text', null=True)
 
+    # The tokens and keywords, i.e. unique non-stopword tokens, of the text,
+    # and the checksum of the text that they are of.
+    tokens = JSONField(null=True)
+    keywords = JSONField(null=True)
+    indexed_text_checksum = models.CharField(max_length=40, null=True)
+
     @classmethod
     def new(cls, text, title='A Text'):
         text_stimulus, _created = cls.objects.get_or_create(text = text, 
                                                             title = title)
+        text_stimulus.get_token_index()
         return text_stimulus
 
+    def index_tokens(self):
+
+        """
+        Tokenize the text and store its tokens and keywords.
+
+        """
+
+        self.tokens, self.keywords = make_token_index(self.text)
+        self.indexed_text_checksum = self.text_checksum
+        self.save(update_fields=['tokens',
+                                 'keywords',
+                                 'indexed_text_checksum'])
+
+    def get_token_index(self):
+
+        """
+        Return the tokens and keywords of the text, tokenizing it only if it
+        has not been, or has changed since.
+
+        """
+
+        if self.tokens is None\
+                or self.indexed_text_checksum != self.text_checksum:
+            self.index_tokens()
+
+        return self.tokens, self.keywords
+
     @property
     def text_checksum(self):
         """
-        Return the sha1 checksum of the text.
+        Return the sha1 checksum of the text, or None if there is no text.
         """
 
+        if self.text is None:
+            return None
+
         h = hashlib.new('sha1')
         try:
             h.update(self.text)
@@ -65,6 +138,7 @@ class _abc_WordlistStimulus(Model):
     uid = models.CharField(max_length=settings.UID_LENGTH, primary_key=True)
     name = models.CharField(max_length = 50, null = True)
     description = models.TextField(null=True)
+    wordlist_hash = models.CharField(max_length=64, null=True, db_index=True)
     #########################################################################
 
     #########################################################################
@@ -101,7 +175,9 @@ class WordlistStimulus(_abc_WordlistStimulus):
 
         except ObjectDoesNotExist:
 
-            wordlist_stimulus = cls.objects.create(uid = django.uid())
+            wordlist_stimulus\
+                = cls.objects.create(uid = django.uid(),
+                                     wordlist_hash = make_wordlist_hash(wordlist))
 
             WordlistItems.new(wordlist_stimulus, wordlist)
 
@@ -116,10 +192,9 @@ class WordlistStimulus(_abc_WordlistStimulus):
 
         """
 
-        matching_wordlist_stimuli = []
-        for wordlist_stimulus in cls.objects.all():
-            if wordlist_stimulus.wordlist == wordlist:
-                matching_wordlist_stimuli.append(wordlist_stimulus)
+        matching_wordlist_stimuli = list(
+            cls.objects.filter(wordlist_hash=make_wordlist_hash(wordlist))[:2]
+        )
 
         if len(matching_wordlist_stimuli) == 1:
             return matching_wordlist_stimuli.pop()
@@ -169,7 +244,10 @@ class WordlistTestStimulus(_abc_WordlistStimulus):
 
         if not wordlist_stimulus_object:
 
-            wordlist_stimulus_object = cls.objects.create(uid = django.uid())
+            wordlist_stimulus_object = cls.objects.create(
+                uid = django.uid(),
+                wordlist_hash = make_wordlist_hash(wordlist, expected_responses)
+            )
 
             WordlistTestItems.new(wordlist_stimulus_object, 
                                   wordlist,
@@ -188,14 +266,9 @@ class WordlistTestStimulus(_abc_WordlistStimulus):
 
         assert len(wordlist) == len(expected_responses)
 
-        wordlist_with_expected_responses = zip(wordlist, expected_responses)
-
-        for wordlist_stimulus_object in cls.objects.all():
-
-            if wordlist_stimulus_object.wordlist_with_expected_responses\
-                    == wordlist_with_expected_responses:
-
-                return wordlist_stimulus_object
+        return cls.objects.filter(
+            wordlist_hash=make_wordlist_hash(wordlist, expected_responses)
+        ).first()
 
     #########################################################################
 
@@ -236,6 +309,27 @@ class WordlistTestStimulus(_abc_WordlistStimulus):
 class Lexicon(Model):
     word = models.CharField(max_length=50, primary_key=True, default='word')
 
+    @classmethod
+    def bulk_new(cls, words):
+
+        """
+        Make sure that each of `words` is in the lexicon, with one query to
+        find those that already are and one to create the rest.
+
+        """
+
+        # The words read back from the database are unicode, so utf-8
+        # encoded words must be too, to be found among them.
+        words = list(OrderedDict.fromkeys(force_text(word) for word in words))
+
+        existing_words = set(
+            cls.objects.filter(word__in=words).values_list('word', flat=True)
+        )
+
+        cls.objects.bulk_create(
+            [cls(word=word) for word in words if word not in existing_words]
+        )
+
 class _abc_WordListItems(Model):
 
     class Meta:
@@ -247,37 +341,68 @@ class _abc_WordListItems(Model):
     order = models.PositiveIntegerField(null=True)
 
     @classmethod
-    def _new(cls, wordlist_stimulus, wordlist):
+    def _new(cls, wordlist_stimulus, wordlist, **item_fields):
+
+        """
+        Get or create the items of `wordlist` in `wordlist_stimulus`, in bulk.
+        Any `item_fields` are lists, as long as the wordlist, of values of
+        other fields of the items.
+
+        """
+
+        # As unicode, to be found among the items read from the database.
+        wordlist = [force_text(word) for word in wordlist]
+
+        Lexicon.bulk_new(wordlist)
+
+        existing_items = {
+            (wordlist_item.lexicon_id, wordlist_item.order): wordlist_item
+            for wordlist_item
+            in cls.objects.filter(wordlist_stimulus = wordlist_stimulus)
+        }
 
         wordlist_items = []
+        new_wordlist_items = []
 
         for i, word in enumerate(wordlist):
 
-            lexicon_item, _word_created\
-                = Lexicon.objects.get_or_create(word = word)
+            fields = {name: values[i] for name, values in item_fields.items()}
 
             try:
 
-                wordlist_item\
-                = cls.objects.get(wordlist_stimulus = wordlist_stimulus, 
-                                  lexicon = lexicon_item, 
-                                  order = i)
+                wordlist_item = existing_items[(word, i)]
+
+            except KeyError:
+
+                # Lexicon's primary key is the word itself.
+                wordlist_item = cls(uid = django.uid(),
+                                    wordlist_stimulus = wordlist_stimulus,
+                                    lexicon_id = word,
+                                    order = i,
+                                    **fields)
 
-            except ObjectDoesNotExist:
+                new_wordlist_items.append(wordlist_item)
 
-                wordlist_item\
-                    = cls.objects.create(uid = django.uid(), 
-                                         wordlist_stimulus = wordlist_stimulus, 
-                                         lexicon = lexicon_item, 
-                                         order = i)
+            else:
+
+                if any(getattr(wordlist_item, name) != value
+                       for name, value in fields.items()):
+
+                    for name, value in fields.items():
+                        setattr(wordlist_item, name, value)
+
+                    wordlist_item.save()
 
             wordlist_items.append(wordlist_item)
 
+        cls.objects.bulk_create(new_wordlist_items)
+
         return wordlist_items
 
     @property
     def word(self):
-        return self.lexicon.word
+        # The word is Lexicon's primary key, so there is no need to fetch it.
+        return self.lexicon_id
 
 
 class WordlistItems(_abc_WordListItems):
@@ -303,12 +428,6 @@ class WordlistTestItems(_abc_WordListItems):
         assert all([type(expected_response) is bool 
                     for expected_response in expected_responses])
 
-        wordlist_items = cls._new(wordlist_stimulus, wordlist)
-
-        assert len(wordlist_items) == len(expected_responses)
-
-        for wordlist_item, expected_response in zip(wordlist_items, 
-                                                    expected_responses):
-
-            wordlist_item.expected_response = expected_response
-            wordlist_item.save()
+        return cls._new(wordlist_stimulus,
+                        wordlist,
+                        expected_response=list(expected_responses))
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+#=============================================================================
+# Standard library imports.
+#=============================================================================
+import importlib
+import os
+import shutil
+import tempfile
+
+#=============================================================================
+# Django imports.
+#=============================================================================
+from django.test import TestCase
+
+#=============================================================================
+# Wilhelm imports.
+#=============================================================================
+from contrib.stimuli.textual.models import (Lexicon,
+                                            TextStimulus,
+                                            WordlistStimulus,
+                                            WordlistTestStimulus,
+                                            make_token_index,
+                                            make_wordlist_hash)
+from contrib.stimuli.textual.utils import load_wordlists
+
+#================================ End Imports ================================
+
+class WordlistHash(TestCase):
+
+    def test_make_wordlist_hash_is_stable(self):
+
+        '''
+        Are wordlists hashed to the same checksums that they were hashed to
+        when the existing stimuli were saved?
+        '''
+
+        self.assertEqual(
+            make_wordlist_hash(['apple', 'bread', 'chair']),
+            'e667c11d05a2dcb54e7954f482aeb55b02cf2a46b804da73893b289a5a8abc8b'
+        )
+
+        self.assertEqual(
+            make_wordlist_hash([u'apple', u'table'], [True, False]),
+            '797ee47d35390c32d3834156711f84258873b17c743b90d6f7d326709efbb98e'
+        )
+
+    def test_make_wordlist_hash_is_order_sensitive(self):
+
+        '''
+        Do the same words in a different order, or with different expected
+        responses, make a different hash?
+        '''
+
+        self.assertNotEqual(make_wordlist_hash(['apple', 'bread', 'chair']),
+                            make_wordlist_hash(['chair', 'bread', 'apple']))
+
+        self.assertNotEqual(make_wordlist_hash(['apple', 'table']),
+                            make_wordlist_hash(['apple', 'table'],
+                                               [True, False]))
+
+        self.assertNotEqual(make_wordlist_hash(['apple', 'table'],
+                                               [True, False]),
+                            make_wordlist_hash(['apple', 'table'],
+                                               [False, True]))
+
+    def test_migration_hash_matches_model_hash(self):
+
+        '''
+        Does the copy of make_wordlist_hash in the migration that backfills
+        the hashes agree with the model's?
+        '''
+
+        migration = importlib.import_module(
+            'contrib.stimuli.textual.migrations.0002_wordlist_hash'
+        )
+
+        for wordlist, expected_responses in [
+                (['apple', 'bread', 'chair'], None),
+                (['apple', 'table'], [True, False])]:
+
+            self.assertEqual(
+                migration.make_wordlist_hash(wordlist, expected_responses),
+                make_wordlist_hash(wordlist, expected_responses)
+            )
+
+
+class TokenIndex(TestCase):
+
+    text = u"The dog's bone was in the caf\u00e9, and the dog was not."
+
+    def test_migration_token_index_matches_model_token_index(self):
+
+        '''
+        Does the copy of the tokenizer in the migration that backfills the
+        token indexes agree with the model's?
+        '''
+
+        migration = importlib.import_module(
+            'contrib.stimuli.textual.migrations.0003_textstimulus_token_index'
+        )
+
+        self.assertEqual(migration.make_token_index(self.text),
+                         make_token_index(self.text))
+
+    def test_no_text(self):
+
+        '''
+        Is a text stimulus without a text indexed as having no tokens?
+        '''
+
+        text_stimulus = TextStimulus.new(text=None)
+
+        self.assertIsNone(text_stimulus.text_checksum)
+        self.assertEqual(text_stimulus.get_token_index(), ([], []))
+
+
+class BulkNew(TestCase):
+
+    def test_utf8_words(self):
+
+        '''
+        Are utf-8 encoded words found in the lexicon, and among the items of
+        a wordlist, that were saved as unicode?
+        '''
+
+        wordlist = [u'apple', u'caf\u00e9']
+        utf8_wordlist = [word.encode('utf-8') for word in wordlist]
+
+        Lexicon.bulk_new(wordlist)
+        Lexicon.bulk_new(utf8_wordlist)
+
+        self.assertEqual(sorted(Lexicon.objects.values_list('word', flat=True)),
+                         wordlist)
+
+        wordlist_stimulus = WordlistStimulus.new(wordlist)
+
+        self.assertEqual(WordlistStimulus.new(utf8_wordlist),
+                         wordlist_stimulus)
+
+        self.assertEqual(wordlist_stimulus.wordlist, wordlist)
+
+
+class LoadWordlists(TestCase):
+
+    wordlists_json = u'''
+{"list_\u00e9": ["apple", "caf\u00e9", "chair"],
+ "test_\u00e9": [["apple", true], ["table", false]]}
+'''.strip()
+
+    wordlists_csv = u'''
+wordlist,word,expected_response
+list_\u00e9,apple,
+list_\u00e9,caf\u00e9,
+list_\u00e9,chair,
+test_\u00e9,apple,true
+test_\u00e9,table,false
+'''.strip()
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, filename, content):
+
+        path = os.path.join(self.tmpdir, filename)
+
+        with open(path, 'wb') as f:
+            f.write(content.encode('utf-8') + '\n')
+
+        return path
+
+    def assert_loaded(self, path):
+
+        wordlist_stimuli = load_wordlists(path)
+
+        self.assertEqual(wordlist_stimuli.keys(), [u'list_é', u'test_é'])
+
+        for name in wordlist_stimuli:
+            self.assertIsInstance(name, unicode)
+
+        wordlist_stimulus = wordlist_stimuli[u'list_é']
+        self.assertIsInstance(wordlist_stimulus, WordlistStimulus)
+        self.assertEqual(wordlist_stimulus.wordlist,
+                         [u'apple', u'café', u'chair'])
+
+        wordlist_test_stimulus = wordlist_stimuli[u'test_é']
+        self.assertIsInstance(wordlist_test_stimulus, WordlistTestStimulus)
+        self.assertEqual(
+            wordlist_test_stimulus.wordlist_with_expected_responses,
+            [(u'apple', True), (u'table', False)]
+        )
+
+        self.assertEqual(
+            sorted(Lexicon.objects.values_list('word', flat=True)),
+            [u'apple', u'café', u'chair', u'table']
+        )
+
+        # Loading the same file again gets the same stimuli.
+        self.assertEqual(
+            [stimulus.uid for stimulus in load_wordlists(path).values()],
+            [stimulus.uid for stimulus in wordlist_stimuli.values()]
+        )
+
+    def test_load_wordlists_json(self):
+        self.assert_loaded(self.write('wordlists.json', self.wordlists_json))
+
+    def test_load_wordlists_csv(self):
+        self.assert_loaded(self.write('wordlists.csv', self.wordlists_csv))
@@ -0,0 +1,147 @@
+'''
+Loading sets of wordlist stimuli from files in an experiment repository.
+
+A set of wordlists is either a json file like
+
+    {"list_a": ["apple", "bread", "chair"],
+     "test_a": [["apple", true], ["table", false]]}
+
+where each wordlist is a list of words, or of [word, expected response]
+pairs for a recognition test list, or a csv file with a header like
+
+    wordlist,word,expected_response
+    list_a,apple,
+    test_a,apple,true
+    test_a,table,false
+
+where the words of each wordlist are in order and an empty
+expected_response column means that the list is not a test list.
+'''
+
+from __future__ import absolute_import
+
+#=============================================================================
+# Standard library imports.
+#=============================================================================
+from collections import OrderedDict
+import csv
+import json
+import os
+
+#=============================================================================
+# Wilhelm imports.
+#=============================================================================
+from .models import Lexicon, WordlistStimulus, WordlistTestStimulus
+
+#================================ End Imports ================================
+
+boolean_strings = {'true': True, 'yes': True, '1': True,
+                   'false': False, 'no': False, '0': False}
+
+def parse_expected_response(expected_response):
+
+    try:
+        return boolean_strings[expected_response.strip().lower()]
+    except KeyError:
+        raise ValueError('Not an expected response: %s' % expected_response)
+
+def read_wordlists_json(path):
+
+    with open(path) as f:
+        wordlists = json.load(f, object_pairs_hook=OrderedDict)
+
+    parsed_wordlists = OrderedDict()
+    for name, wordlist in wordlists.items():
+
+        if wordlist and isinstance(wordlist[0], list):
+            words, expected_responses = map(list, zip(*wordlist))
+        else:
+            words, expected_responses = wordlist, None
+
+        parsed_wordlists[name] = (words, expected_responses)
+
+    return parsed_wordlists
+
+def read_wordlists_csv(path):
+
+    parsed_wordlists = OrderedDict()
+
+    with open(path, 'rb') as f:
+
+        for row in csv.DictReader(f):
+
+            # The csv module reads bytes, but json, and so the other format,
+            # gives unicode names and words.
+            name = row['wordlist'].strip().decode('utf-8')
+            word = row['word'].strip().decode('utf-8')
+            expected_response = (row.get('expected_response') or '').strip()
+
+            words, expected_responses\
+                = parsed_wordlists.setdefault(name, ([], []))
+
+            words.append(word)
+
+            if expected_response:
+                expected_responses.append(
+                    parse_expected_response(expected_response)
+                )
+
+    for name, (words, expected_responses) in parsed_wordlists.items():
+
+        if not expected_responses:
+            parsed_wordlists[name] = (words, None)
+        elif len(expected_responses) != len(words):
+            raise ValueError(
+                'Wordlist %s has expected responses for only some words.' % name
+            )
+
+    return parsed_wordlists
+
+def read_wordlists(path):
+
+    '''
+    Return an OrderedDict of the wordlists in the json or csv file at `path`
+    whose values are (words, expected responses) tuples. The expected
+    responses are None unless it is a test list.
+
+    '''
+
+    _, ext = os.path.splitext(path)
+
+    readers = {'.json': read_wordlists_json,
+               '.csv': read_wordlists_csv}
+
+    try:
+        reader = readers[ext.lower()]
+    except KeyError:
+        raise ValueError('Wordlists must be in a json or csv file: %s' % path)
+
+    return reader(path)
+
+def load_wordlists(path):
+
+    '''
+    Get or create a WordlistStimulus, or a WordlistTestStimulus for lists
+    with expected responses, for each wordlist in the json or csv file at
+    `path`. Return them in an OrderedDict by the wordlists' names.
+
+    All the words in the file are put into the lexicon in one go.
+
+    '''
+
+    wordlists = read_wordlists(path)
+
+    Lexicon.bulk_new(word
+                     for words, _ in wordlists.values()
+                     for word in words)
+
+    wordlist_stimuli = OrderedDict()
+    for name, (words, expected_responses) in wordlists.items():
+
+        if expected_responses is None:
+            wordlist_stimuli[name] = WordlistStimulus.new(words)
+        else:
+            wordlist_stimuli[name]\
+                = WordlistTestStimulus.new(words, expected_responses)
+
+    return wordlist_stimuli
@@ -132,6 +132,15 @@ MIDDLEWARE_CLASSES = (
     'django_user_agents.middleware.UserAgentMiddleware',
 )
 
+#=============================================================================
+# Database routing settings.
+#=============================================================================
+# Read only workloads (data exports, score aggregation, feedback listings) go to
+# the READ_REPLICA_DATABASE alias, if it is in DATABASES. See
+# apps.core.routers.
+DATABASE_ROUTERS = ['apps.core.routers.ReadReplicaRouter']
+READ_REPLICA_DATABASE = 'replica'
+
 #=============================================================================
 # Urls settings.
 #=============================================================================
@@ -441,15 +450,20 @@ except IOError:
         WILHELM_VERSION = 'Unknown'
 
 #=============================================================================
-# Django user agent cache
+# Caches
 #=============================================================================
-#CACHES = {
-#    'default': {
-#        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
-#        'LOCATION': '127.0.0.1:11211',
-#    }
-#}
-#USER_AGENTS_CACHE = 'default'
+# The experiments catalog (apps.archives.catalog), rendered rst and parsed user
+# agents are cached here. A local memory cache is kept by each process, so the
+# production settings use memcached, which all processes share. With a local
+# memory cache, the catalog can not tell when another process has changed an
+# experiment, and so reads the experiments from the database on every lookup.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'wilhelm',
+    }
+}
+USER_AGENTS_CACHE = 'default'
 
 # Geoip
 GEOIP_PATH = os.path.join(WILHELM_ROOT, 
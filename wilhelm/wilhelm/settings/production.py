@@ -67,6 +67,35 @@ DATABASES = {
         'PORT': '',
     }
 }
+
+# An optional read replica for exports, aggregation and feedback.
+if 'postgresql-production-replica' in secrets['database']:
+
+    REPLICA_DATABASE_SETTINGS\
+        = secrets['database']['postgresql-production-replica']
+
+    DATABASES[READ_REPLICA_DATABASE] = {
+        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'NAME': REPLICA_DATABASE_SETTINGS['name'],
+        'USER': REPLICA_DATABASE_SETTINGS['username'],
+        'PASSWORD': REPLICA_DATABASE_SETTINGS['password'],
+        'HOST': REPLICA_DATABASE_SETTINGS.get('host', 'localhost'),
+        'PORT': REPLICA_DATABASE_SETTINGS.get('port', ''),
+    }
+
+#=============================================================================
+# Caches
+#=============================================================================
+# Shared by all the server's processes, e.g. for the generation of the
+# experiments catalog.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': '127.0.0.1:11211',
+        'KEY_PREFIX': 'production',
+    }
+}
+
 #=============================================================================
 # Add django_extensions to INSTALLED_APPS
 #=============================================================================
@@ -97,6 +97,19 @@ mk_archive_cache_dir(LOGFILE_DIRECTORY, 0775)
 LOGGING['handlers']['file']['filename']\
     = os.path.join(LOGFILE_DIRECTORY, LOGFILE_FILENAME)
 
+#=============================================================================
+# Caches
+#=============================================================================
+# Shared by all the server's processes, e.g. for the generation of the
+# experiments catalog.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': '127.0.0.1:11211',
+        'KEY_PREFIX': 'staging',
+    }
+}
+
 #=============================================================================
 # Add django_extensions to INSTALLED_APPS
 #=============================================================================
@@ -0,0 +1,21 @@
+from __future__ import absolute_import
+from .development import *
+
+#=============================================================================
+# Database settings.
+#=============================================================================
+# Two SQLite databases, a primary and a read replica, so that the database
+# routing in apps.core.routers can be tested, e.g.
+#
+#   ./manage.py test apps.core --settings=wilhelm.settings.testing
+#
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(WILHELM_ROOT, 'wilhelm.db'),
+    },
+    READ_REPLICA_DATABASE: {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(WILHELM_ROOT, 'wilhelm-replica.db'),
+    }
+}